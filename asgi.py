@@ -0,0 +1,291 @@
+"""
+ASGI serving path for the Multi-Agent Tourism System.
+Serves the same page and JSON API as app.py, but queries are processed on an
+event loop with non-blocking upstream I/O, so one process can hold thousands of
+in-flight queries that are waiting on the network.
+
+Run with:
+    uvicorn asgi:app --host 0.0.0.0 --port 5000
+"""
+import json
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs
+
+import http_client
+import metrics
+import tracing
+from resilience import OVERLOAD_RETRY_AFTER, AsyncConcurrencyLimiter
+from traffic import traffic_log
+from cache_warmer import WARMER_ENABLED, CacheWarmer
+from tourism_agent import TourismAgent
+from web import HTML_TEMPLATE, OVERLOADED_MESSAGE, QUERY_ENDPOINTS, batch_results, format_sse_event, parse_batch
+
+
+# Initialize the Tourism Agent
+agent = TourismAgent()
+
+# Keep the caches warm for popular places (CACHE_WARMER=1), while the server is up
+warmer = CacheWarmer()
+
+# Same query slots and wait queue as app.py, for the requests of this event loop (agents
+# run as tasks here, not on the agent pool, so MAX_CONCURRENT_QUERIES applies as is)
+query_limiter = AsyncConcurrencyLimiter("queries")
+metrics.register_limiters(query_limiter)
+
+# Same permissive CORS policy as the Flask app
+CORS_HEADERS: List[Tuple[bytes, bytes]] = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-headers", b"Content-Type"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+]
+
+
+async def _read_body(receive) -> bytes:
+    """Read the full request body from the ASGI receive channel."""
+    body = b""
+    more_body = True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    return body
+
+
+async def _send(send, status: int, body: bytes, content_type: bytes,
+                headers: List[Tuple[bytes, bytes]] = ()) -> None:
+    """Send a complete HTTP response."""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode()),
+        ] + CORS_HEADERS + list(headers),
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_json(send, payload: Dict, status: int = 200,
+                     headers: List[Tuple[bytes, bytes]] = ()) -> None:
+    """Send a JSON response."""
+    await _send(send, status, json.dumps(payload).encode("utf-8"), b"application/json", headers)
+
+
+def _trace_headers(trace) -> List[Tuple[bytes, bytes]]:
+    """Server-Timing breakdown and trace ID of a finished trace (as in app.add_trace_headers)."""
+    if trace is None:
+        return []
+    return [
+        (b"server-timing", trace.server_timing().encode("latin-1")),
+        (b"x-trace-id", trace.trace_id.encode("ascii")),
+    ]
+
+
+async def process_query(receive, send) -> None:
+    """
+    API endpoint to process tourism queries (same contract as POST /api/query in app.py).
+    """
+    started = time.perf_counter()
+    try:
+        try:
+            data = json.loads(await _read_body(receive) or b"null")
+        except ValueError:
+            data = None
+
+        if not isinstance(data, dict) or 'query' not in data:
+            return await _send_json(send, {
+                'success': False,
+                'error': 'Missing "query" field in request body'
+            }, 400)
+
+        user_query = str(data['query']).strip()
+
+        if not user_query:
+            return await _send_json(send, {
+                'success': False,
+                'error': 'Query cannot be empty'
+            }, 400)
+
+        with tracing.trace('POST /api/query') as trace:
+            result = await agent.aprocess_query_result(user_query)
+
+        payload = {
+            'success': True,
+            'response': result.text
+        }
+        if data.get('structured'):
+            payload['result'] = result.to_dict()
+        if data.get('debug') and trace is not None:
+            payload['trace'] = trace.to_dict()
+        if traffic_log.enabled:
+            traffic_log.record("/api/query", user_query, 200, time.perf_counter() - started, trace)
+        await _send_json(send, payload, headers=_trace_headers(trace))
+
+    except Exception as e:
+        await _send_json(send, {
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+async def process_batch(receive, send) -> None:
+    """
+    API endpoint to process many tourism queries in one request
+    (same contract as POST /api/batch in app.py).
+    """
+    started = time.perf_counter()
+    try:
+        try:
+            data = json.loads(await _read_body(receive) or b"null")
+        except ValueError:
+            data = None
+
+        error, valid = parse_batch(data)
+        if error:
+            return await _send_json(send, {
+                'success': False,
+                'error': error
+            }, 400)
+
+        # Only non-empty strings are sent to the agent; the rest get a per-item error
+        queries = data['queries']
+        with tracing.trace('POST /api/batch') as trace:
+            responses = await agent.aprocess_batch([queries[i].strip() for i in valid], query_limiter)
+
+        payload = {
+            'success': True,
+            'results': batch_results(queries, valid, responses)
+        }
+        if data.get('debug') and trace is not None:
+            payload['trace'] = trace.to_dict()
+        if traffic_log.enabled:
+            traffic_log.record("/api/batch", [queries[i].strip() for i in valid], 200,
+                               time.perf_counter() - started, trace)
+        await _send_json(send, payload, headers=_trace_headers(trace))
+
+    except Exception as e:
+        await _send_json(send, {
+            'success': False,
+            'error': str(e)
+        }, 500)
+
+
+async def stream_query(scope, send) -> None:
+    """
+    API endpoint streaming partial results as Server-Sent Events
+    (same contract as GET /api/query/stream in app.py).
+    """
+    started = time.perf_counter()
+    params = parse_qs(scope.get("query_string", b"").decode("utf-8", "replace"))
+    user_query = params.get("query", [""])[0].strip()
+
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ] + CORS_HEADERS,
+    })
+
+    async def emit(event: str, data: Dict) -> None:
+        body = format_sse_event(event, data).encode("utf-8")
+        await send({"type": "http.response.body", "body": body, "more_body": True})
+
+    if not user_query:
+        await emit('error', {'error': 'Query cannot be empty'})
+        await emit('done', {'response': ''})
+    else:
+        async for event, data in agent.aiter_query_events(user_query):
+            await emit(event, data.to_dict())
+        if traffic_log.enabled:
+            traffic_log.record("/api/query/stream", user_query, 200, time.perf_counter() - started)
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def _lifespan(receive, send) -> None:
+    """
+    Handle ASGI startup/shutdown: the cache warmer (if enabled) runs while the server is up,
+    and the pooled async HTTP client is closed on shutdown.
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            if WARMER_ENABLED:
+                warmer.start()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            warmer.stop()
+            await http_client.close_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+# Paths used as the endpoint label of the request metrics (anything else is "unmatched")
+ROUTES = {"/", "/api/query", "/api/query/stream", "/api/batch", "/api/health", "/api/metrics"}
+
+
+async def app(scope, receive, send) -> None:
+    """ASGI application entry point."""
+    if scope["type"] == "lifespan":
+        return await _lifespan(receive, send)
+    if scope["type"] != "http":
+        return
+
+    endpoint = scope["path"] if scope["path"] in ROUTES else "unmatched"
+    started = time.perf_counter()
+    metrics.http_in_flight.inc(endpoint)
+
+    async def send_with_metrics(message) -> None:
+        # Latency is measured until the response starts, as in app.py
+        if message["type"] == "http.response.start":
+            metrics.record_http_request(endpoint, scope["method"], message["status"],
+                                        time.perf_counter() - started)
+        await send(message)
+
+    try:
+        if scope["method"] != "OPTIONS" and endpoint in QUERY_ENDPOINTS:
+            if not await query_limiter.acquire():
+                return await _send_json(send_with_metrics, {
+                    'success': False,
+                    'error': OVERLOADED_MESSAGE
+                }, 503, [(b"retry-after", str(OVERLOAD_RETRY_AFTER).encode("ascii"))])
+            try:
+                await _route(scope, receive, send_with_metrics)
+            finally:
+                query_limiter.release()
+        else:
+            await _route(scope, receive, send_with_metrics)
+    finally:
+        metrics.http_in_flight.dec(endpoint)
+
+
+async def _route(scope, receive, send) -> None:
+    """Dispatch an HTTP request to its endpoint."""
+    method = scope["method"]
+    path = scope["path"]
+
+    if method == "OPTIONS":
+        await _send(send, 204, b"", b"text/plain")
+    elif path == "/" and method == "GET":
+        await _send(send, 200, HTML_TEMPLATE.encode("utf-8"), b"text/html; charset=utf-8")
+    elif path == "/api/query" and method == "POST":
+        await process_query(receive, send)
+    elif path == "/api/query/stream" and method == "GET":
+        await stream_query(scope, send)
+    elif path == "/api/batch" and method == "POST":
+        await process_batch(receive, send)
+    elif path == "/api/health" and method == "GET":
+        await _send_json(send, {
+            'status': 'healthy',
+            'service': 'Multi-Agent Tourism System'
+        })
+    elif path == "/api/metrics" and method == "GET":
+        await _send(send, 200, metrics.render().encode("utf-8"), metrics.CONTENT_TYPE.encode("ascii"))
+    else:
+        await _send_json(send, {
+            'success': False,
+            'error': 'Not found'
+        }, 404)
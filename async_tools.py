@@ -0,0 +1,338 @@
+"""
+Async versions of the Weather Agent and Places Agent tools.
+Used by the ASGI serving path (asgi.py) so that a single process can keep many
+queries in flight while they wait on Nominatim, Open-Meteo and Overpass.
+Caches, classification and formatting are shared with tools.py; lookups and writes
+of the on-disk cache stores run in worker threads so SQLite never blocks the loop.
+"""
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+import http_client
+from cache import MISSING, TTLCache
+from gazetteer import lookup_place
+from json_stream import ArrayStreamParser
+from resilience import check_deadline
+from results import PlacesReport, WeatherReport
+import tools
+import tracing
+
+# Deadline and circuit breaker errors (resilience.py) are requests exceptions
+try:
+    import httpx
+    _HTTP_ERRORS = (httpx.HTTPError, requests.exceptions.RequestException)
+except ImportError:  # Reported by http_client.get_async_client() on first use
+    _HTTP_ERRORS = (requests.exceptions.RequestException,)
+
+
+async def _cache_io(cache: TTLCache, fn: Callable[..., Any], *args) -> Any:
+    """
+    Call fn(*args), which reads or writes `cache`, without blocking the event loop:
+    in a worker thread if the cache has a SQLite store, directly if it is memory only.
+    """
+    if cache.on_disk:
+        return await asyncio.to_thread(fn, *args)
+    return fn(*args)
+
+
+@tracing.traced()
+async def _nominatim_lookup(query: str) -> Optional[Dict]:
+    """Async version of tools._nominatim_lookup (shares the geocoding cache)."""
+    key = tools._normalize_query(query)
+    cached = await _cache_io(tools.geocode_cache, tools.geocode_cache.get, key)
+    if cached is not MISSING:
+        tracing.annotate(cache="hit")
+        return cached
+    tracing.annotate(cache="miss")
+
+    # Shares in-flight lookups with other tasks and with the sync tools
+    return await tools.geocode_flight.ado(key, _geocode_leader, query)
+
+
+async def _geocode_leader(query: str) -> Optional[Dict]:
+    """Async version of tools._geocode_leader."""
+    key = tools._normalize_query(query)
+    cached = await _cache_io(tools.geocode_cache, tools.geocode_cache.get, key, MISSING, False)
+    if cached is not MISSING:
+        return cached
+    return await _fetch_nominatim(query)
+
+
+@tracing.traced()
+async def _fetch_nominatim(query: str) -> Optional[Dict]:
+    """Async version of tools._fetch_nominatim."""
+    response = await http_client.async_get(tools.NOMINATIM_URL, params=tools._nominatim_params(query), timeout=10)
+    response.raise_for_status()
+
+    return await _cache_io(tools.geocode_cache, tools._store_nominatim_result, query, response.json())
+
+
+@tracing.traced()
+async def get_coordinates(place_name: str) -> Optional[Dict[str, float]]:
+    """
+    Get coordinates (latitude, longitude) for a place, from the built-in gazetteer
+    or else the Nominatim API. Misspellings of well-known cities are matched only if
+    Nominatim finds nothing.
+
+    Args:
+        place_name: Name of the place
+
+    Returns:
+        Dictionary with 'lat', 'lon' and 'display_name' keys, or None if place not found
+    """
+    try:
+        location = lookup_place(place_name, fuzzy=False) or await _nominatim_lookup(place_name)
+        if location is None:
+            # The fuzzy scan is CPU-bound; keep it off the event loop
+            location = await asyncio.to_thread(lookup_place, place_name)
+        if location:
+            return {
+                "lat": location["lat"],
+                "lon": location["lon"],
+                "display_name": location["display_name"]
+            }
+        return None
+    except Exception as e:
+        print(f"Error getting coordinates: {e}")
+        return None
+
+
+@tracing.traced()
+async def fetch_current_weather(lat: float, lon: float) -> Optional[Dict]:
+    """Async version of tools.fetch_current_weather (shares the weather cache)."""
+    key, params = tools._weather_request(lat, lon)
+
+    entry = await _cache_io(tools.weather_cache, tools.weather_cache.lookup, key)
+    if entry is not None:
+        tracing.annotate(cache="hit")
+        return dict(entry.value, age=entry.age)
+    tracing.annotate(cache="miss")
+
+    return await tools.weather_flight.ado(key, _weather_leader, key, params)
+
+
+async def _weather_leader(key: str, params: Dict) -> Optional[Dict]:
+    """Async version of tools._weather_leader."""
+    entry = await _cache_io(tools.weather_cache, tools.weather_cache.lookup, key, False)
+    if entry is not None:
+        return dict(entry.value, age=entry.age)
+    return await _fetch_weather(key, params)
+
+
+@tracing.traced()
+async def _fetch_weather(key: str, params: Dict) -> Optional[Dict]:
+    """Async version of tools._fetch_weather."""
+    response = await http_client.async_get(tools.OPEN_METEO_URL, params=params, timeout=10)
+    response.raise_for_status()
+
+    return await _cache_io(tools.weather_cache, tools._store_weather, key, response.json())
+
+
+@tracing.traced()
+async def weather_agent(place_name: str) -> str:
+    """
+    Weather Agent: Gets current weather for a place.
+
+    Args:
+        place_name: Name of the place
+
+    Returns:
+        Formatted weather information string
+    """
+    coords = await get_coordinates(place_name)
+    if not coords:
+        return f"I don't know if this place exists: {place_name}"
+    return await weather_agent_for_location(place_name, coords)
+
+
+async def weather_agent_for_location(place_name: str, coords: Dict) -> str:
+    """Async version of tools.weather_agent_for_location."""
+    return (await weather_report_for_location(place_name, coords)).text
+
+
+@tracing.traced()
+async def weather_report_for_location(place_name: str, coords: Dict) -> WeatherReport:
+    """
+    Weather Agent entry point for a place that has already been geocoded.
+
+    Args:
+        place_name: Name of the place (used in the response text)
+        coords: Location with 'lat' and 'lon' keys
+
+    Returns:
+        WeatherReport, with the error message if the lookup failed
+    """
+    try:
+        weather = await fetch_current_weather(coords["lat"], coords["lon"])
+        return tools.weather_report(place_name, weather)
+    except _HTTP_ERRORS as e:
+        return WeatherReport(place_name, error=f"Error fetching weather data: {str(e)}")
+    except Exception as e:
+        return WeatherReport(place_name, error=f"Error in weather agent: {str(e)}")
+
+
+@tracing.traced()
+async def search_famous_places_by_name(city_name: str) -> List[str]:
+    """
+    Search for famous tourist places by name using Nominatim API.
+    Lookups run one after another to stay within Nominatim's usage policy.
+
+    Args:
+        city_name: Name of the city
+
+    Returns:
+        List of famous place names found
+    """
+    famous_places = []
+    for place in tools.famous_places_to_search(city_name):
+        try:
+            name = tools._famous_place_name(await _nominatim_lookup(f"{place}, {city_name}"))
+            if name:
+                famous_places.append(name)
+        except Exception:
+            continue
+    return famous_places
+
+
+@tracing.traced()
+async def _query_overpass(lat: float, lon: float, search_radius: int,
+                          limit: int = tools.OVERPASS_RESULT_LIMIT) -> List[Dict]:
+    """
+    Async version of tools._query_overpass.
+    Elements are classified as the body streams in and the download stops at `limit`.
+    """
+    response = await http_client.async_post(
+        tools.OVERPASS_URL,
+        data={"data": tools._build_overpass_query(lat, lon, search_radius)},
+        timeout=60,
+        stream=True
+    )
+    try:
+        response.raise_for_status()
+        attractions: List[Dict] = []
+        seen_names = set()
+        parser = ArrayStreamParser("elements")
+
+        async for chunk in response.aiter_bytes(64 * 1024):
+            check_deadline()
+            if _add_attractions(parser.feed(chunk), attractions, seen_names, limit) or parser.done:
+                break
+        else:
+            _add_attractions(parser.feed(b"", final=True), attractions, seen_names, limit)
+        tracing.annotate(attractions=len(attractions))
+        return attractions
+    finally:
+        await response.aclose()
+
+
+def _add_attractions(elements: List[Dict], attractions: List[Dict], seen_names: set, limit: int) -> bool:
+    """
+    Classify a batch of Overpass elements into `attractions`, skipping repeated names.
+
+    Returns:
+        True once `limit` attractions have been collected
+    """
+    for element in elements:
+        attraction = tools._attraction_from_element(element)
+        if attraction is None:
+            continue
+        name_lower = attraction["name"].lower()
+        if name_lower not in seen_names:
+            attractions.append(attraction)
+            seen_names.add(name_lower)
+            if limit and len(attractions) >= limit:
+                return True
+    return False
+
+
+@tracing.traced()
+async def fetch_attractions(lat: float, lon: float, search_radius: int = tools.SEARCH_RADIUS) -> List[Dict]:
+    """Async version of tools.fetch_attractions (shares the Overpass cache and POI index)."""
+    if tools.PLACES_BACKEND == "local":
+        tracing.annotate(backend="local")
+        # Loading and searching the index is disk- and CPU-bound; keep it off the event loop
+        return await asyncio.to_thread(tools._local_attractions, lat, lon, search_radius)
+
+    cached = await _cache_io(tools.overpass_cache, tools._cached_attractions, lat, lon, search_radius)
+    if cached is not None:
+        tracing.annotate(cache="hit")
+        return cached
+    tracing.annotate(cache="miss")
+
+    return await tools.overpass_flight.ado(tools._overpass_flight_key(lat, lon, search_radius),
+                                           _overpass_leader, lat, lon, search_radius)
+
+
+async def _overpass_leader(lat: float, lon: float, search_radius: int) -> List[Dict]:
+    """Async version of tools._overpass_leader."""
+    cached = await _cache_io(tools.overpass_cache, tools._cached_attractions, lat, lon, search_radius, False)
+    if cached is not None:
+        return cached
+    return await _fetch_overpass(lat, lon, search_radius)
+
+
+@tracing.traced()
+async def _fetch_overpass(lat: float, lon: float, search_radius: int) -> List[Dict]:
+    """Async version of tools._fetch_overpass."""
+    attractions = await _query_overpass(lat, lon, search_radius)
+    await _cache_io(tools.overpass_cache, tools._store_attractions, lat, lon, search_radius, attractions)
+    return attractions
+
+
+@tracing.traced()
+async def places_agent(place_name: str) -> str:
+    """
+    Places Agent: Gets tourist attractions for a place.
+
+    Args:
+        place_name: Name of the place
+
+    Returns:
+        Formatted list of tourist attractions (up to 20)
+    """
+    coords = await get_coordinates(place_name)
+    if not coords:
+        return f"I don't know if this place exists: {place_name}"
+    return await places_agent_for_location(place_name, coords)
+
+
+async def places_agent_for_location(place_name: str, coords: Dict) -> str:
+    """Async version of tools.places_agent_for_location."""
+    return (await places_report_for_location(place_name, coords)).text
+
+
+@tracing.traced()
+async def places_report_for_location(place_name: str, coords: Dict) -> PlacesReport:
+    """
+    Places Agent entry point for a place that has already been geocoded.
+
+    Args:
+        place_name: Name of the place
+        coords: Location with 'lat' and 'lon' keys
+
+    Returns:
+        PlacesReport, with the error message if the search failed
+    """
+    try:
+        # The famous-place lookups (Nominatim) and the radius search (Overpass) hit
+        # different services, so they run side by side
+        famous_places, attractions = await asyncio.gather(
+            search_famous_places_by_name(place_name),
+            fetch_attractions(coords["lat"], coords["lon"]),
+            return_exceptions=True
+        )
+        if isinstance(famous_places, BaseException):
+            raise famous_places
+        if isinstance(attractions, BaseException):
+            # Out of time or Overpass is down: the famous places are still worth returning
+            if not famous_places or not isinstance(attractions, _HTTP_ERRORS):
+                raise attractions
+            print(f"Attractions search failed, answering with famous places only: {attractions}")
+            attractions = []
+        return tools.places_report(place_name, famous_places, attractions)
+    except _HTTP_ERRORS as e:
+        return PlacesReport(place_name, error=f"Error fetching places data: {str(e)}")
+    except Exception as e:
+        return PlacesReport(place_name, error=f"Error in places agent: {str(e)}")
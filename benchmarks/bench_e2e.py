@@ -0,0 +1,177 @@
+"""
+Offline end-to-end benchmark.
+Starts local fake Nominatim, Open-Meteo and Overpass services (fake_upstreams.py),
+points the agent at them, and sends queries through TourismAgent.process_query or
+through the Flask /api/query endpoint over HTTP, at a chosen concurrency. Reports
+throughput, p50/p95/p99 latency, failed answers and the requests each upstream got.
+
+Run from the repository root:
+    python benchmarks/bench_e2e.py --target agent --requests 500 --concurrency 16
+    python benchmarks/bench_e2e.py --target flask --latency 0.2 --error-rate 0.05 --places 200
+
+Caches start empty (a temporary CACHE_DIR) and the gazetteer is off, so the share of
+cache hits is set by --places: queries cycle through that many distinct places.
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstreams import start_upstreams, upstream_environ  # noqa: E402
+
+TEMPLATES = [
+    "I'm going to go to {place}, let's plan my trip.",
+    "I'm going to go to {place}, what is the temperature there",
+    "I'm going to go to {place}, what is the temperature there? And what are the places I can visit?",
+]
+
+SYLLABLES = ["ka", "lo", "mi", "ran", "tu", "ve", "zor", "pa", "shi", "den", "bo", "lir"]
+
+# Answers that mean the query failed (see TourismResponse.complete for the full rule)
+FAILURE_MARKERS = ("Error ", "taking too long", "Could not fetch weather data", "I don't know if this place exists",
+                   "Could not find specific tourist attractions")
+
+
+def place_names(count: int, seed: int = 0) -> List[str]:
+    """Generate `count` distinct made-up place names (letters only, as the extractor expects)."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        names.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize())
+    return sorted(names)
+
+
+def build_queries(count: int, places: int, seed: int = 0) -> List[str]:
+    """Queries cycling through `places` distinct places and the example templates."""
+    rng = random.Random(seed)
+    names = place_names(places, seed)
+    return [rng.choice(TEMPLATES).format(place=names[i % len(names)]) for i in range(count)]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_load(send: Callable[[str], str], queries: List[str], concurrency: int) -> Tuple[float, List[float], int]:
+    """
+    Send every query through `send` from `concurrency` threads.
+
+    Returns:
+        (elapsed seconds, latency of each query in seconds, failed answers)
+    """
+    latencies: List[float] = []
+    failures = 0
+    lock = threading.Lock()
+
+    def one(query: str) -> None:
+        nonlocal failures
+        started = time.perf_counter()
+        try:
+            failed = any(marker in send(query) for marker in FAILURE_MARKERS)
+        except Exception:
+            failed = True
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            failures += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, queries))
+    return time.perf_counter() - started, latencies, failures
+
+
+def agent_sender() -> Callable[[str], str]:
+    """Send queries straight to a TourismAgent."""
+    from tourism_agent import TourismAgent
+    agent = TourismAgent()
+    return agent.process_query
+
+
+def flask_sender(concurrency: int) -> Callable[[str], str]:
+    """Send queries to the Flask app's /api/query, served over HTTP on a free local port."""
+    import requests
+    from requests.adapters import HTTPAdapter
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from app import app
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, name="bench-flask", daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/query"
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+
+    def send(query: str) -> str:
+        response = session.post(url, json={"query": query}, timeout=300)
+        data = response.json()
+        return data.get("response") or f"Error {response.status_code}: {data.get('error')}"
+    return send
+
+
+def report(target: str, elapsed: float, latencies: List[float], failures: int,
+           upstreams: Dict, settings: str) -> None:
+    """Print throughput, latency percentiles and upstream request counts."""
+    latencies = sorted(latencies)
+    print(f"Target: {target}  ({settings})")
+    print(f"requests   {len(latencies):10d}   failed {failures}")
+    print(f"throughput {len(latencies) / elapsed:10.1f} queries/s   ({elapsed:.2f} s)")
+    for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        print(f"{label}        {percentile(latencies, fraction) * 1000:10.1f} ms")
+    print(f"max        {latencies[-1] * 1000 if latencies else 0.0:10.1f} ms")
+    for upstream in upstreams.values():
+        stats = upstream.stats()
+        print(f"upstream {stats['name']:<11} {stats['requests']:6d} requests, {stats['errors']} answered 503")
+
+
+def main():
+    """Start the fake upstreams, run the load and print the report."""
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark")
+    parser.add_argument("--target", choices=["agent", "flask"], default="agent",
+                        help="TourismAgent.process_query or the Flask /api/query endpoint")
+    parser.add_argument("--requests", type=int, default=200, help="Queries to send")
+    parser.add_argument("--concurrency", type=int, default=8, help="Queries in flight at once")
+    parser.add_argument("--places", type=int, default=20, help="Distinct places the queries cycle through")
+    parser.add_argument("--latency", type=float, default=0.05, help="Upstream response latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random upstream latency, up to (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of upstream requests failing with 503")
+    parser.add_argument("--overpass-elements", type=int, default=500, help="Elements per Overpass response")
+    parser.add_argument("--overpass-latency", type=float, help="Overpass latency, if different (s)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    upstreams = start_upstreams(args.latency, args.jitter, args.error_rate,
+                                args.overpass_elements, args.overpass_latency)
+    # Must be set before the agent's modules are imported: they read it at import time
+    os.environ.update(upstream_environ(upstreams))
+    os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="bench-cache-")
+    os.environ["GAZETTEER_PATH"] = ""
+    os.environ.setdefault("HTTP_BACKOFF_FACTOR", "0.05")
+
+    send = agent_sender() if args.target == "agent" else flask_sender(args.concurrency)
+    queries = build_queries(args.requests, args.places, args.seed)
+    elapsed, latencies, failures = run_load(send, queries, args.concurrency)
+
+    settings = (f"concurrency {args.concurrency}, {args.places} places, latency {args.latency}s, "
+                f"error rate {args.error_rate}, {args.overpass_elements} Overpass elements")
+    report(args.target, elapsed, latencies, failures, upstreams, settings)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,138 @@
+"""
+Micro-benchmark for place name extraction.
+Compares place_extractor.extract_place_name with the previous implementation
+(six regex searches per query plus post-processing) on a generated corpus, after
+checking that both give the same answer for every query.
+
+Run from the repository root:
+    python benchmarks/bench_extractor.py --queries 200000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import Callable, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from gazetteer import get_gazetteer  # noqa: E402
+from place_extractor import extract_place_name  # noqa: E402
+
+TEMPLATES = [
+    "I'm going to go to {place}, let's plan my trip.",
+    "I'm going to {place}, what is the temperature there",
+    "I'm going to {place}, what are the places I can visit?",
+    "I'm going to go to {place}, what is the temperature there? And what are the places I can visit?",
+    "what should I visit in {place}?",
+    "weather in {place}",
+    "plan a trip to {place} next week",
+    "we are flying from {place} tomorrow",
+    "Tell me about {place}",
+    "{place}",
+    "i want to visit the {place} area, where should i go",
+    "is it raining in {place} today? also what to see",
+    "how hot is it",
+    "",
+]
+
+FALLBACK_PLACES = ["Bangalore", "mysore", "Udupi", "New York", "rio de janeiro", "Paris", "hampi"]
+
+
+def legacy_extract_place_name(user_input: str) -> str:
+    """The extraction logic TourismAgent used before place_extractor.py."""
+    patterns = [
+        r"going to go to ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+        r"going to ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+        r"visit ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+        r"in ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+        r"to ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+        r"from ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, user_input, re.IGNORECASE)
+        if match:
+            place = match.group(1).strip()
+            place = re.sub(r'\s+(what|where|when|how|let|plan|trip|from|to|going|visit).*$', '', place, flags=re.IGNORECASE)
+            place = re.sub(r'^\s*(?:the|a|an)\s+', '', place, flags=re.IGNORECASE).strip()
+            place = ' '.join(word.capitalize() for word in place.split())
+            if place and len(place) > 2:
+                return place
+
+    words = user_input.split()
+    place_words = []
+    skip_words = {'i', 'i\'m', 'let\'s', 'let', 'going', 'to', 'go', 'visit', 'from', 'in', 'the', 'a', 'an', 'what', 'where', 'when', 'how', 'plan', 'trip', 'is', 'are', 'there', 'and', 'or', 'but'}
+
+    for i, w in enumerate(words):
+        w_clean = w.strip('.,!?;:').lower()
+        if w_clean in skip_words:
+            continue
+        if (w and w[0].isupper()) or (len(w_clean) > 3 and w_clean not in skip_words):
+            place_words.append(w.strip('.,!?;:'))
+            if i + 1 < len(words):
+                next_w = words[i + 1].strip('.,!?;:').lower()
+                if next_w not in skip_words and (len(next_w) > 2 or words[i + 1][0].isupper()):
+                    place_words.append(words[i + 1].strip('.,!?;:'))
+                    break
+
+    if place_words:
+        place = ' '.join(place_words)
+        place = ' '.join(word.capitalize() for word in place.split())
+        return place
+
+    return ""
+
+
+def build_corpus(size: int, seed: int = 0) -> List[str]:
+    """Generate `size` queries from the templates and the gazetteer's place names."""
+    rng = random.Random(seed)
+    gazetteer = get_gazetteer()
+    places = list(gazetteer.names) if gazetteer is not None else FALLBACK_PLACES
+    corpus = []
+    for _ in range(size):
+        place = rng.choice(places)
+        if rng.random() < 0.5:
+            place = place.lower()
+        corpus.append(rng.choice(TEMPLATES).format(place=place))
+    return corpus
+
+
+def measure(extract: Callable[[str], str], corpus: List[str], repeat: int) -> float:
+    """Best-of-`repeat` throughput in queries per second."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for query in corpus:
+            extract(query)
+        best = min(best, time.perf_counter() - started)
+    return len(corpus) / best
+
+
+def main():
+    """Check equivalence, then report throughput of both implementations."""
+    parser = argparse.ArgumentParser(description="Place name extraction micro-benchmark")
+    parser.add_argument("--queries", type=int, default=100000, help="Corpus size")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per implementation")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.queries, args.seed)
+
+    mismatches = [q for q in corpus if extract_place_name(q) != legacy_extract_place_name(q)]
+    if mismatches:
+        print(f"{len(mismatches)} queries extract differently, e.g. {mismatches[0]!r}")
+        return 1
+
+    legacy = measure(legacy_extract_place_name, corpus, args.repeat)
+    compiled = measure(extract_place_name, corpus, args.repeat)
+    print(f"Corpus: {len(corpus)} queries (identical results)")
+    print(f"legacy     {legacy:12,.0f} queries/s  {1e6 / legacy:6.2f} us/query")
+    print(f"compiled   {compiled:12,.0f} queries/s  {1e6 / compiled:6.2f} us/query")
+    print(f"speedup    {compiled / legacy:12.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+"""
+Local stand-ins for Nominatim, Open-Meteo and Overpass.
+Each runs an HTTP server on 127.0.0.1 with configurable latency, jitter, error
+rate and Overpass payload size, and counts the requests it receives. Answers are
+derived from the query, so the same query always gets the same answer.
+
+Used by bench_e2e.py; can also be run on its own to point a dev server at:
+    python benchmarks/fake_upstreams.py --latency 0.2
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Tags that the attraction classifier accepts, cycled through the generated elements
+ATTRACTION_TAGS = [
+    {"tourism": "attraction"},
+    {"tourism": "museum"},
+    {"historic": "monument"},
+    {"leisure": "park"},
+    {"natural": "peak"},
+    {"tourism": "viewpoint"},
+]
+
+# The "(around:radius,lat,lon)" filter of an Overpass query
+AROUND_PATTERN = re.compile(r"around:\s*([\d.]+)\s*,\s*(-?[\d.]+)\s*,\s*(-?[\d.]+)")
+METERS_PER_DEGREE = 111320.0
+
+
+def _seed(text: str) -> int:
+    """Stable integer derived from a string."""
+    return int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "big")
+
+
+def _coordinates(text: str) -> Tuple[float, float]:
+    """Stable coordinates for a place name, spread over the inhabited latitudes."""
+    rng = random.Random(_seed(text))
+    return round(rng.uniform(-50, 60), 4), round(rng.uniform(-180, 180), 4)
+
+
+class FakeUpstream:
+    """
+    One fake upstream service.
+
+    Responses are delayed by `latency` plus up to `jitter` seconds, and a share
+    `error_rate` of requests is answered with 503.
+    """
+
+    def __init__(self, name: str, path: str, respond: Callable[[Dict[str, str]], object],
+                 latency: float = 0.0, jitter: float = 0.0, error_rate: float = 0.0):
+        """
+        Initialize the service (call start() to serve it).
+
+        Args:
+            name: Service name, used in stats()
+            path: URL path the service answers on (e.g. "/search")
+            respond: Builds the JSON answer from the request's parameters
+            latency: Seconds added to every response
+            jitter: Up to this many extra random seconds per response
+            error_rate: Share of requests (0-1) answered with 503
+        """
+        self.name = name
+        self.path = path
+        self.respond = respond
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+
+    def start(self) -> "FakeUpstream":
+        """Serve on a free port of 127.0.0.1 from a daemon thread."""
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real services
+
+            def do_GET(self):
+                upstream._handle(self, parse_qs(urlsplit(self.path).query))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                upstream._handle(self, parse_qs(self.rfile.read(length).decode("utf-8")))
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name=f"fake-{self.name}", daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def _handle(self, handler: BaseHTTPRequestHandler, query: Dict) -> None:
+        with self._lock:
+            self.requests += 1
+            fail = random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if urlsplit(handler.path).path != self.path:
+            status, body = 404, b"{}"
+        elif fail:
+            status, body = 503, b'{"error": "unavailable"}'
+        else:
+            params = {key: values[0] for key, values in query.items()}
+            status, body = 200, json.dumps(self.respond(params)).encode("utf-8")
+
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def stats(self) -> Dict:
+        return {"name": self.name, "requests": self.requests, "errors": self.errors}
+
+
+def nominatim_response(params: Dict[str, str]) -> list:
+    """A single match for any query; "<place>, <city>" lookups are tourist attractions."""
+    query = params.get("q", "")
+    lat, lon = _coordinates(query.split(",")[-1].strip().lower())
+    attraction = "," in query
+    return [{
+        "lat": str(lat),
+        "lon": str(lon),
+        "display_name": f"{query}, Fakeland",
+        "class": "tourism" if attraction else "place",
+        "type": "attraction" if attraction else "city"
+    }]
+
+
+def open_meteo_response(params: Dict[str, str]) -> Dict:
+    """Current conditions that depend only on the requested grid cell."""
+    rng = random.Random(_seed(f"{params.get('latitude')},{params.get('longitude')}"))
+    return {"current": {
+        "temperature_2m": round(rng.uniform(-10, 40), 1),
+        "precipitation_probability": rng.randrange(0, 101)
+    }}
+
+
+def overpass_response_factory(elements: int) -> Callable[[Dict[str, str]], Dict]:
+    """
+    Build an Overpass responder returning `elements` named attractions per query,
+    scattered inside the query's "around:radius,lat,lon" circle.
+
+    Args:
+        elements: Number of elements in every response (sets the payload size)
+    """
+    def respond(params: Dict[str, str]) -> Dict:
+        query = params.get("data", "")
+        rng = random.Random(_seed(query))
+        match = AROUND_PATTERN.search(query)
+        if match:
+            radius, lat, lon = (float(value) for value in match.groups())
+        else:
+            radius, lat, lon = 5000.0, rng.uniform(-50, 60), rng.uniform(-180, 180)
+        lon_scale = max(math.cos(math.radians(lat)), 0.01)
+
+        def point() -> Tuple[float, float]:
+            # Uniform over the disc, kept just inside its edge
+            distance = 0.95 * radius * math.sqrt(rng.random()) / METERS_PER_DEGREE
+            bearing = rng.uniform(0, 2 * math.pi)
+            return (round(lat + distance * math.cos(bearing), 6),
+                    round(lon + distance * math.sin(bearing) / lon_scale, 6))
+
+        result = []
+        for i in range(elements):
+            element_lat, element_lon = point()
+            result.append({
+                "type": "node",
+                "id": i,
+                "lat": element_lat,
+                "lon": element_lon,
+                "tags": dict(ATTRACTION_TAGS[i % len(ATTRACTION_TAGS)], name=f"Sight {i}")
+            })
+        return {"elements": result}
+    return respond
+
+
+def start_upstreams(latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0,
+                    overpass_elements: int = 500, overpass_latency: Optional[float] = None) -> Dict[str, FakeUpstream]:
+    """
+    Start fake Nominatim, Open-Meteo and Overpass services.
+
+    Args:
+        latency: Seconds added to every response
+        jitter: Up to this many extra random seconds per response
+        error_rate: Share of requests (0-1) answered with 503
+        overpass_elements: Elements per Overpass response
+        overpass_latency: Overpass latency, if different from `latency`
+
+    Returns:
+        Services keyed by "nominatim", "open_meteo" and "overpass"
+    """
+    return {
+        "nominatim": FakeUpstream("nominatim", "/search", nominatim_response,
+                                  latency, jitter, error_rate).start(),
+        "open_meteo": FakeUpstream("open_meteo", "/v1/forecast", open_meteo_response,
+                                   latency, jitter, error_rate).start(),
+        "overpass": FakeUpstream("overpass", "/api/interpreter", overpass_response_factory(overpass_elements),
+                                 latency if overpass_latency is None else overpass_latency,
+                                 jitter, error_rate).start(),
+    }
+
+
+def upstream_environ(upstreams: Dict[str, FakeUpstream]) -> Dict[str, str]:
+    """Environment variables that point tools.py at the fake services."""
+    return {
+        "NOMINATIM_URL": upstreams["nominatim"].url,
+        "OPEN_METEO_URL": upstreams["open_meteo"].url,
+        "OVERPASS_URL": upstreams["overpass"].url,
+    }
+
+
+def main():
+    """Serve the fake upstreams until interrupted, printing the variables to use them."""
+    parser = argparse.ArgumentParser(description="Local fake Nominatim, Open-Meteo and Overpass")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds, up to this")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--overpass-elements", type=int, default=500, help="Elements per Overpass response")
+    args = parser.parse_args()
+
+    upstreams = start_upstreams(args.latency, args.jitter, args.error_rate, args.overpass_elements)
+    for key, value in upstream_environ(upstreams).items():
+        print(f"export {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,215 @@
+"""
+Replay captured traffic against a running server.
+Reads a traffic log written with TRAFFIC_LOG_PATH (see traffic.py) and re-issues its
+requests to /api/query, /api/batch or /api/query/stream with their original spacing,
+sped up by --speed, from at most --concurrency threads. Reports throughput, latency
+percentiles per endpoint next to the latencies recorded at capture time, errors, and
+how far sending fell behind the schedule (a sign the client, not the server, was the
+bottleneck).
+
+The query log of the cache warmer (QUERY_LOG_PATH) and plain text files with one
+query per line can be replayed too; lines without a timestamp are sent back to back.
+
+Run from the repository root against a running server:
+    python benchmarks/replay_traffic.py traffic.jsonl --url http://127.0.0.1:5000
+    python benchmarks/replay_traffic.py traffic.jsonl --speed 10 --concurrency 64
+    python benchmarks/replay_traffic.py traffic.jsonl --speed 0     # as fast as possible
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_e2e import percentile  # noqa: E402
+
+ENDPOINTS = ("/api/query", "/api/batch", "/api/query/stream")
+
+
+class CapturedRequest(NamedTuple):
+    """One request of a traffic log."""
+    offset: float                   # Seconds after the first request of the log
+    endpoint: str
+    payload: object                 # The query, or the list of queries of a batch
+    latency_ms: Optional[float]     # Latency recorded at capture time, if any
+
+
+def load_log(path: str, limit: int = 0) -> List[CapturedRequest]:
+    """
+    Read a traffic log.
+
+    Args:
+        path: JSON lines traffic log, query log or plain text file of queries
+        limit: Read at most this many requests (0 for all)
+
+    Returns:
+        The requests, in order of their start time
+    """
+    # (start timestamp, endpoint, payload, latency); lines without a timestamp start
+    # with the line before them
+    records = []
+    last_ts = 0.0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = {"query": line}
+            if not isinstance(record, dict):
+                continue
+
+            endpoint = record.get("endpoint", "/api/query")
+            if endpoint not in ENDPOINTS:
+                continue
+            payload = record.get("queries") if endpoint == "/api/batch" else record.get("query")
+            if not payload:
+                continue
+
+            if record.get("ts") is not None:
+                last_ts = record["ts"]
+            records.append((last_ts, endpoint, payload, record.get("latency_ms")))
+
+    # Requests are logged when they finish, so a slow request comes after later-started ones
+    records.sort(key=lambda r: r[0])
+    if limit:
+        records = records[:limit]
+    first_ts = records[0][0] if records else 0.0
+    return [CapturedRequest(ts - first_ts, endpoint, payload, latency_ms)
+            for ts, endpoint, payload, latency_ms in records]
+
+
+class Replayer:
+    """Sends captured requests to a server and collects their latencies."""
+
+    def __init__(self, url: str, concurrency: int, timeout: float):
+        """
+        Initialize the replayer.
+
+        Args:
+            url: Base URL of the server (e.g. "http://127.0.0.1:5000")
+            concurrency: Requests in flight at once
+            timeout: Seconds to wait for each response
+        """
+        self.url = url.rstrip("/")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=concurrency))
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.lags: List[float] = []
+        self._lock = threading.Lock()
+
+    def send(self, request: CapturedRequest) -> None:
+        """Send one request and wait for the whole response."""
+        if request.endpoint == "/api/batch":
+            response = self.session.post(self.url + request.endpoint, json={"queries": request.payload},
+                                         timeout=self.timeout)
+        elif request.endpoint == "/api/query/stream":
+            response = self.session.get(self.url + request.endpoint, params={"query": request.payload},
+                                        timeout=self.timeout, stream=True)
+            for _ in response.iter_content(chunk_size=None):
+                pass
+        else:
+            response = self.session.post(self.url + request.endpoint, json={"query": request.payload},
+                                         timeout=self.timeout)
+        response.raise_for_status()
+
+    def _run(self, request: CapturedRequest, scheduled: float) -> None:
+        started = time.perf_counter()
+        try:
+            self.send(request)
+            failed = False
+        except requests.exceptions.RequestException:
+            failed = True
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.lags.append(max(0.0, started - scheduled))
+            self.latencies[request.endpoint].append(elapsed)
+            self.errors[request.endpoint] += failed
+
+    def replay(self, captured: List[CapturedRequest], speed: float) -> float:
+        """
+        Replay requests on their original schedule divided by `speed` (0 = no waiting).
+
+        Returns:
+            Elapsed seconds
+        """
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for request in captured:
+                scheduled = started + (request.offset / speed if speed > 0 else 0.0)
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._run, request, scheduled)
+        return time.perf_counter() - started
+
+
+def report(captured: List[CapturedRequest], replayer: Replayer, elapsed: float, settings: str) -> None:
+    """Print throughput and latency percentiles, per endpoint and against the captured latencies."""
+    total = sum(len(latencies) for latencies in replayer.latencies.values())
+    print(f"Replay: {settings}")
+    print(f"requests   {total:10d}   failed {sum(replayer.errors.values())}")
+    print(f"throughput {total / elapsed if elapsed else 0.0:10.1f} requests/s   ({elapsed:.2f} s)")
+    if captured:
+        span = captured[-1].offset
+        print(f"captured   {len(captured) / span if span else 0.0:10.1f} requests/s   ({span:.2f} s)")
+    lags = sorted(replayer.lags)
+    print(f"send lag   p50 {percentile(lags, 0.50) * 1000:.1f} ms   max {lags[-1] * 1000 if lags else 0.0:.1f} ms")
+
+    recorded: Dict[str, List[float]] = defaultdict(list)
+    for request in captured:
+        if request.latency_ms is not None:
+            recorded[request.endpoint].append(request.latency_ms / 1000)
+
+    for endpoint, latencies in sorted(replayer.latencies.items()):
+        latencies = sorted(latencies)
+        original = sorted(recorded.get(endpoint, []))
+        print(f"\n{endpoint}  ({len(latencies)} requests, {replayer.errors[endpoint]} failed)")
+        print(f"{'':8}{'replayed':>12}{'captured':>12}")
+        for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+            captured_ms = f"{percentile(original, fraction) * 1000:10.1f} ms" if original else f"{'-':>13}"
+            print(f"{label:8}{percentile(latencies, fraction) * 1000:9.1f} ms{captured_ms}")
+        print(f"{'max':8}{latencies[-1] * 1000:9.1f} ms")
+
+
+def main():
+    """Load the log, replay it and print the report."""
+    parser = argparse.ArgumentParser(description="Replay captured traffic against a running server")
+    parser.add_argument("log", help="Traffic log (TRAFFIC_LOG_PATH), query log or text file of queries")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="Base URL of the server")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Rate multiplier over the captured timing (0 = as fast as possible)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--limit", type=int, default=0, help="Replay at most this many requests")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for each response")
+    args = parser.parse_args()
+
+    captured = load_log(args.log, args.limit)
+    if not captured:
+        print(f"No requests to replay in {args.log}")
+        return 1
+
+    replayer = Replayer(args.url, args.concurrency, args.timeout)
+    elapsed = replayer.replay(captured, args.speed)
+    speed = f"{args.speed:g}x" if args.speed > 0 else "as fast as possible"
+    report(captured, replayer, elapsed, f"{args.url}, {speed}, concurrency {args.concurrency}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
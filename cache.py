@@ -0,0 +1,279 @@
+"""
+Caching layer for the multi-agent tourism system.
+Provides a TTL cache with an in-process LRU in front of an optional SQLite store.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+
+# Directory for on-disk cache stores. Set CACHE_DIR to an empty string to keep
+# every cache in memory only.
+CACHE_DIR = os.environ.get("CACHE_DIR", ".cache")
+
+# Seconds between removals of expired rows from the on-disk stores (also done on open)
+CACHE_PRUNE_INTERVAL = float(os.environ.get("CACHE_PRUNE_INTERVAL", 3600))
+
+# Returned by TTLCache.get() when a key is absent, so that None can be cached
+MISSING = object()
+
+
+class CacheEntry(NamedTuple):
+    """A cached value together with its creation and expiry timestamps."""
+    value: Any
+    created_at: float
+    expires_at: float
+
+    @property
+    def age(self) -> float:
+        """Seconds since the entry was stored."""
+        return max(0.0, time.time() - self.created_at)
+
+
+def cache_path(name: str) -> Optional[str]:
+    """
+    Get the on-disk location for a named cache store.
+
+    Args:
+        name: Short name of the cache (e.g. "geocode")
+
+    Returns:
+        Path to the SQLite file, or None if disk caching is disabled
+    """
+    if not CACHE_DIR:
+        return None
+    return os.path.join(CACHE_DIR, f"{name}.sqlite")
+
+
+class TTLCache:
+    """
+    Thread-safe cache with per-entry expiry.
+
+    Lookups go to an in-process LRU first and fall back to a SQLite store on
+    disk (when a path is given), so entries survive restarts and can be shared
+    between processes. Values must be JSON-serialisable. Expired rows are removed
+    from the store when it is opened and then every CACHE_PRUNE_INTERVAL seconds.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 3600,
+                 path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            name: Name used in error messages and stats (every store has one "cache" table)
+            maxsize: Maximum number of entries kept in memory
+            ttl: Default time-to-live in seconds
+            path: SQLite file for the persistent store, or None for memory only
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = path
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._last_prune = 0.0
+
+        if path:
+            try:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cache "
+                    "(key TEXT PRIMARY KEY, value TEXT, created_at REAL, expires_at REAL)"
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"Error opening {name} cache store, using memory only: {e}")
+                self._db = None
+            if self._db is not None:
+                self.prune()
+
+    @property
+    def on_disk(self) -> bool:
+        """Whether the cache has a SQLite store (so lookups and writes may block on the disk)."""
+        return self._db is not None
+
+    def lookup(self, key: str, count: bool = True) -> Optional[CacheEntry]:
+        """
+        Look up a key and return the full entry.
+
+        Args:
+            key: Cache key
+            count: Whether to update the hit/miss counters (callers that probe
+                several keys for one logical lookup pass False and use record())
+
+        Returns:
+            CacheEntry if present and not expired, otherwise None
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._memory.move_to_end(key)
+                    if count:
+                        self.hits += 1
+                    return entry
+                del self._memory[key]
+
+            entry = self._disk_get(key, now)
+            if entry is not None:
+                self._remember(key, entry)
+                if count:
+                    self.hits += 1
+                    self.disk_hits += 1
+                return entry
+
+            if count:
+                self.misses += 1
+            return None
+
+    def get(self, key: str, default: Any = MISSING, count: bool = True) -> Any:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+            default: Value returned on a miss (MISSING by default)
+            count: Whether to update the hit/miss counters
+
+        Returns:
+            The cached value, or default if absent or expired
+        """
+        entry = self.lookup(key, count=count)
+        return entry.value if entry is not None else default
+
+    def record(self, hit: bool) -> None:
+        """Count one logical hit or miss for lookups made with count=False."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: JSON-serialisable value
+            ttl: Time-to-live in seconds (defaults to the cache's ttl)
+        """
+        now = time.time()
+        entry = CacheEntry(value, now, now + (self.ttl if ttl is None else ttl))
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                        (key, json.dumps(value), entry.created_at, entry.expires_at)
+                    )
+                    self._db.commit()
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    print(f"Error writing {self.name} cache entry: {e}")
+                if now - self._last_prune >= CACHE_PRUNE_INTERVAL:
+                    self._prune_disk(now)
+
+    def delete(self, key: str) -> None:
+        """Remove a key from memory and disk."""
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Error deleting {self.name} cache entry: {e}")
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.misses = self.disk_hits = 0
+            if self._db is not None:
+                try:
+                    self._db.execute("DELETE FROM cache")
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    print(f"Error clearing {self.name} cache: {e}")
+
+    def prune(self) -> int:
+        """
+        Drop expired entries from memory and disk.
+
+        Returns:
+            Number of entries removed from the disk store
+        """
+        now = time.time()
+        with self._lock:
+            for key in [k for k, e in self._memory.items() if e.expires_at <= now]:
+                del self._memory[key]
+            return self._prune_disk(now)
+
+    def _prune_disk(self, now: float) -> int:
+        """Delete expired rows from the SQLite store (called with the lock held)."""
+        self._last_prune = now
+        if self._db is None:
+            return 0
+        try:
+            removed = self._db.execute("DELETE FROM cache WHERE expires_at <= ?", (now,)).rowcount
+            self._db.commit()
+            return removed
+        except sqlite3.Error as e:
+            print(f"Error pruning {self.name} cache: {e}")
+            return 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters for this cache.
+
+        Returns:
+            Dictionary with hits, misses, disk_hits, hit_ratio and size
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "name": self.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "size": len(self._memory),
+            }
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        """Insert into the in-memory LRU, evicting the oldest entry if full."""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key: str, now: float) -> Optional[CacheEntry]:
+        """Read a live entry from the SQLite store, if there is one."""
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT value, created_at, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"Error reading {self.name} cache entry: {e}")
+            return None
+        if row is None:
+            return None
+        if row[2] <= now:
+            return None
+        return CacheEntry(json.loads(row[0]), row[1], row[2])
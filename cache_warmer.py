@@ -0,0 +1,428 @@
+"""
+Background cache warmer for the multi-agent tourism system.
+Periodically pre-fetches the geocodes, current weather and attraction lists of the
+most requested places (counted from the query log) and of the cities listed in
+tools.CITY_FAMOUS_PLACES, refreshing cache entries before they expire so that
+busy-hour queries are answered from the caches.
+
+Run as a separate process sharing the on-disk caches (CACHE_DIR):
+    python cache_warmer.py                 # warm forever
+    python cache_warmer.py --once          # one pass, then exit
+or inside the web server with CACHE_WARMER=1 (see app.py and asgi.py). When several
+processes run it against the same CACHE_DIR, one of them (elected with a lock file)
+does the warming.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+import requests
+
+try:
+    import fcntl
+except ImportError:  # No file locks (Windows): every process runs its warmer
+    fcntl = None
+
+import http_client
+import tools
+from cache import CACHE_DIR, TTLCache
+from gazetteer import lookup_place, normalize_name
+from geo import geohash_encode
+from jsonl_log import JSONLWriter
+from place_extractor import extract_place_name
+from traffic import sanitize_query
+
+# Query log (JSON lines with "query" and "place") written by TourismAgent and read by
+# the warmer; empty disables it
+QUERY_LOG_PATH = os.environ.get("QUERY_LOG_PATH", "")
+# Most recent log lines considered when ranking places
+QUERY_LOG_WINDOW = int(os.environ.get("QUERY_LOG_WINDOW", 100000))
+# Size at which the query log is rotated to QUERY_LOG_PATH.1 (0 = never)
+QUERY_LOG_MAX_BYTES = int(os.environ.get("QUERY_LOG_MAX_BYTES", 16 * 1024 * 1024))
+
+# Start the warmer thread inside app.py / asgi.py
+WARMER_ENABLED = os.environ.get("CACHE_WARMER", "0") == "1"
+# Seconds between warming passes; entries expiring before the next pass are refreshed
+WARMER_INTERVAL = float(os.environ.get("WARMER_INTERVAL", 600))
+# Most requested places warmed per pass (the popular-city list comes after them)
+WARMER_TOP_PLACES = int(os.environ.get("WARMER_TOP_PLACES", 50))
+# Seconds between the warmer's upstream requests (Nominatim allows one per second)
+WARMER_REQUEST_INTERVAL = float(os.environ.get("WARMER_REQUEST_INTERVAL", 1.0))
+# Lock file electing the one process that warms the shared on-disk caches when several
+# server processes (e.g. gunicorn workers) run the warmer; empty lets every process warm
+WARMER_LOCK_PATH = os.environ.get("WARMER_LOCK_PATH", os.path.join(CACHE_DIR, "warmer.lock") if CACHE_DIR else "")
+
+
+class QueryLog:
+    """
+    Append-only log of answered queries, one JSON object per line. Queries are
+    sanitized as in the traffic log, and the file is rotated at max_bytes.
+    """
+
+    def __init__(self, path: str = QUERY_LOG_PATH, max_bytes: int = QUERY_LOG_MAX_BYTES):
+        """
+        Initialize the log.
+
+        Args:
+            path: JSON lines file, or an empty string to disable logging
+            max_bytes: Size at which the file is rotated to path + ".1" (0 = never)
+        """
+        self.path = path
+        self._writer = JSONLWriter(path, "query log", max_bytes=max_bytes)
+
+    def record(self, query: str, place_name: str) -> None:
+        """
+        Append a query and the place extracted from it.
+
+        Args:
+            query: User's query
+            place_name: Place extracted from the query
+        """
+        if not self.path:
+            return
+        self._writer.write({"ts": round(time.time(), 3), "query": sanitize_query(query), "place": place_name})
+
+
+query_log = QueryLog()
+
+
+def _place_of(line: str) -> str:
+    """The place of a query log line: its "place", or the place extracted from its query."""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        record = line
+    if isinstance(record, dict):
+        return record.get("place") or extract_place_name(str(record.get("query", "")))
+    return extract_place_name(str(record))
+
+
+class QueryLogReader:
+    """
+    Follows a query log from pass to pass, reading only the lines appended since the
+    previous pass, and counts the places of the last `window` lines. A log that was
+    rotated or truncated is read again from its start.
+    """
+
+    def __init__(self, path: str, window: int = QUERY_LOG_WINDOW):
+        """
+        Initialize the reader.
+
+        Args:
+            path: Query log to follow
+            window: Only the last `window` lines are counted
+        """
+        self.path = path
+        # (normalized name, spelling) of the place of each recent line
+        self._places: deque = deque(maxlen=window)
+        self._file_id: Optional[tuple] = None
+        self._offset = 0
+
+    def place_counts(self) -> Counter:
+        """
+        Read the new lines and count how often each place was asked about.
+
+        Lines are JSON objects with a "place" (or only a "query", from which the place is
+        extracted); other lines are taken as plain-text queries.
+
+        Returns:
+            Counter of place names, keyed by the first spelling seen of each normalized name
+
+        Raises:
+            OSError: If the log cannot be read
+        """
+        with open(self.path, "rb") as f:
+            st = os.fstat(f.fileno())
+            if (st.st_dev, st.st_ino) != self._file_id or st.st_size < self._offset:
+                self._file_id, self._offset = (st.st_dev, st.st_ino), 0
+            f.seek(self._offset)
+            data = f.read()
+        # A line still being written is left for the next pass
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        for line in data[:end].decode("utf-8", "replace").splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            place = _place_of(line)
+            key = normalize_name(place)
+            if key:
+                self._places.append((key, place))
+
+        counts: Counter = Counter()
+        spellings: Dict[str, str] = {}
+        for key, place in self._places:
+            counts[spellings.setdefault(key, place)] += 1
+        return counts
+
+
+def read_place_counts(path: str, window: int = QUERY_LOG_WINDOW) -> Counter:
+    """
+    Count how often each place was asked about in a query log (see QueryLogReader).
+
+    Args:
+        path: Query log to read
+        window: Only the last `window` lines are counted
+
+    Returns:
+        Counter of place names, keyed by the first spelling seen of each normalized name
+    """
+    return QueryLogReader(path, window).place_counts()
+
+
+class CacheWarmer:
+    """
+    Keeps the upstream caches warm for popular places.
+
+    Each pass visits the most requested places and then the popular-city list, and
+    fetches whatever is missing or would expire before the next pass: the place's
+    geocode and its famous-place lookups (Nominatim), its current weather
+    (Open-Meteo) and its attraction search (Overpass). Requests go out one at a time,
+    WARMER_REQUEST_INTERVAL apart, through the same single-flight registries and
+    circuit breakers as live queries.
+    """
+
+    def __init__(self, query_log_path: str = QUERY_LOG_PATH, top_places: int = WARMER_TOP_PLACES,
+                 interval: float = WARMER_INTERVAL, request_interval: float = WARMER_REQUEST_INTERVAL,
+                 lock_path: str = WARMER_LOCK_PATH):
+        """
+        Initialize the warmer.
+
+        Args:
+            query_log_path: Query log to rank places by (empty for the popular-city list only)
+            top_places: Most requested places warmed per pass
+            interval: Seconds between passes
+            request_interval: Seconds between upstream requests
+            lock_path: Lock file electing one warming process (empty: no election)
+        """
+        self.query_log_path = query_log_path
+        self.top_places = top_places
+        self.interval = interval
+        self.request_interval = request_interval
+        self.lock_path = lock_path
+        self._log_reader = QueryLogReader(query_log_path) if query_log_path else None
+        self._lock_file = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_request = 0.0
+        self.passes = 0
+        self.fetched = 0
+        self.errors = 0
+
+    def popular_places(self) -> List[str]:
+        """
+        Places to warm, most requested first.
+
+        Returns:
+            Up to top_places logged places, followed by the cities of CITY_FAMOUS_PLACES
+        """
+        places = []
+        if self._log_reader is not None:
+            try:
+                counts = self._log_reader.place_counts()
+                places = [place for place, _ in counts.most_common(self.top_places)]
+            except OSError as e:
+                print(f"Error reading query log {self.query_log_path}: {e}")
+
+        seen = {normalize_name(place) for place in places}
+        for city in tools.CITY_FAMOUS_PLACES:
+            if normalize_name(city) not in seen:
+                seen.add(normalize_name(city))
+                places.append(city.title())
+        return places
+
+    def _expiring(self, cache: TTLCache, key: str, margin: float) -> bool:
+        """Whether a cache entry is missing or expires within `margin` seconds."""
+        entry = cache.lookup(key, count=False)
+        return entry is None or entry.expires_at - time.time() < margin
+
+    def _throttle(self) -> bool:
+        """
+        Wait until the next upstream request is allowed.
+
+        Returns:
+            False if the warmer was stopped while waiting
+        """
+        delay = self._last_request + self.request_interval - time.monotonic()
+        if delay > 0 and self._stop.wait(delay):
+            return False
+        self._last_request = time.monotonic()
+        return not self._stop.is_set()
+
+    def _fetch(self, url: str, fn, *args) -> None:
+        """Make one rate-limited upstream call, skipping hosts whose breaker is not closed."""
+        if http_client.get_breaker(url).state != "closed" or not self._throttle():
+            return
+        try:
+            fn(*args)
+            self.fetched += 1
+        except requests.exceptions.RequestException as e:
+            self.errors += 1
+            print(f"Cache warmer: request to {url} failed: {e}")
+
+    def _warm_geocode(self, query: str) -> None:
+        """Refresh the cached Nominatim result for a query if it is expiring."""
+        key = tools._normalize_query(query)
+        if self._expiring(tools.geocode_cache, key, self.interval):
+            self._fetch(tools.NOMINATIM_URL, tools.geocode_flight.do, key, tools._fetch_nominatim, query)
+
+    def warm_place(self, place_name: str) -> None:
+        """
+        Bring every cache entry a query about `place_name` needs up to date.
+
+        Args:
+            place_name: Place as extracted from a query
+        """
+        # Like tools.get_coordinates: only an exact gazetteer entry saves the Nominatim lookup
+        if lookup_place(place_name, fuzzy=False) is None:
+            self._warm_geocode(place_name)
+        for famous_place in tools.famous_places_to_search(place_name):
+            self._warm_geocode(f"{famous_place}, {place_name}")
+
+        location = tools.get_coordinates(place_name)
+        if not location:
+            return
+        lat, lon = location["lat"], location["lon"]
+
+        # Current weather cannot be fetched ahead of Open-Meteo's update, only once it is out
+        key, params = tools._weather_request(lat, lon)
+        if self._expiring(tools.weather_cache, key, 0):
+            self._fetch(tools.OPEN_METEO_URL, tools.weather_flight.do, key, tools._fetch_weather, key, params)
+
+        if tools.PLACES_BACKEND != "local":
+            tile = geohash_encode(lat, lon, tools.OVERPASS_CACHE_PRECISION)
+            if self._expiring(tools.overpass_cache, tools._overpass_cache_key(tile, tools.SEARCH_RADIUS),
+                              self.interval):
+                self._fetch(tools.OVERPASS_URL, tools.overpass_flight.do,
+                            tools._overpass_flight_key(lat, lon, tools.SEARCH_RADIUS),
+                            tools._fetch_overpass, lat, lon, tools.SEARCH_RADIUS)
+
+    def run_once(self) -> Dict:
+        """
+        Warm the caches for every popular place once.
+
+        Returns:
+            Stats after the pass (see stats())
+        """
+        for place_name in self.popular_places():
+            if self._stop.is_set():
+                break
+            try:
+                self.warm_place(place_name)
+            except Exception as e:
+                self.errors += 1
+                print(f"Cache warmer: error warming {place_name}: {e}")
+        self.passes += 1
+        return self.stats()
+
+    def next_delay(self) -> float:
+        """Seconds until the next pass: the interval, or just after Open-Meteo's next update."""
+        return min(self.interval, tools._seconds_until_weather_update() + 5)
+
+    def elected(self) -> bool:
+        """
+        Whether this process is the one that warms the caches.
+
+        The process holding an exclusive lock on lock_path warms; the others check again
+        every pass, so another one takes over if it exits. Without a lock path (or file
+        locks) every process warms.
+
+        Returns:
+            True if this process holds (or just took) the lock
+        """
+        if not self.lock_path or fcntl is None:
+            return True
+        if self._lock_file is not None:
+            return True
+        try:
+            directory = os.path.dirname(self.lock_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            lock_file = open(self.lock_path, "a")
+        except OSError as e:
+            print(f"Cache warmer: cannot open lock file {self.lock_path}, warming anyway: {e}")
+            return True
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def _release_lock(self) -> None:
+        """Give up the warmer lock, if held."""
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def run_forever(self) -> None:
+        """Warm the caches every pass, if elected, until stop() is called."""
+        try:
+            while not self._stop.is_set():
+                if self.elected():
+                    self.run_once()
+                self._stop.wait(self.next_delay())
+        finally:
+            self._release_lock()
+
+    def start(self) -> threading.Thread:
+        """
+        Run the warmer on a daemon thread.
+
+        Returns:
+            The warmer thread
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="cache-warmer", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Stop the warmer after the current request."""
+        self._stop.set()
+
+    def stats(self) -> Dict:
+        """
+        Warmer statistics.
+
+        Returns:
+            Dictionary with passes, fetched (upstream requests made) and errors
+        """
+        return {
+            "passes": self.passes,
+            "fetched": self.fetched,
+            "errors": self.errors
+        }
+
+
+def main():
+    """Command-line entry point for running the warmer as its own process."""
+    parser = argparse.ArgumentParser(description="Keep the upstream caches warm for popular places")
+    parser.add_argument("--log", default=QUERY_LOG_PATH, help="Query log to rank places by")
+    parser.add_argument("--top", type=int, default=WARMER_TOP_PLACES, help="Most requested places to warm")
+    parser.add_argument("--interval", type=float, default=WARMER_INTERVAL, help="Seconds between passes")
+    parser.add_argument("--request-interval", type=float, default=WARMER_REQUEST_INTERVAL,
+                        help="Seconds between upstream requests")
+    parser.add_argument("--once", action="store_true", help="Run one pass and exit")
+    args = parser.parse_args()
+
+    warmer = CacheWarmer(args.log, args.top, args.interval, args.request_interval)
+    if args.once:
+        print(warmer.run_once())
+        return 0
+    try:
+        warmer.run_forever()
+    except KeyboardInterrupt:
+        warmer.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""
+Tourist attraction classifier for the multi-agent tourism system.
+Decides from an OpenStreetMap element's name and tags whether it is worth suggesting.
+Shared by the live Overpass search and the offline POI index.
+
+The rules are kept as lookup tables that are compiled once at import time, so
+classifying an element is a handful of dictionary lookups and one regex search.
+"""
+import re
+from typing import Dict, List, Optional, Tuple
+
+
+# Keywords to exclude (companies, stores, non-tourist entities)
+EXCLUDE_KEYWORDS = [
+    'store', 'shop', 'mall', 'market', 'company', 'corp', 'ltd', 'inc',
+    'dna', 'lab', 'laboratory', 'office', 'building', 'commercial',
+    'warehouse', 'factory', 'industrial', 'business', 'enterprise'
+]
+
+# Tourism types that are never suggested, even if another tag qualifies
+EXCLUDED_TOURISM_TYPES = {'information', 'hotel', 'hostel', 'apartment', 'guest_house'}
+
+# Category rules, checked in order: (category, {tag key: qualifying values})
+PRIMARY_RULES: List[Tuple[str, Dict[str, List[str]]]] = [
+    # 1. ZOOS
+    ("zoo", {"tourism": ["zoo"]}),
+    # 2. ART GALLERIES
+    ("art_gallery", {"tourism": ["gallery"], "amenity": ["arts_centre"]}),
+    # 3. NATIONAL PARKS & NATURE RESERVES
+    ("nature_reserve", {"leisure": ["nature_reserve"], "boundary": ["national_park"]}),
+    # 4. BEACHES
+    ("beach", {"natural": ["beach"], "leisure": ["beach_resort"]}),
+    # 5. HIKING TRAILS & PEAKS
+    ("hiking", {"natural": ["peak", "volcano"], "sport": ["hiking"], "leisure": ["track"]}),
+    # 6. VIEWPOINTS
+    ("viewpoint", {"tourism": ["viewpoint"]}),
+    # 7. ADVENTURE SPOTS
+    ("adventure", {
+        "tourism": ["theme_park"],
+        "leisure": ["adult_gaming_centre", "water_park"],
+        "sport": ["climbing", "paragliding", "rafting", "canoeing", "kayaking", "surfing", "diving", "skydiving"]
+    }),
+    # 8. TEMPLES, CHURCHES, MOSQUES, SHRINES
+    ("place_of_worship", {
+        "amenity": ["place_of_worship"],
+        "historic": ["temple", "church", "mosque", "shrine", "monastery", "abbey", "cathedral", "basilica"]
+    }),
+]
+
+# 9. FAMOUS STREETS: named roads longer than this, of a major type or tagged historic/tourism.
+# A street that does not qualify is not an attraction, whatever the rules below say.
+STREET_CATEGORY = "street"
+STREET_MIN_NAME_LENGTH = 5
+MAJOR_HIGHWAY_TYPES = {"primary", "secondary", "tertiary", "pedestrian"}
+
+# 10. OTHER TOURIST ATTRACTIONS, checked only for elements that are not streets
+SECONDARY_RULES: List[Tuple[str, Dict[str, List[str]]]] = [
+    ("attraction", {"tourism": ["attraction", "museum", "artwork"]}),
+    ("historic_site", {"historic": ["monument", "castle", "palace", "tower", "ruins", "tomb", "fort", "memorial", "archaeological_site"]}),
+    ("leisure", {"leisure": ["park", "stadium", "golf_course", "marina"]}),
+    ("culture", {"amenity": ["theatre", "cinema", "library", "planetarium"]}),
+]
+
+
+def _compile_rules(rules: List[Tuple[str, Dict[str, List[str]]]]) -> Dict[str, Dict[str, Tuple[int, str]]]:
+    """
+    Turn ordered category rules into {tag key: {tag value: (rule order, category)}}.
+    When a value appears in several rules the earliest one wins, as in an if/elif chain.
+    """
+    table: Dict[str, Dict[str, Tuple[int, str]]] = {}
+    for order, (category, conditions) in enumerate(rules):
+        for key, values in conditions.items():
+            for value in values:
+                table.setdefault(key, {}).setdefault(value, (order, category))
+    return table
+
+
+_PRIMARY_TABLE = _compile_rules(PRIMARY_RULES)
+_SECONDARY_TABLE = _compile_rules(SECONDARY_RULES)
+_EXCLUDE_PATTERN = re.compile("|".join(re.escape(keyword) for keyword in EXCLUDE_KEYWORDS))
+
+
+def _match(table: Dict[str, Dict[str, Tuple[int, str]]], tags: Dict[str, str]) -> Optional[str]:
+    """Return the category of the earliest rule in a compiled table that the tags satisfy."""
+    best = None
+    for key, values in table.items():
+        value = tags.get(key)
+        if value:
+            hit = values.get(value)
+            if hit is not None and (best is None or hit < best):
+                best = hit
+    return best[1] if best is not None else None
+
+
+def classify(name: str, tags: Dict[str, str]) -> Optional[str]:
+    """
+    Classify an OpenStreetMap element.
+
+    Args:
+        name: The element's name (already stripped)
+        tags: The element's OSM tags
+
+    Returns:
+        Category label (e.g. "zoo", "beach", "street"), or None if the element
+        should not be suggested as a place to visit
+    """
+    if not name:
+        return None
+
+    # Skip if name contains exclude keywords
+    if _EXCLUDE_PATTERN.search(name.lower()):
+        return None
+
+    tourism_type = tags.get("tourism", "")
+    if tourism_type in EXCLUDED_TOURISM_TYPES:
+        return None
+
+    category = _match(_PRIMARY_TABLE, tags)
+    if category:
+        return category
+
+    highway_type = tags.get("highway", "")
+    if highway_type and len(name) > STREET_MIN_NAME_LENGTH:
+        if tags.get("historic") or tourism_type or highway_type in MAJOR_HIGHWAY_TYPES:
+            return STREET_CATEGORY
+        return None
+
+    return _match(_SECONDARY_TABLE, tags)
+
+
+def is_tourist_attraction(name: str, tags: Dict[str, str]) -> bool:
+    """
+    Check whether an OpenStreetMap element is a tourist attraction.
+
+    Args:
+        name: The element's name (already stripped)
+        tags: The element's OSM tags
+
+    Returns:
+        True if the element should be suggested as a place to visit
+    """
+    return classify(name, tags) is not None
+
+
+# The element filters of the Overpass attractions query, as (element types, conditions);
+# a condition is (tag key, "=" or "~", value), where "~" is a regular expression searched
+# in the tag's value. tools._build_overpass_query renders them as Overpass QL and the
+# offline POI index applies them with matches_overpass_filters(), so both backends
+# classify the same elements.
+NWR = ("node", "way", "relation")
+NW = ("node", "way")
+ADVENTURE_SPORTS = "^(climbing|paragliding|rafting|canoeing|kayaking|surfing|diving|skydiving)$"
+OVERPASS_FILTERS: List[Tuple[Tuple[str, ...], Tuple[Tuple[str, str, str], ...]]] = [
+    # 1. ZOOS & BIOLOGICAL PARKS
+    (NWR, (("tourism", "=", "zoo"),)),
+    # 2. ART GALLERIES
+    (NW, (("tourism", "=", "gallery"),)),
+    (NW, (("amenity", "=", "arts_centre"),)),
+    # 3. NATIONAL PARKS & NATURE RESERVES (including Bannerghatta)
+    (NWR, (("leisure", "=", "nature_reserve"),)),
+    (NWR, (("boundary", "=", "national_park"),)),
+    # 4. BEACHES
+    (NW, (("natural", "=", "beach"),)),
+    (NW, (("leisure", "=", "beach_resort"),)),
+    # 5. HIKING TRAILS & PEAKS (including Nandi Hills)
+    (("node",), (("natural", "=", "peak"),)),
+    (("node",), (("natural", "=", "volcano"),)),
+    (("node",), (("natural", "=", "hill"),)),
+    (("way",), (("route", "=", "hiking"),)),
+    (("way",), (("leisure", "=", "track"), ("sport", "=", "hiking"))),
+    # 6. VIEWPOINTS (scenic spots)
+    (NW, (("tourism", "=", "viewpoint"),)),
+    # 7. ADVENTURE SPOTS
+    (NW, (("tourism", "=", "theme_park"),)),
+    (("node",), (("leisure", "=", "adult_gaming_centre"),)),
+    (NW, (("leisure", "=", "water_park"),)),
+    (NW, (("sport", "~", ADVENTURE_SPORTS),)),
+    # 8. FAMOUS TEMPLES, CHURCHES, MOSQUES, SHRINES (including ISKCON)
+    (NWR, (("amenity", "=", "place_of_worship"),)),
+    (NW, (("historic", "~", "^(temple|church|mosque|shrine|monastery|abbey|cathedral|basilica)$"),)),
+    # 9. GOVERNMENT BUILDINGS & PALACES (including Vidhana Soudha, Tipu Sultan Palace)
+    (NW, (("building", "=", "government"),)),
+    (NWR, (("historic", "=", "palace"),)),
+    # 10. FAMOUS STREETS (historic/notable streets with names)
+    (("way",), (("highway", "~", "^(primary|secondary|tertiary|residential|pedestrian|living_street)$"),
+                ("name", "~", "."))),
+    # 11. OTHER TOURIST ATTRACTIONS
+    (NW, (("tourism", "~", "^(attraction|museum|artwork)$"),)),
+    (NW, (("historic", "~", "^(monument|castle|tower|ruins|tomb|fort|memorial|archaeological_site)$"),)),
+    (NW, (("leisure", "~", "^(park|stadium|golf_course|marina)$"),)),
+    (NW, (("amenity", "~", "^(theatre|cinema|library|planetarium)$"),)),
+]
+
+
+def _compile_filters() -> Dict[str, List[List[Tuple[str, object]]]]:
+    """Group the Overpass filters by element type, with "=" values kept and "~" patterns compiled."""
+    compiled: Dict[str, List[List[Tuple[str, object]]]] = {}
+    for types, conditions in OVERPASS_FILTERS:
+        checks = [(key, value if op == "=" else re.compile(value)) for key, op, value in conditions]
+        for element_type in types:
+            compiled.setdefault(element_type, []).append(checks)
+    return compiled
+
+
+_FILTER_TABLE = _compile_filters()
+
+
+def matches_overpass_filters(element_type: str, tags: Dict[str, str]) -> bool:
+    """
+    Whether the Overpass attractions query would return an element.
+
+    Args:
+        element_type: "node", "way" or "relation"
+        tags: The element's tags
+
+    Returns:
+        True if any filter for the element type matches its tags
+    """
+    for checks in _FILTER_TABLE.get(element_type, ()):
+        for key, expected in checks:
+            value = tags.get(key)
+            if value is None:
+                break
+            if isinstance(expected, str):
+                if value != expected:
+                    break
+            elif expected.search(value) is None:
+                break
+        else:
+            return True
+    return False
@@ -0,0 +1,295 @@
+"""
+Built-in gazetteer for the multi-agent tourism system.
+Resolves well-known city names (and aliases such as Bangalore / Bengaluru) to
+coordinates from a bundled table, so most queries skip the Nominatim round-trip.
+Misspelt names are matched fuzzily only when Nominatim knows no such place.
+
+The bundled table is data/gazetteer.tsv. A larger one can be built from a
+GeoNames cities dump (https://download.geonames.org/export/dump/):
+    python gazetteer.py build cities15000.txt --countries countryInfo.txt -o data/gazetteer.tsv
+
+Set GAZETTEER_PATH to use another table, or to an empty string to always use Nominatim.
+"""
+import argparse
+import difflib
+import gzip
+import os
+import re
+import sys
+import threading
+import unicodedata
+from array import array
+from typing import Dict, List, Optional
+
+# The bundled table lives next to this module, so it is found from any working directory
+GAZETTEER_PATH = os.environ.get(
+    "GAZETTEER_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "gazetteer.tsv")
+)
+
+# Similarity (0-1) a misspelt name needs to match a known one, and the shortest name
+# that is matched fuzzily at all (short names are too easily confused)
+GAZETTEER_FUZZY_CUTOFF = float(os.environ.get("GAZETTEER_FUZZY_CUTOFF", 0.85))
+FUZZY_MIN_LENGTH = 5
+
+HEADER = "# name\tcountry\tlat\tlon\tpopulation\taliases\n"
+MAX_ALIASES = 10
+
+_NON_ALPHANUMERIC = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize a place name for lookup: lowercase, accents and punctuation removed.
+    "São Paulo" and "sao-paulo" both become "sao paulo".
+    """
+    ascii_name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALPHANUMERIC.sub(" ", ascii_name.lower()).strip()
+
+
+def _open_text(path: str, mode: str):
+    """Open a text file, gzip-compressed if the name ends in .gz."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class Gazetteer:
+    """
+    In-memory gazetteer loaded from a TSV table
+    (name, country, lat, lon, population, comma-separated aliases).
+
+    Coordinates are held in flat arrays and every normalized name or alias maps to
+    a row number. When two places share a name, the more populous one wins.
+    """
+
+    def __init__(self, path: str = GAZETTEER_PATH):
+        """
+        Load a gazetteer table from disk.
+
+        Args:
+            path: TSV file (optionally .gz) as written by build_gazetteer()
+        """
+        self.names: List[str] = []
+        self.lats = array("d")
+        self.lons = array("d")
+        self.country_names: List[str] = []
+        self.countries = array("H")  # Index into country_names, per row
+        self.rows: Dict[str, int] = {}
+        # Known names grouped by first letter, to keep fuzzy matching cheap
+        self._by_initial: Dict[str, List[str]] = {}
+
+        country_ids: Dict[str, int] = {}
+        populations = array("q")
+        with _open_text(path, "r") as f:
+            for line in f:
+                if line.startswith("#") or not line.strip():
+                    continue
+                fields = line.rstrip("\n").split("\t")
+                name, country, lat, lon, population = fields[:5]
+                aliases = fields[5].split(",") if len(fields) > 5 and fields[5] else []
+
+                row = len(self.names)
+                self.names.append(name)
+                self.lats.append(float(lat))
+                self.lons.append(float(lon))
+                populations.append(int(population or 0))
+                if country not in country_ids:
+                    country_ids[country] = len(self.country_names)
+                    self.country_names.append(country)
+                self.countries.append(country_ids[country])
+
+                for key in {normalize_name(n) for n in [name] + aliases}:
+                    if not key:
+                        continue
+                    existing = self.rows.get(key)
+                    if existing is None:
+                        self._by_initial.setdefault(key[0], []).append(key)
+                    if existing is None or populations[existing] < populations[row]:
+                        self.rows[key] = row
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _location(self, row: int) -> Dict:
+        return {
+            "lat": self.lats[row],
+            "lon": self.lons[row],
+            "display_name": f"{self.names[row]}, {self.country_names[self.countries[row]]}"
+        }
+
+    def lookup(self, place_name: str, fuzzy: bool = True) -> Optional[Dict]:
+        """
+        Resolve a place name.
+
+        Args:
+            place_name: Name as typed by the user (any case, with or without accents)
+            fuzzy: Also accept close misspellings of a known name
+
+        Returns:
+            Dictionary with 'lat', 'lon' and 'display_name' keys, or None if the name is unknown
+        """
+        key = normalize_name(place_name)
+        if not key:
+            return None
+
+        row = self.rows.get(key)
+        if row is None and fuzzy and len(key) >= FUZZY_MIN_LENGTH:
+            matches = difflib.get_close_matches(
+                key, self._by_initial.get(key[0], []), n=1, cutoff=GAZETTEER_FUZZY_CUTOFF
+            )
+            if matches:
+                row = self.rows[matches[0]]
+        return self._location(row) if row is not None else None
+
+
+_gazetteer: Optional[Gazetteer] = None
+_gazetteer_loaded = False
+_gazetteer_lock = threading.Lock()
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """
+    Get the process-wide gazetteer, loading it from GAZETTEER_PATH on first use.
+
+    Returns:
+        Loaded Gazetteer, or None if GAZETTEER_PATH is empty or cannot be read
+    """
+    global _gazetteer, _gazetteer_loaded
+    if not _gazetteer_loaded:
+        with _gazetteer_lock:
+            if not _gazetteer_loaded:
+                if GAZETTEER_PATH:
+                    try:
+                        _gazetteer = Gazetteer(GAZETTEER_PATH)
+                    except (OSError, ValueError) as e:
+                        print(f"Gazetteer disabled, could not load {GAZETTEER_PATH}: {e}")
+                _gazetteer_loaded = True
+    return _gazetteer
+
+
+def lookup_place(place_name: str, fuzzy: bool = True) -> Optional[Dict]:
+    """
+    Resolve a place name from the built-in gazetteer.
+
+    Fuzzy matching can mistake a real but unlisted place for a known one (Homburg for
+    Hamburg), so geocoders try an exact lookup first and a fuzzy one only after
+    Nominatim has found nothing.
+
+    Args:
+        place_name: Name of the place
+        fuzzy: Also accept close misspellings of a known name
+
+    Returns:
+        Dictionary with 'lat', 'lon' and 'display_name' keys, or None if the place
+        is not in the gazetteer (or the gazetteer is disabled)
+    """
+    gazetteer = get_gazetteer()
+    return gazetteer.lookup(place_name, fuzzy) if gazetteer is not None else None
+
+
+def _geonames_aliases(name: str, ascii_name: str, alternate_names: str) -> List[str]:
+    """Pick the Latin-script alternate names worth keeping as aliases (codes are skipped)."""
+    aliases = []
+    seen = {normalize_name(name)}
+    for alias in [ascii_name] + alternate_names.split(","):
+        alias = alias.strip()
+        if len(alias) < 3 or alias.isupper() or not re.fullmatch(r"[A-Za-z][A-Za-z .'-]*", alias):
+            continue
+        key = normalize_name(alias)
+        if key in seen:
+            continue
+        seen.add(key)
+        aliases.append(alias)
+        if len(aliases) >= MAX_ALIASES:
+            break
+    return aliases
+
+
+def build_gazetteer(source_path: str, output_path: str = GAZETTEER_PATH,
+                    min_population: int = 15000, countries_path: Optional[str] = None) -> int:
+    """
+    Build a gazetteer table from a GeoNames cities dump.
+
+    Args:
+        source_path: GeoNames cities file (e.g. cities15000.txt, optionally .gz)
+        output_path: Table to write (.gz to compress)
+        min_population: Smallest population to include
+        countries_path: Optional GeoNames countryInfo.txt, to write country names instead of codes
+
+    Returns:
+        Number of places written
+    """
+    country_names: Dict[str, str] = {}
+    if countries_path:
+        with _open_text(countries_path, "r") as f:
+            for line in f:
+                if line.startswith("#"):
+                    continue
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) > 4:
+                    country_names[fields[0]] = fields[4]
+
+    records = []
+    with _open_text(source_path, "r") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 15:
+                continue
+            population = int(fields[14] or 0)
+            if population < min_population:
+                continue
+            name = fields[1]
+            records.append((
+                name,
+                country_names.get(fields[8], fields[8]),
+                round(float(fields[4]), 4),
+                round(float(fields[5]), 4),
+                population,
+                _geonames_aliases(name, fields[2], fields[3])
+            ))
+
+    # Most populous first, so the table reads naturally and ties favour big cities
+    records.sort(key=lambda r: -r[4])
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with _open_text(output_path, "w") as f:
+        f.write(HEADER)
+        for name, country, lat, lon, population, aliases in records:
+            f.write(f"{name}\t{country}\t{lat}\t{lon}\t{population}\t{','.join(aliases)}\n")
+    return len(records)
+
+
+def main():
+    """Command-line entry point for building and querying the gazetteer."""
+    parser = argparse.ArgumentParser(description="Built-in city gazetteer")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Build a table from a GeoNames cities dump")
+    build.add_argument("source", help="GeoNames cities file (e.g. cities15000.txt)")
+    build.add_argument("-o", "--output", default=GAZETTEER_PATH, help="Table to write")
+    build.add_argument("--min-population", type=int, default=15000)
+    build.add_argument("--countries", help="GeoNames countryInfo.txt for country names")
+
+    lookup = sub.add_parser("lookup", help="Resolve place names")
+    lookup.add_argument("names", nargs="+")
+    lookup.add_argument("--table", default=GAZETTEER_PATH, help="Table to read")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_gazetteer(args.source, args.output, args.min_population, args.countries)
+        print(f"Wrote {count} places to {args.output}")
+    else:
+        gazetteer = Gazetteer(args.table)
+        for name in args.names:
+            location = gazetteer.lookup(name)
+            if location:
+                print(f"{name}: {location['display_name']} ({location['lat']:.4f}, {location['lon']:.4f})")
+            else:
+                print(f"{name}: not found")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Geographic helpers for the multi-agent tourism system.
+Geohash encoding for spatial cache keys and great-circle distances.
+"""
+import math
+from typing import List, Tuple
+
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+EARTH_RADIUS_KM = 6371.0088
+
+
+def geohash_encode(lat: float, lon: float, precision: int = 5) -> str:
+    """
+    Encode a coordinate as a geohash string.
+
+    Args:
+        lat: Latitude in degrees
+        lon: Longitude in degrees
+        precision: Number of characters (5 is roughly a 4.9 km x 4.9 km cell)
+
+    Returns:
+        Geohash of the cell containing the point
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True
+
+    while len(chars) < precision:
+        rng, value = (lon_range, lon) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+
+    return "".join(chars)
+
+
+def geohash_bounds(geohash: str) -> Tuple[float, float, float, float]:
+    """
+    Decode a geohash into its bounding box.
+
+    Args:
+        geohash: Geohash string
+
+    Returns:
+        Tuple of (min_lat, max_lat, min_lon, max_lon)
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+
+    for char in geohash:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            rng = lon_range if even else lat_range
+            mid = (rng[0] + rng[1]) / 2
+            if (value >> shift) & 1:
+                rng[0] = mid
+            else:
+                rng[1] = mid
+            even = not even
+
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def geohash_neighbors(geohash: str) -> List[str]:
+    """
+    Get the geohashes of the eight cells surrounding a cell.
+
+    Args:
+        geohash: Geohash string
+
+    Returns:
+        List of neighbouring geohashes of the same precision
+    """
+    min_lat, max_lat, min_lon, max_lon = geohash_bounds(geohash)
+    lat = (min_lat + max_lat) / 2
+    lon = (min_lon + max_lon) / 2
+    height = max_lat - min_lat
+    width = max_lon - min_lon
+
+    neighbors = []
+    for dlat in (-height, 0.0, height):
+        for dlon in (-width, 0.0, width):
+            if dlat == 0.0 and dlon == 0.0:
+                continue
+            n_lat = lat + dlat
+            if n_lat > 90 or n_lat < -90:
+                continue
+            n_lon = (lon + dlon + 180) % 360 - 180
+            neighbors.append(geohash_encode(n_lat, n_lon, len(geohash)))
+    return neighbors
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two points.
+
+    Args:
+        lat1, lon1: First point in degrees
+        lat2, lon2: Second point in degrees
+
+    Returns:
+        Distance in kilometres
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
@@ -0,0 +1,337 @@
+"""
+Shared HTTP session for the multi-agent tourism system.
+Every upstream call (Nominatim, Open-Meteo, Overpass) goes through one pooled
+session so connections are kept alive and transient failures are retried.
+The async serving path uses an equivalent pooled httpx client.
+Calls are limited by the query's deadline and guarded by a per-host circuit breaker
+(see resilience.py).
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from resilience import CircuitBreaker, DeadlineExceeded, budget_timeout, remaining_time
+
+try:
+    import httpx
+except ImportError:  # Only needed by the async serving path (asgi.py)
+    httpx = None
+
+
+USER_AGENT = "Tourism-Agent/1.0"
+
+# Number of per-host connection pools to keep, and connections kept per host
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 10))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 20))
+
+# Retries on connection errors and 429/5xx responses, with jittered exponential backoff
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+HTTP_BACKOFF_JITTER = float(os.environ.get("HTTP_BACKOFF_JITTER", 0.5))
+# Longest wait before a retry; a Retry-After asking for more is not retried
+HTTP_MAX_BACKOFF = float(os.environ.get("HTTP_MAX_BACKOFF", 30))
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# One circuit breaker per upstream host
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+# One async client per event loop, since httpx clients cannot be shared between loops
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def _build_session() -> requests.Session:
+    """
+    Create a session with pooled adapters mounted for http and https.
+    Retries are made by request(), so they can be fitted into the query's deadline.
+
+    Returns:
+        Configured requests.Session
+    """
+    adapter = HTTPAdapter(
+        pool_connections=HTTP_POOL_CONNECTIONS,
+        pool_maxsize=HTTP_POOL_MAXSIZE,
+        max_retries=0
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def get_session() -> requests.Session:
+    """
+    Get the process-wide session, creating it on first use.
+    The underlying urllib3 pools are thread-safe, so the session is shared by all threads.
+
+    Returns:
+        Shared requests.Session
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def reset_session() -> None:
+    """Close the shared session so the next call builds a fresh one (e.g. after a fork)."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    """
+    Get the circuit breaker of a URL's host, creating it on first use.
+
+    Args:
+        url: Request URL
+
+    Returns:
+        CircuitBreaker shared by every request to that host
+    """
+    host = urlsplit(url).netloc
+    breaker = _breakers.get(host)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(host, CircuitBreaker(host))
+    return breaker
+
+
+def breaker_stats() -> Dict[str, Dict]:
+    """Stats of every upstream's circuit breaker, keyed by host."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.stats() for breaker in breakers}
+
+
+metrics.register_breakers(breaker_stats)
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> Optional[float]:
+    """
+    Seconds to wait before retry number `attempt` (0-based), honouring Retry-After.
+
+    Returns:
+        The delay (at most HTTP_MAX_BACKOFF), or None if Retry-After asks for longer
+    """
+    if retry_after and retry_after.isdigit():
+        delay = float(retry_after)
+        return delay if delay <= HTTP_MAX_BACKOFF else None
+    return min(HTTP_BACKOFF_FACTOR * (2 ** attempt) + random.uniform(0, HTTP_BACKOFF_JITTER), HTTP_MAX_BACKOFF)
+
+
+def _time_for_retry(delay: Optional[float]) -> bool:
+    """Whether the query's budget leaves room to wait `delay` seconds and try again."""
+    if delay is None:
+        return False
+    remaining = remaining_time()
+    return remaining is None or remaining > delay
+
+
+def request(method: str, url: str, **kwargs) -> requests.Response:
+    """
+    Send a request through the shared session, within the query's deadline and the
+    host's circuit breaker. Connection errors and 429/5xx responses are retried with
+    jittered exponential backoff while the budget leaves room, each attempt getting
+    only the time that is left.
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        **kwargs: Passed to requests.Session.request (params, data, timeout, stream, ...)
+
+    Returns:
+        The final response (after retries on connection errors and 429/5xx)
+
+    Raises:
+        DeadlineExceeded: If the query's budget ran out
+        CircuitOpenError: If the host is failing and was not called
+    """
+    session = get_session()
+    timeout = kwargs.pop("timeout", None)
+    breaker = get_breaker(url)
+    breaker.before_call()
+    timer = metrics.UpstreamTimer(url)
+    status = None
+    try:
+        # Overpass queries are sent as POST but are read-only, so they are safe to retry
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            last_attempt = attempt == HTTP_MAX_RETRIES
+            attempt_timeout = budget_timeout(timeout)
+            try:
+                response = session.request(method, url, timeout=attempt_timeout, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if attempt_timeout != timeout and (isinstance(e, requests.exceptions.Timeout)
+                                                   or remaining_time() <= 0):
+                    # Our budget was shorter than the host's normal timeout; not the host's fault
+                    status = DeadlineExceeded.__name__
+                    raise DeadlineExceeded("Request deadline exceeded") from e
+                delay = _backoff_delay(attempt)
+                if last_attempt or not _time_for_retry(delay):
+                    breaker.record_failure()
+                    status = type(e).__name__
+                    raise
+                time.sleep(delay)
+                continue
+            if response.status_code in RETRY_STATUS_CODES:
+                delay = _backoff_delay(attempt, response.headers.get("Retry-After"))
+                if not last_attempt and _time_for_retry(delay):
+                    response.close()
+                    time.sleep(delay)
+                    continue
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            status = str(response.status_code)
+            return response
+    except DeadlineExceeded:
+        # Raised by budget_timeout() before a retry
+        status = DeadlineExceeded.__name__
+        raise
+    except BaseException as e:
+        status = status or type(e).__name__
+        raise
+    finally:
+        # Ends a half-open trial that ran out of budget (or was interrupted) without a verdict
+        breaker.release()
+        timer.finish(status)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """Send a GET request through the shared session."""
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    """Send a POST request through the shared session."""
+    return request("POST", url, **kwargs)
+
+
+def get_async_client() -> "httpx.AsyncClient":
+    """
+    Get the pooled async client for the running event loop, creating it on first use.
+
+    Returns:
+        Shared httpx.AsyncClient
+    """
+    if httpx is None:
+        raise RuntimeError("The async serving path requires the 'httpx' package: pip install httpx")
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_CONNECTIONS * HTTP_POOL_MAXSIZE,
+                max_keepalive_connections=HTTP_POOL_MAXSIZE
+            )
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def close_async_client() -> None:
+    """Close the async client of the running event loop (call on application shutdown)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def async_request(method: str, url: str, stream: bool = False, **kwargs) -> "httpx.Response":
+    """
+    Async version of request(): same retry policy, within the query's deadline and
+    the host's circuit breaker.
+
+    Args:
+        method: HTTP method
+        url: Request URL
+        stream: If True the body is not read; the caller must `await response.aclose()`
+        **kwargs: Passed to httpx.AsyncClient.build_request (params, data, timeout, ...)
+
+    Returns:
+        The final response (after retries on connection errors and 429/5xx)
+
+    Raises:
+        DeadlineExceeded: If the query's budget ran out
+        CircuitOpenError: If the host is failing and was not called
+    """
+    client = get_async_client()
+    timeout = kwargs.pop("timeout", None)
+    breaker = get_breaker(url)
+    breaker.before_call()
+    timer = metrics.UpstreamTimer(url)
+    status = "CancelledError"
+    try:
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            last_attempt = attempt == HTTP_MAX_RETRIES
+            attempt_timeout = budget_timeout(timeout)
+            try:
+                response = await client.send(
+                    client.build_request(method, url, timeout=attempt_timeout, **kwargs), stream=stream
+                )
+            except httpx.TimeoutException as e:
+                if attempt_timeout != timeout:
+                    status = DeadlineExceeded.__name__
+                    raise DeadlineExceeded("Request deadline exceeded") from e
+                delay = _backoff_delay(attempt)
+                if last_attempt or not _time_for_retry(delay):
+                    breaker.record_failure()
+                    status = type(e).__name__
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            except httpx.TransportError as e:
+                delay = _backoff_delay(attempt)
+                if last_attempt or not _time_for_retry(delay):
+                    breaker.record_failure()
+                    status = type(e).__name__
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            if response.status_code in RETRY_STATUS_CODES:
+                delay = _backoff_delay(attempt, response.headers.get("Retry-After"))
+                if not last_attempt and _time_for_retry(delay):
+                    await response.aclose()
+                    await asyncio.sleep(delay)
+                    continue
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            status = str(response.status_code)
+            return response
+    except DeadlineExceeded:
+        # Raised by budget_timeout() before a retry
+        status = DeadlineExceeded.__name__
+        raise
+    finally:
+        # Ends a half-open trial that was cancelled or ran out of budget without a verdict
+        breaker.release()
+        timer.finish(status)
+
+
+async def async_get(url: str, **kwargs) -> "httpx.Response":
+    """Send a GET request through the async client."""
+    return await async_request("GET", url, **kwargs)
+
+
+async def async_post(url: str, **kwargs) -> "httpx.Response":
+    """Send a POST request through the async client."""
+    return await async_request("POST", url, **kwargs)
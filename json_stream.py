@@ -0,0 +1,111 @@
+"""
+Incremental JSON parsing for large upstream responses.
+Yields the items of one top-level array as the body arrives, so callers can
+stop reading as soon as they have what they need.
+"""
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, List
+
+
+_WHITESPACE = re.compile(r"[\s,]*")
+
+
+class ArrayStreamParser:
+    """
+    Push parser for the items of a top-level array member of a JSON object.
+
+    Feed it body chunks as they arrive (from a blocking or an async client) and it
+    returns the array items completed so far. Only the array named `key` is parsed;
+    everything before it is skipped and everything after it is ignored.
+    """
+
+    def __init__(self, key: str = "elements"):
+        """
+        Initialize the parser.
+
+        Args:
+            key: Name of the array member to extract
+        """
+        self.key = key
+        self.done = False
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._array_start = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._buffer = ""
+        self._in_array = False
+
+    def feed(self, chunk: bytes, final: bool = False) -> List[Any]:
+        """
+        Add a chunk of the body.
+
+        Args:
+            chunk: Next raw bytes of the body
+            final: True when this is the last chunk
+
+        Returns:
+            Array items completed by this chunk, in order
+
+        Raises:
+            ValueError: If the body ends before the array is found or completed
+        """
+        if self.done:
+            return []
+        self._buffer += self._utf8.decode(chunk, final=final)
+
+        if not self._in_array:
+            match = self._array_start.search(self._buffer)
+            if not match:
+                if final:
+                    raise ValueError(f"Response has no '{self.key}' array")
+                # Keep enough of the tail to match a key split across chunks
+                self._buffer = self._buffer[-(len(self.key) + 16):]
+                return []
+            self._buffer = self._buffer[match.end():]
+            self._in_array = True
+
+        items = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            pos = _WHITESPACE.match(buffer, pos).end()
+            if pos >= len(buffer):
+                break
+            if buffer[pos] == "]":
+                self.done = True
+                break
+            try:
+                item, pos = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Item is incomplete; wait for more data
+                break
+            items.append(item)
+        self._buffer = buffer[pos:]
+
+        if final and not self.done:
+            raise ValueError(f"Response ended inside the '{self.key}' array")
+        return items
+
+
+def iter_array_items(chunks: Iterable[bytes], key: str = "elements") -> Iterator[Any]:
+    """
+    Parse the items of a top-level array member from a streamed JSON object.
+    Closing the generator early stops consuming `chunks`.
+
+    Args:
+        chunks: Raw body chunks (e.g. response.iter_content())
+        key: Name of the array member to extract
+
+    Yields:
+        Each decoded array item in order
+
+    Raises:
+        ValueError: If the body ends before the array is found or completed
+    """
+    parser = ArrayStreamParser(key)
+    for chunk in chunks:
+        yield from parser.feed(chunk)
+        if parser.done:
+            return
+    yield from parser.feed(b"", final=True)
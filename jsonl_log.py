@@ -0,0 +1,132 @@
+"""
+Append-only JSON lines logs for the multi-agent tourism system.
+The traffic log (traffic.py), the trace log (tracing.py) and the cache warmer's
+query log (cache_warmer.py) all write through JSONLWriter: records are queued and
+appended by a background thread, so a request (or the event loop of the ASGI
+server) never waits on the disk.
+"""
+import atexit
+import json
+import os
+import queue
+import sys
+import threading
+import weakref
+from typing import Dict, List, Optional
+
+# Records waiting to be written per log; once full, new records are dropped
+JSONL_QUEUE_SIZE = int(os.environ.get("JSONL_QUEUE_SIZE", 10000))
+
+_writers: "weakref.WeakSet[JSONLWriter]" = weakref.WeakSet()
+
+
+class JSONLWriter:
+    """Appends JSON objects to a file, one per line, from a background thread."""
+
+    def __init__(self, path: str, name: str, queue_size: int = JSONL_QUEUE_SIZE, max_bytes: int = 0):
+        """
+        Initialize the writer.
+
+        Args:
+            path: JSON lines file, "-" for stdout, or an empty string to write nothing
+            name: Name used in error messages (e.g. "traffic log")
+            queue_size: Records that may wait to be written before new ones are dropped
+            max_bytes: Once the file reaches this size it is renamed to path + ".1"
+                (replacing the previous one) and a new file is started (0 = never)
+        """
+        self.path = path
+        self.name = name
+        self.queue_size = queue_size
+        self.max_bytes = max_bytes
+        self.written = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._queue: Optional["queue.Queue"] = None
+        self._pid = 0
+        _writers.add(self)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def write(self, record: Dict) -> None:
+        """
+        Queue a record to be appended (returns without waiting for the disk).
+
+        Args:
+            record: JSON-serialisable record
+        """
+        if not self.path:
+            return
+        line = json.dumps(record)
+        try:
+            self._get_queue().put_nowait(line)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wait until every queued record has been written (e.g. before exit)."""
+        q = self._queue
+        if q is None or self._pid != os.getpid():
+            return
+        done = threading.Event()
+        try:
+            q.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def _get_queue(self) -> "queue.Queue":
+        """The queue of this process, starting its writer thread on first use (and after a fork)."""
+        pid = os.getpid()
+        if self._queue is None or self._pid != pid:
+            with self._lock:
+                if self._queue is None or self._pid != pid:
+                    q: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+                    thread = threading.Thread(target=self._run, args=(q,), daemon=True,
+                                              name=f"jsonl-{self.name.replace(' ', '-')}")
+                    thread.start()
+                    self._queue, self._pid = q, pid
+        return self._queue
+
+    def _run(self, q: "queue.Queue") -> None:
+        """Writer thread: append queued lines, a batch per file open."""
+        while True:
+            batch: List = [q.get()]
+            while len(batch) < 1000:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            lines = [item for item in batch if isinstance(item, str)]
+            if lines:
+                self._append(lines)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+    def _append(self, lines: List[str]) -> None:
+        """Append lines to the file (or stdout)."""
+        text = "".join(line + "\n" for line in lines)
+        if self.path == "-":
+            sys.stdout.write(text)
+            sys.stdout.flush()
+        else:
+            try:
+                if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(text)
+            except OSError as e:
+                print(f"Error writing {self.name} {self.path}: {e}")
+                return
+        with self._lock:
+            self.written += len(lines)
+
+
+@atexit.register
+def _flush_all() -> None:
+    """Write out what is still queued when the process exits."""
+    for writer in list(_writers):
+        writer.flush(timeout=5)
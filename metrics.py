@@ -0,0 +1,323 @@
+"""
+Metrics for the multi-agent tourism system, exposed at /api/metrics in the
+Prometheus text format.
+
+The hot path only updates counters and histogram buckets in memory. Cache,
+single-flight and circuit breaker numbers are read from their own stats() when
+the metrics are scraped.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+from urllib.parse import urlsplit
+
+# Latency histogram buckets in seconds (Prometheus client defaults, extended for slow upstreams)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# A collected metric family: (name, type, help, samples), where each sample is
+# (labels, value) or, for the series of a histogram, (labels, value, name suffix)
+Family = Tuple[str, str, str, List[tuple]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    """Base class of the labelled metrics: one value (or histogram) per label combination."""
+
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def _labels(self, labelvalues: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, labelvalues))
+
+    def collect(self) -> Family:
+        with self._lock:
+            samples = [(self._labels(key), value) for key, value in sorted(self._values.items())]
+        return self.name, self.type, self.help, samples
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+
+    type = "counter"
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+
+class Gauge(_Metric):
+    """Value that goes up and down (e.g. requests in flight)."""
+
+    type = "gauge"
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g. latencies) over fixed buckets."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (plus +Inf), sum]
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def collect(self) -> Family:
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in sorted(self._series.items())]
+
+        samples = []
+        for key, counts, total in series:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                samples.append((dict(labels, le=_format_value(bound)), cumulative, "_bucket"))
+            samples.append((labels, total, "_sum"))
+            samples.append((labels, cumulative, "_count"))
+        return self.name, self.type, self.help, samples
+
+
+class Registry:
+    """The metrics of the process, plus collectors that report other components' stats."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def add(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Family]]) -> None:
+        """Register a function returning metric families, called on every scrape."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            The exposition text
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+            collectors = list(self._collectors)
+
+        families = [metric.collect() for metric in metrics]
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception as e:
+                print(f"Error collecting metrics: {e}")
+
+        lines = []
+        for name, type_, help, samples in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type_}")
+            for sample in samples:
+                labels, value = sample[0], sample[1]
+                suffix = sample[2] if len(sample) > 2 else ""
+                lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.add(Counter(
+    "tourism_http_requests_total", "HTTP requests served", ("endpoint", "method", "status")))
+http_latency = registry.add(Histogram(
+    "tourism_http_request_duration_seconds", "Time to produce an HTTP response", ("endpoint",)))
+http_in_flight = registry.add(Gauge(
+    "tourism_http_requests_in_flight", "HTTP requests being served", ("endpoint",)))
+upstream_requests = registry.add(Counter(
+    "tourism_upstream_requests_total", "Upstream API calls, by HTTP status or error", ("upstream", "status")))
+upstream_latency = registry.add(Histogram(
+    "tourism_upstream_request_duration_seconds",
+    "Upstream API call time until the response headers (including retries)", ("upstream",)))
+upstream_in_flight = registry.add(Gauge(
+    "tourism_upstream_requests_in_flight", "Upstream API calls waiting for a response", ("upstream",)))
+
+_upstream_names: Dict[str, str] = {}
+
+
+def name_upstream(url: str, name: str) -> None:
+    """
+    Label calls to a URL's host with a service name instead of the host.
+
+    Args:
+        url: Any URL of the service
+        name: Label value (e.g. "nominatim")
+    """
+    _upstream_names[urlsplit(url).netloc] = name
+
+
+def upstream_name(url: str) -> str:
+    """The upstream label of a URL: its registered service name, or its host."""
+    host = urlsplit(url).netloc
+    return _upstream_names.get(host, host)
+
+
+class UpstreamTimer:
+    """
+    Times one upstream call.
+
+        timer = UpstreamTimer(url)
+        ...
+        timer.finish(status)
+    """
+
+    __slots__ = ("upstream", "started")
+
+    def __init__(self, url: str):
+        self.upstream = upstream_name(url)
+        self.started = time.perf_counter()
+        upstream_in_flight.inc(self.upstream)
+
+    def finish(self, status: str) -> None:
+        """
+        Record the call.
+
+        Args:
+            status: HTTP status code, or the name of the error that ended the call
+        """
+        upstream_in_flight.dec(self.upstream)
+        upstream_latency.observe(time.perf_counter() - self.started, self.upstream)
+        upstream_requests.inc(self.upstream, status)
+
+
+def record_http_request(endpoint: str, method: str, status: int, seconds: float) -> None:
+    """Record a served HTTP request (the in-flight gauge is updated separately)."""
+    http_requests.inc(endpoint, method, str(status))
+    http_latency.observe(seconds, endpoint)
+
+
+def register_caches(*caches) -> None:
+    """
+    Report the hit and miss counters of TTLCache instances on every scrape.
+
+    Args:
+        *caches: Objects with a stats() returning name, hits, misses, hit_ratio and size
+    """
+    def collect() -> Iterable[Family]:
+        stats = [cache.stats() for cache in caches]
+        for key, type_, help in (
+            ("hits", "counter", "Cache lookups answered from the cache"),
+            ("misses", "counter", "Cache lookups that missed"),
+            ("hit_ratio", "gauge", "Share of cache lookups that hit, since start"),
+            ("size", "gauge", "Entries held in memory"),
+        ):
+            suffix = "_total" if type_ == "counter" else ""
+            yield (f"tourism_cache_{key}{suffix}", type_, help,
+                   [({"cache": s["name"]}, s[key]) for s in stats])
+    registry.add_collector(collect)
+
+
+def register_flights(*flights) -> None:
+    """
+    Report single-flight coalescing counters on every scrape.
+
+    Args:
+        *flights: SingleFlight instances
+    """
+    def collect() -> Iterable[Family]:
+        stats = [flight.stats() for flight in flights]
+        yield ("tourism_single_flight_leaders_total", "counter", "Lookups that called the upstream",
+               [({"flight": s["name"]}, s["leaders"]) for s in stats])
+        yield ("tourism_single_flight_shared_total", "counter", "Lookups that waited on another caller's",
+               [({"flight": s["name"]}, s["shared"]) for s in stats])
+    registry.add_collector(collect)
+
+
+def register_breakers(breaker_stats: Callable[[], Dict[str, Dict]]) -> None:
+    """
+    Report circuit breaker states on every scrape.
+
+    Args:
+        breaker_stats: Returns breaker stats keyed by host (http_client.breaker_stats)
+    """
+    def collect() -> Iterable[Family]:
+        stats = breaker_stats()
+        yield ("tourism_circuit_breaker_open", "gauge", "1 if calls to the upstream are being refused",
+               [({"upstream": _upstream_names.get(host, host)}, int(s["state"] != "closed"))
+                for host, s in sorted(stats.items())])
+        yield ("tourism_circuit_breaker_rejected_total", "counter", "Calls refused by the circuit breaker",
+               [({"upstream": _upstream_names.get(host, host)}, s["rejected"])
+                for host, s in sorted(stats.items())])
+    registry.add_collector(collect)
+
+
+def register_limiters(*limiters) -> None:
+    """
+    Report the load and queue depth of concurrency limiters on every scrape.
+
+    Args:
+        *limiters: ConcurrencyLimiter or AsyncConcurrencyLimiter instances
+    """
+    def collect() -> Iterable[Family]:
+        stats = [limiter.stats() for limiter in limiters]
+        yield ("tourism_limiter_in_flight", "gauge", "Requests holding a slot",
+               [({"limiter": s["name"]}, s["in_flight"]) for s in stats])
+        yield ("tourism_limiter_queue_depth", "gauge", "Requests waiting for a slot",
+               [({"limiter": s["name"]}, s["queued"]) for s in stats])
+        yield ("tourism_limiter_max_in_flight", "gauge", "Slots (0 for no limit)",
+               [({"limiter": s["name"]}, s["max_in_flight"]) for s in stats])
+        yield ("tourism_limiter_max_queue_depth", "gauge", "Requests allowed to wait for a slot",
+               [({"limiter": s["name"]}, s["max_queued"]) for s in stats])
+        yield ("tourism_limiter_admitted_total", "counter", "Requests given a slot",
+               [({"limiter": s["name"]}, s["admitted"]) for s in stats])
+        yield ("tourism_limiter_queued_total", "counter", "Requests given a slot after waiting for one",
+               [({"limiter": s["name"]}, s["waited"]) for s in stats])
+        yield ("tourism_limiter_rejected_total", "counter", "Requests shed with 503",
+               [({"limiter": s["name"], "reason": "queue_full"}, s["rejected_queue_full"]) for s in stats] +
+               [({"limiter": s["name"], "reason": "queue_timeout"}, s["rejected_timeout"]) for s in stats])
+    registry.add_collector(collect)
+
+
+def render() -> str:
+    """Render every metric of the process in the Prometheus text format."""
+    return registry.render()
@@ -0,0 +1,94 @@
+"""
+Place name extraction for the multi-agent tourism system.
+Finds the place a query is about ("I'm going to Mysore, ..." -> "Mysore") using a
+table of trigger patterns compiled once at import, instead of compiling (or looking
+up in the re cache) and post-processing with ad-hoc regexes on every query.
+Throughput is measured by benchmarks/bench_extractor.py.
+"""
+import re
+
+# Phrases that introduce a place, highest priority first. A place after an earlier
+# trigger wins over one after a later trigger, wherever they are in the query.
+TRIGGER_PHRASES = [
+    "going to go to",  # "going to go to Mysore"
+    "going to",        # "going to mysore"
+    "visit",           # "visit Paris"
+    "in",              # "in Bangalore"
+    "to",              # "to Paris"
+    "from",            # "from Mysore"
+]
+
+# What ends a place name
+_TERMINATOR = r"(?:,|\.|$|\?|what|where|let|plan|trip)"
+
+# One compiled pattern per trigger, in priority order. Each starts with a literal,
+# which lets the regex engine skip ahead with a fast substring search; a single
+# alternation of all triggers loses that and measured slower in CPython.
+_PLACE_PATTERNS = [
+    re.compile(rf"{re.escape(phrase)} ([A-Za-z][A-Za-z\s]+?){_TERMINATOR}", re.IGNORECASE)
+    for phrase in TRIGGER_PHRASES
+]
+
+# Trailing sentence words and leading articles captured along with the place
+_TRAILING_WORDS = re.compile(r"\s+(what|where|when|how|let|plan|trip|from|to|going|visit).*$", re.IGNORECASE)
+_LEADING_ARTICLE = re.compile(r"^\s*(?:the|a|an)\s+", re.IGNORECASE)
+
+# Words never taken as (part of) a place name by the fallback
+SKIP_WORDS = frozenset({
+    'i', 'i\'m', 'let\'s', 'let', 'going', 'to', 'go', 'visit', 'from', 'in', 'the', 'a', 'an',
+    'what', 'where', 'when', 'how', 'plan', 'trip', 'is', 'are', 'there', 'and', 'or', 'but'
+})
+_PUNCTUATION = '.,!?;:'
+
+
+def _clean_place(place: str) -> str:
+    """Strip sentence words and articles from a captured place and title-case it."""
+    place = _TRAILING_WORDS.sub('', place.strip())
+    place = _LEADING_ARTICLE.sub('', place).strip()
+    # Capitalize first letter of each word for better matching
+    return ' '.join(word.capitalize() for word in place.split())
+
+
+def _fallback_place(user_input: str) -> str:
+    """Take capitalized or significant words as the place when no trigger phrase matched."""
+    words = user_input.split()
+    place_words = []
+
+    for i, w in enumerate(words):
+        w_clean = w.strip(_PUNCTUATION).lower()
+        # Skip common words
+        if w_clean in SKIP_WORDS:
+            continue
+        # If word is capitalized or is a significant word (longer than 3 chars), it might be a place
+        if (w and w[0].isupper()) or len(w_clean) > 3:
+            place_words.append(w.strip(_PUNCTUATION))
+            # If next word is also significant, include it
+            if i + 1 < len(words):
+                next_w = words[i + 1].strip(_PUNCTUATION).lower()
+                if next_w not in SKIP_WORDS and (len(next_w) > 2 or words[i + 1][0].isupper()):
+                    place_words.append(words[i + 1].strip(_PUNCTUATION))
+                    break
+
+    return ' '.join(word.capitalize() for word in ' '.join(place_words).split())
+
+
+def extract_place_name(user_input: str) -> str:
+    """
+    Extract place name from user input.
+    Looks for patterns like "going to [place]", "visit [place]", etc. and handles
+    lowercase place names like "mysore", "udupi".
+
+    Args:
+        user_input: User's query
+
+    Returns:
+        Extracted place name or empty string
+    """
+    for pattern in _PLACE_PATTERNS:
+        match = pattern.search(user_input)
+        if match:
+            place = _clean_place(match.group(1))
+            if place and len(place) > 2:
+                return place
+
+    return _fallback_place(user_input)
@@ -0,0 +1,396 @@
+"""
+Offline point-of-interest index for the multi-agent tourism system.
+Builds a compact grid index of tourist attractions from an OpenStreetMap extract,
+so the Places Agent can answer "attractions within R km" without calling Overpass.
+
+Build once:
+    python poi_index.py build karnataka.osm.pbf -o data/poi_index.json.gz
+
+Then run the app with PLACES_BACKEND=local (and POI_INDEX_PATH if not the default).
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import sys
+import threading
+import xml.etree.ElementTree as ET
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from classifier import classify, matches_overpass_filters
+from geo import haversine_km
+from json_stream import iter_array_items
+
+try:
+    import osmium
+except ImportError:  # PBF support is optional
+    osmium = None
+
+
+# The default index lives next to this module, so it is found from any working directory
+POI_INDEX_PATH = os.environ.get(
+    "POI_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "poi_index.json.gz")
+)
+DEFAULT_CELL_SIZE = 0.1  # Grid cell size in degrees (about 11 km of latitude)
+INDEX_VERSION = 1
+
+KM_PER_DEGREE = 111.32
+
+
+Bounds = Tuple[float, float, float, float]  # (min lat, min lon, max lat, max lon)
+
+
+def _bounds(coords: List[Tuple[float, float]]) -> Optional[Bounds]:
+    """Bounding box of a list of (lat, lon) points."""
+    if not coords:
+        return None
+    lats = [c[0] for c in coords]
+    lons = [c[1] for c in coords]
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+def _merge_bounds(boxes: List[Bounds]) -> Optional[Bounds]:
+    """Bounding box of several bounding boxes."""
+    if not boxes:
+        return None
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
+
+
+def _center(bounds: Optional[Bounds]) -> Optional[Dict[str, float]]:
+    """Centre of a bounding box, as Overpass "out center" reports it for ways and relations."""
+    if bounds is None:
+        return None
+    return {"lat": (bounds[0] + bounds[2]) / 2, "lon": (bounds[1] + bounds[3]) / 2}
+
+
+def _relation_bounds(members: List[Dict], node_coords: Dict[int, Tuple[float, float]],
+                     way_bounds: Dict[int, Bounds]) -> Optional[Bounds]:
+    """Bounding box of a relation's node and way members seen earlier in the file."""
+    boxes = []
+    for member in members:
+        ref = member.get("ref")
+        if member.get("type") == "node" and ref in node_coords:
+            lat, lon = node_coords[ref]
+            boxes.append((lat, lon, lat, lon))
+        elif member.get("type") == "way" and ref in way_bounds:
+            boxes.append(way_bounds[ref])
+    return _merge_bounds(boxes)
+
+
+def _iter_json_elements(path: str) -> Iterator[Dict]:
+    """
+    Read elements from an OSM JSON / Overpass JSON file.
+    Ways and relations without a "center" are placed using the nodes and ways seen
+    earlier in the file.
+    """
+    node_coords: Dict[int, Tuple[float, float]] = {}
+    way_bounds: Dict[int, Bounds] = {}
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        chunks = iter(lambda: f.read(1024 * 1024), b"")
+        for element in iter_array_items(chunks, "elements"):
+            element_type = element.get("type")
+            if element_type == "node" and "lat" in element:
+                node_coords[element["id"]] = (element["lat"], element["lon"])
+            if "lat" not in element and "center" not in element:
+                if "bounds" in element:
+                    b = element["bounds"]
+                    bounds = (b["minlat"], b["minlon"], b["maxlat"], b["maxlon"])
+                elif "geometry" in element:
+                    bounds = _bounds([(p["lat"], p["lon"]) for p in element["geometry"] if p])
+                elif element_type == "relation":
+                    bounds = _relation_bounds(element.get("members", []), node_coords, way_bounds)
+                else:
+                    bounds = _bounds([node_coords[n] for n in element.get("nodes", []) if n in node_coords])
+                if bounds and element_type == "way" and "id" in element:
+                    way_bounds[element["id"]] = bounds
+                center = _center(bounds)
+                if center:
+                    element["center"] = center
+            yield element
+
+
+def _iter_xml_elements(path: str) -> Iterator[Dict]:
+    """Read elements from an OSM XML file, placing ways and relations at the centre of their members."""
+    node_coords: Dict[int, Tuple[float, float]] = {}
+    way_bounds: Dict[int, Bounds] = {}
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for _, elem in ET.iterparse(f, events=("end",)):
+            if elem.tag not in ("node", "way", "relation"):
+                continue
+            tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+            element = {"type": elem.tag, "id": int(elem.get("id", 0)), "tags": tags}
+            if elem.tag == "node":
+                lat, lon = float(elem.get("lat")), float(elem.get("lon"))
+                node_coords[element["id"]] = (lat, lon)
+                element["lat"], element["lon"] = lat, lon
+            else:
+                if elem.tag == "way":
+                    bounds = _bounds([node_coords[int(nd.get("ref"))] for nd in elem.iter("nd")
+                                      if int(nd.get("ref")) in node_coords])
+                    if bounds:
+                        way_bounds[element["id"]] = bounds
+                else:
+                    members = [{"type": m.get("type"), "ref": int(m.get("ref"))} for m in elem.iter("member")]
+                    bounds = _relation_bounds(members, node_coords, way_bounds)
+                center = _center(bounds)
+                if center:
+                    element["center"] = center
+            elem.clear()
+            if tags:
+                yield element
+
+
+def _is_attraction(element_type: str, tags: Dict[str, str]) -> bool:
+    """Whether an element passes the Overpass query's tag filter and is classified as an attraction."""
+    return (matches_overpass_filters(element_type, tags)
+            and classify(tags.get("name", "").strip(), tags) is not None)
+
+
+def _iter_pbf_elements(path: str) -> Iterator[Dict]:
+    """
+    Read the attractions of an OSM PBF file (requires the osmium package).
+    Elements are filtered and classified while the file is streamed, so only attractions
+    are held in memory; relations are read as the areas osmium assembles from them.
+    """
+    if osmium is None:
+        raise RuntimeError("Reading .pbf extracts requires the 'osmium' package: pip install osmium")
+
+    elements: List[Dict] = []
+
+    class Handler(osmium.SimpleHandler):
+        def node(self, n):
+            tags = dict(n.tags)
+            if _is_attraction("node", tags):
+                elements.append({"type": "node", "tags": tags,
+                                 "lat": n.location.lat, "lon": n.location.lon})
+
+        def way(self, w):
+            tags = dict(w.tags)
+            if not _is_attraction("way", tags):
+                return
+            center = _center(_bounds([(nd.lat, nd.lon) for nd in w.nodes if nd.location.valid()]))
+            if center:
+                elements.append({"type": "way", "tags": tags, "center": center})
+
+        def area(self, a):
+            # Areas built from closed ways were already read as ways
+            if a.from_way():
+                return
+            tags = dict(a.tags)
+            if not _is_attraction("relation", tags):
+                return
+            center = _center(_bounds([(nd.lat, nd.lon) for ring in a.outer_rings()
+                                      for nd in ring if nd.location.valid()]))
+            if center:
+                elements.append({"type": "relation", "tags": tags, "center": center})
+
+    Handler().apply_file(path, locations=True)
+    return iter(elements)
+
+
+def iter_extract_elements(path: str) -> Iterator[Dict]:
+    """
+    Read the elements of an OSM extract in Overpass-style form.
+
+    Args:
+        path: .json, .osm/.xml or .pbf file (.json and .osm may be gzipped)
+
+    Returns:
+        Iterator of element dicts with 'type', 'tags' and 'lat'/'lon' or 'center'
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".pbf"):
+        return _iter_pbf_elements(path)
+    if name.endswith((".osm", ".xml")):
+        return _iter_xml_elements(path)
+    return _iter_json_elements(path)
+
+
+def build_index(source_path: str, output_path: str = POI_INDEX_PATH,
+                cell_size: float = DEFAULT_CELL_SIZE) -> int:
+    """
+    Classify the elements of an OSM extract and write a grid index of the attractions.
+    Only elements matching the Overpass attractions query's tag filters are considered.
+
+    Args:
+        source_path: OSM extract to ingest
+        output_path: Where to write the index (gzipped JSON)
+        cell_size: Grid cell size in degrees
+
+    Returns:
+        Number of attractions written
+    """
+    records = []
+    for element in iter_extract_elements(source_path):
+        tags = element.get("tags", {})
+        # Index only what the Overpass query would return, so both backends agree
+        if not matches_overpass_filters(element.get("type", "node"), tags):
+            continue
+        name = tags.get("name", "").strip()
+        category = classify(name, tags)
+        if category is None:
+            continue
+        position = element.get("center", element)
+        if position.get("lat") is None or position.get("lon") is None:
+            continue
+        records.append((name, round(position["lat"], 6), round(position["lon"], 6), category))
+
+    # Sort by grid cell so each cell is one contiguous range in the index
+    records.sort(key=lambda r: (math.floor(r[1] / cell_size), math.floor(r[2] / cell_size)))
+
+    directory = os.path.dirname(output_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with gzip.open(output_path, "wt", encoding="utf-8") as f:
+        json.dump({
+            "version": INDEX_VERSION,
+            "cell_size": cell_size,
+            "names": [r[0] for r in records],
+            "lat": [r[1] for r in records],
+            "lon": [r[2] for r in records],
+            "category": [r[3] for r in records]
+        }, f, ensure_ascii=False, separators=(",", ":"))
+    return len(records)
+
+
+class POIIndex:
+    """
+    Grid index of tourist attractions loaded from a file written by build_index().
+    Coordinates are held in flat arrays and each grid cell maps to a range of rows.
+    """
+
+    def __init__(self, path: str = POI_INDEX_PATH):
+        """
+        Load an index from disk.
+
+        Args:
+            path: Index file written by build_index()
+        """
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported POI index version in {path}: {data.get('version')}")
+
+        self.cell_size = data["cell_size"]
+        self.names: List[str] = data["names"]
+        self.lats = array("d", data["lat"])
+        self.lons = array("d", data["lon"])
+        # Indexes built before categories were recorded have none
+        self.categories: List[Optional[str]] = data.get("category") or [None] * len(self.names)
+        self.cells: Dict[Tuple[int, int], Tuple[int, int]] = {}
+
+        for i in range(len(self.names)):
+            cell = self._cell(self.lats[i], self.lons[i])
+            start, _ = self.cells.get(cell, (i, i))
+            self.cells[cell] = (start, i + 1)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def query(self, lat: float, lon: float, search_radius: int, limit: int = 0) -> List[Dict]:
+        """
+        Find the attractions within a radius of a point.
+
+        Args:
+            lat: Latitude of the search centre
+            lon: Longitude of the search centre
+            search_radius: Search radius in metres
+            limit: Maximum number of attractions to return (0 for no limit)
+
+        Returns:
+            Attractions nearest first, each a dict with 'name', 'lat', 'lon' and 'category'
+        """
+        radius_km = search_radius / 1000
+        dlat = radius_km / KM_PER_DEGREE
+        dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+        min_cell = self._cell(lat - dlat, lon - dlon)
+        max_cell = self._cell(lat + dlat, lon + dlon)
+
+        matches = []
+        for cell_lat in range(min_cell[0], max_cell[0] + 1):
+            for cell_lon in range(min_cell[1], max_cell[1] + 1):
+                rows = self.cells.get((cell_lat, cell_lon))
+                if not rows:
+                    continue
+                for i in range(*rows):
+                    distance = haversine_km(lat, lon, self.lats[i], self.lons[i])
+                    if distance <= radius_km:
+                        matches.append((distance, i))
+        matches.sort()
+
+        attractions = []
+        seen_names = set()
+        for _, i in matches:
+            name_lower = self.names[i].lower()
+            if name_lower in seen_names:
+                continue
+            seen_names.add(name_lower)
+            attractions.append({
+                "name": self.names[i],
+                "lat": self.lats[i],
+                "lon": self.lons[i],
+                "category": self.categories[i]
+            })
+            if limit and len(attractions) >= limit:
+                break
+        return attractions
+
+
+_index: Optional[POIIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_poi_index() -> POIIndex:
+    """
+    Get the process-wide index, loading it from POI_INDEX_PATH on first use.
+
+    Returns:
+        Loaded POIIndex
+    """
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = POIIndex(POI_INDEX_PATH)
+    return _index
+
+
+def main():
+    """Command-line entry point for building and querying the index."""
+    parser = argparse.ArgumentParser(description="Offline tourist attraction index")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Build an index from an OSM extract")
+    build.add_argument("source", help="OSM extract (.json, .osm/.xml, optionally .gz, or .pbf)")
+    build.add_argument("-o", "--output", default=POI_INDEX_PATH, help="Index file to write")
+    build.add_argument("--cell-size", type=float, default=DEFAULT_CELL_SIZE,
+                       help="Grid cell size in degrees")
+
+    query = sub.add_parser("query", help="List attractions around a point")
+    query.add_argument("lat", type=float)
+    query.add_argument("lon", type=float)
+    query.add_argument("--radius", type=int, default=100000, help="Radius in metres")
+    query.add_argument("--limit", type=int, default=20)
+    query.add_argument("--index", default=POI_INDEX_PATH, help="Index file to read")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_index(args.source, args.output, args.cell_size)
+        print(f"Wrote {count} attractions to {args.output}")
+    else:
+        index = POIIndex(args.index)
+        for attraction in index.query(args.lat, args.lon, args.radius, args.limit):
+            print(f"{attraction['name']} ({attraction['lat']:.5f}, {attraction['lon']:.5f})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
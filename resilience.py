@@ -0,0 +1,386 @@
+"""
+Deadlines, circuit breakers and concurrency limits.
+A query gets one time budget that every upstream call inside it draws from, and
+each upstream host gets a circuit breaker so a degraded service fails fast
+instead of tying up workers until its timeouts expire. The query endpoints admit
+a bounded number of requests at once and shed the rest, so a slow upstream
+cannot pile up requests until every worker is stuck.
+"""
+import asyncio
+import collections
+import contextvars
+import os
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import requests
+
+
+# Total seconds one query may spend on upstream calls
+REQUEST_DEADLINE = float(os.environ.get("REQUEST_DEADLINE", 60))
+
+# Consecutive failures that open a breaker, and seconds before a trial call is let through
+BREAKER_FAILURE_THRESHOLD = int(os.environ.get("BREAKER_FAILURE_THRESHOLD", 5))
+BREAKER_RESET_TIMEOUT = float(os.environ.get("BREAKER_RESET_TIMEOUT", 30))
+
+# Queries processed at once per server process (0 for no limit), queries allowed to wait
+# for a slot, and seconds one may wait before it is turned away with 503
+MAX_CONCURRENT_QUERIES = int(os.environ.get("MAX_CONCURRENT_QUERIES", 64))
+MAX_QUEUED_QUERIES = int(os.environ.get("MAX_QUEUED_QUERIES", 64))
+QUERY_QUEUE_TIMEOUT = float(os.environ.get("QUERY_QUEUE_TIMEOUT", 5))
+# Retry-After seconds sent with the 503 of a shed query
+OVERLOAD_RETRY_AFTER = int(os.environ.get("OVERLOAD_RETRY_AFTER", 5))
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """The query's time budget ran out before (or during) an upstream call."""
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """An upstream is considered down and the call was not attempted."""
+
+
+_current_deadline: contextvars.ContextVar[Optional["Deadline"]] = contextvars.ContextVar(
+    "deadline", default=None
+)
+
+
+class Deadline:
+    """
+    Point in time by which a query must be finished.
+
+    The deadline applies to code called through run() / arun(), including code
+    those calls submit to other threads with Deadline.run.
+    """
+
+    def __init__(self, seconds: float = REQUEST_DEADLINE):
+        """
+        Start a deadline.
+
+        Args:
+            seconds: Budget from now
+        """
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        """Seconds left (0 once expired)."""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def run(self, fn: Callable[..., Any], *args) -> Any:
+        """Call fn(*args) with this deadline in effect (safe to submit to an executor)."""
+        token = _current_deadline.set(self)
+        try:
+            return fn(*args)
+        finally:
+            _current_deadline.reset(token)
+
+    async def arun(self, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """Await fn(*args) with this deadline in effect (tasks it starts inherit it)."""
+        token = _current_deadline.set(self)
+        try:
+            return await fn(*args)
+        finally:
+            _current_deadline.reset(token)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """The deadline in effect, or None outside a query."""
+    return _current_deadline.get()
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left in the current query's budget, or None if there is no deadline."""
+    deadline = _current_deadline.get()
+    return deadline.remaining() if deadline is not None else None
+
+
+def check_deadline() -> None:
+    """
+    Raise if the current query's budget has run out (for long reads between calls).
+
+    Raises:
+        DeadlineExceeded: If the budget has run out
+    """
+    deadline = _current_deadline.get()
+    if deadline is not None and deadline.remaining() <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+def budget_timeout(timeout: Optional[float]) -> Optional[float]:
+    """
+    Cap a call's timeout at the remaining budget.
+
+    Args:
+        timeout: The call's own timeout in seconds (None for no limit)
+
+    Returns:
+        The smaller of timeout and the remaining budget
+
+    Raises:
+        DeadlineExceeded: If the budget has already run out
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for one upstream.
+
+    Closed: calls go through. After `failure_threshold` consecutive failures it opens
+    and calls fail immediately with CircuitOpenError. After `reset_timeout` seconds one
+    trial call is let through (half-open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = BREAKER_RESET_TIMEOUT):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            name: Upstream name, used in errors and stats()
+            failure_threshold: Consecutive failures that open the breaker
+            reset_timeout: Seconds the breaker stays open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Current state: closed, open or half-open."""
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> None:
+        """
+        Check that a call may go ahead.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with a trial already running
+        """
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return
+            self.rejected += 1
+        raise CircuitOpenError(f"{self.name} is unavailable (circuit open), try again later")
+
+    def record_success(self) -> None:
+        """Record a successful call, closing the breaker."""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the breaker at the threshold (or after a failed trial)."""
+        with self._lock:
+            self._failures += 1
+            if self._trial_running or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+    def release(self) -> None:
+        """End a call that neither succeeded nor failed upstream (e.g. it was cancelled)."""
+        with self._lock:
+            self._trial_running = False
+
+    def stats(self) -> Dict:
+        """
+        Breaker statistics.
+
+        Returns:
+            Dictionary with name, state, consecutive failures and rejected calls
+        """
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self._state(time.monotonic()),
+                "failures": self._failures,
+                "rejected": self.rejected
+            }
+
+
+class _LimiterStats:
+    """Counters shared by the thread and asyncio concurrency limiters."""
+
+    def __init__(self, name: str, max_in_flight: int, max_queued: int, queue_timeout: float):
+        """
+        Initialize the limiter.
+
+        Args:
+            name: Limiter name, used in stats()
+            max_in_flight: Requests admitted at once (0 for no limit)
+            max_queued: Requests allowed to wait for a slot; any more are rejected at once
+            queue_timeout: Seconds a request may wait for a slot before it is rejected
+        """
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.waited = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+
+    def _has_slot(self) -> bool:
+        return self.max_in_flight <= 0 or self.in_flight < self.max_in_flight
+
+    def stats(self) -> Dict:
+        """
+        Limiter statistics.
+
+        Returns:
+            Dictionary with name, in_flight, queued, the limits, admitted (total), waited
+            (admitted after queueing), rejected_queue_full and rejected_timeout
+        """
+        return {
+            "name": self.name,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued,
+            "admitted": self.admitted,
+            "waited": self.waited,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout
+        }
+
+
+class ConcurrencyLimiter(_LimiterStats):
+    """
+    Bounds the requests processed at once across threads.
+
+    A request that finds every slot taken waits in a bounded queue for up to
+    queue_timeout seconds; when the queue is full it is rejected immediately.
+
+        if limiter.acquire():
+            try:
+                ...
+            finally:
+                limiter.release()
+    """
+
+    def __init__(self, name: str, max_in_flight: int = MAX_CONCURRENT_QUERIES,
+                 max_queued: int = MAX_QUEUED_QUERIES, queue_timeout: float = QUERY_QUEUE_TIMEOUT):
+        super().__init__(name, max_in_flight, max_queued, queue_timeout)
+        self._condition = threading.Condition()
+
+    def acquire(self) -> bool:
+        """
+        Take a slot, waiting in the queue if needed.
+
+        Returns:
+            True if admitted (call release() when done), False if the request should be shed
+        """
+        with self._condition:
+            if self._has_slot():
+                self.in_flight += 1
+                self.admitted += 1
+                return True
+            if self.queued >= self.max_queued:
+                self.rejected_queue_full += 1
+                return False
+
+            self.queued += 1
+            try:
+                if not self._condition.wait_for(self._has_slot, self.queue_timeout):
+                    self.rejected_timeout += 1
+                    return False
+            finally:
+                self.queued -= 1
+            self.in_flight += 1
+            self.admitted += 1
+            self.waited += 1
+            return True
+
+    def release(self) -> None:
+        """Give back a slot taken by acquire()."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify()
+
+    def stats(self) -> Dict:
+        with self._condition:
+            return super().stats()
+
+
+class AsyncConcurrencyLimiter(_LimiterStats):
+    """
+    ConcurrencyLimiter for requests served on one event loop.
+    Waiting requests are admitted in arrival order.
+    """
+
+    def __init__(self, name: str, max_in_flight: int = MAX_CONCURRENT_QUERIES,
+                 max_queued: int = MAX_QUEUED_QUERIES, queue_timeout: float = QUERY_QUEUE_TIMEOUT):
+        super().__init__(name, max_in_flight, max_queued, queue_timeout)
+        self._waiters: collections.deque = collections.deque()
+
+    async def acquire(self) -> bool:
+        """Async version of ConcurrencyLimiter.acquire."""
+        # Drop waiters that gave up, so they do not hold back new requests
+        while self._waiters and self._waiters[0].done():
+            self._waiters.popleft()
+        if self._has_slot() and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if self.queued >= self.max_queued:
+            self.rejected_queue_full += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done():
+                waiter.cancel()
+                self.rejected_timeout += 1
+                return False
+        except asyncio.CancelledError:
+            # The slot may already have been handed over: pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            self.queued -= 1
+        # release() handed its slot over without decrementing in_flight
+        self.admitted += 1
+        self.waited += 1
+        return True
+
+    def release(self) -> None:
+        """Give back a slot, handing it to the longest-waiting request if there is one."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
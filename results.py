@@ -0,0 +1,184 @@
+"""
+Result records for the multi-agent tourism system.
+The agents return these typed records and the parent agent combines them; text
+is only produced at the edge (the text API, the CLI), and the structured API
+returns the records as JSON.
+"""
+from typing import Dict, NamedTuple, Optional, Tuple
+
+
+class Location(NamedTuple):
+    """A geocoded place."""
+    place_name: str
+    display_name: str
+    lat: float
+    lon: float
+
+    def to_dict(self) -> Dict:
+        return self._asdict()
+
+
+class Message(NamedTuple):
+    """A response that is not an agent's answer (e.g. the place is unknown)."""
+    text: str
+
+    def to_dict(self) -> Dict:
+        return self._asdict()
+
+
+class WeatherReport(NamedTuple):
+    """
+    The Weather Agent's answer: current conditions, or why there are none.
+
+    `age` is how many seconds old the conditions were when served. `error` holds the
+    answer text when an upstream call failed.
+    """
+    place_name: str
+    temperature: Optional[float] = None
+    precipitation_probability: Optional[float] = None
+    age: float = 0.0
+    error: Optional[str] = None
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Whether the report has current conditions."""
+        return self.error is None and not self.timed_out and self.temperature is not None
+
+    @property
+    def text(self) -> str:
+        """The answer as text."""
+        if self.timed_out:
+            return f"Weather information for {self.place_name} is taking too long, please try again later."
+        if self.error is not None:
+            return self.error
+        if self.temperature is None:
+            return f"Could not fetch weather data for {self.place_name}"
+
+        text = (f"In {self.place_name} it's currently {int(self.temperature)}°C "
+                f"with a chance of {int(self.precipitation_probability or 0)}% to rain.")
+        minutes_old = int(self.age // 60)
+        if minutes_old >= 1:
+            text += f" (Conditions as of {minutes_old} min ago.)"
+        return text
+
+    def to_dict(self) -> Dict:
+        return dict(self._asdict(), text=self.text)
+
+
+class Attraction(NamedTuple):
+    """A place to visit. Famous places found by name have no coordinates or category."""
+    name: str
+    lat: Optional[float] = None
+    lon: Optional[float] = None
+    category: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return self._asdict()
+
+
+class PlacesReport(NamedTuple):
+    """The Places Agent's answer: up to MAX_PLACES attractions, or why there are none."""
+    place_name: str
+    attractions: Tuple[Attraction, ...] = ()
+    error: Optional[str] = None
+    timed_out: bool = False
+
+    @property
+    def ok(self) -> bool:
+        """Whether the search ran (it may still have found nothing)."""
+        return self.error is None and not self.timed_out
+
+    @property
+    def names(self) -> Tuple[str, ...]:
+        return tuple(attraction.name for attraction in self.attractions)
+
+    @property
+    def text(self) -> str:
+        """The answer as text."""
+        if self.timed_out:
+            return f"Tourist attractions for {self.place_name} are taking too long, please try again later."
+        if self.error is not None:
+            return self.error
+        if self.attractions:
+            places_list = "\n".join(self.names)
+            return f"In {self.place_name} these are the places you can go,\n\n{places_list}"
+        return (f"Could not find specific tourist attractions for {self.place_name}. The place might exist, "
+                "but no tourist attractions were found in the area.")
+
+    def to_dict(self) -> Dict:
+        return {
+            "place_name": self.place_name,
+            "attractions": [attraction.to_dict() for attraction in self.attractions],
+            "error": self.error,
+            "timed_out": self.timed_out,
+            "text": self.text
+        }
+
+
+class TourismResponse(NamedTuple):
+    """
+    The parent agent's response to a query: the place and the answers of the
+    agents that ran, or a message when there is nothing to answer.
+    """
+    place: Optional[Location] = None
+    weather: Optional[WeatherReport] = None
+    places: Optional[PlacesReport] = None
+    message: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        """Whether every agent that ran answered (no unknown place, error or timeout)."""
+        if self.message is not None:
+            return False
+        return all(report.ok for report in (self.weather, self.places) if report is not None)
+
+    @property
+    def text(self) -> str:
+        """The response as text."""
+        if self.message is not None:
+            return self.message
+        if self.weather is not None and self.places is not None:
+            if self.places.ok and self.places.attractions:
+                places_list = "\n".join(self.places.names)
+                return f"{self.weather.text} And these are the places you can go:\n{places_list}"
+            return f"{self.weather.text} {self.places.text}"
+        report = self.weather or self.places
+        return report.text if report is not None else ""
+
+    def to_dict(self) -> Dict:
+        """The response as JSON-serialisable data, with the text under "response"."""
+        return {
+            "response": self.text,
+            "place": self.place.to_dict() if self.place else None,
+            "weather": self.weather.to_dict() if self.weather else None,
+            "places": self.places.to_dict() if self.places else None,
+            "message": self.message
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, elapsed: float = 0.0) -> "TourismResponse":
+        """
+        Rebuild a response from to_dict() output (e.g. from the response cache).
+
+        Args:
+            data: Output of to_dict()
+            elapsed: Seconds since the data was produced, added to the weather's age
+                so a cached response says how old its conditions are now
+        """
+        weather = data.get("weather")
+        if weather:
+            weather = {k: v for k, v in weather.items() if k != "text"}
+            weather["age"] = weather.get("age", 0.0) + elapsed
+        places = data.get("places")
+        return cls(
+            place=Location(**data["place"]) if data.get("place") else None,
+            weather=WeatherReport(**weather) if weather else None,
+            places=PlacesReport(
+                place_name=places["place_name"],
+                attractions=tuple(Attraction(**a) for a in places["attractions"]),
+                error=places["error"],
+                timed_out=places["timed_out"]
+            ) if places else None,
+            message=data.get("message")
+        )
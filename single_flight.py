@@ -0,0 +1,183 @@
+"""
+Single-flight coalescing of identical upstream lookups.
+When many callers miss the cache for the same key at the same time, only the
+first one (the leader) calls the upstream API; the others wait for its result.
+Works across threads (sync tools) and asyncio tasks (async tools), and a caller
+of either kind can wait on a lookup started by the other.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from resilience import DeadlineExceeded, remaining_time
+
+
+class _LeaderOutOfTime(Exception):
+    """The leader's own deadline ran out; its followers must look the key up themselves."""
+
+    def __init__(self, error: DeadlineExceeded):
+        super().__init__(str(error))
+        self.error = error
+
+
+class SingleFlight:
+    """
+    Registry of in-flight calls, keyed by what they look up.
+
+    Results and exceptions of the leader's call are shared with every caller that
+    joined while it was running, except DeadlineExceeded: the leader's budget is not
+    its followers', so they retry, one of them becoming the new leader. Nothing is
+    kept once the call finishes; caching the result is left to the called function.
+    """
+
+    def __init__(self, name: str):
+        """
+        Initialize the registry.
+
+        Args:
+            name: Name used in stats()
+        """
+        self.name = name
+        self._lock = threading.Lock()
+        # key -> (shared future, ident of the leader's thread)
+        self._calls: Dict[Hashable, Tuple[Future, int]] = {}
+        self.leaders = 0
+        self.shared = 0
+
+    def _join(self, key: Hashable, blocking: bool) -> Tuple[Future, bool]:
+        """
+        Join the in-flight call for `key`, or register a new one.
+
+        Args:
+            key: What the call looks up
+            blocking: True if the caller will block its thread waiting for the result
+
+        Returns:
+            (shared future, True if the caller is the leader and must run the call)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            # A thread cannot block on itself: an async leader running on this
+            # thread's event loop would never get to finish
+            if call is not None and not (blocking and call[1] == threading.get_ident()):
+                self.shared += 1
+                return call[0], False
+            future: Future = Future()
+            if call is None:
+                self._calls[key] = (future, threading.get_ident())
+            self.leaders += 1
+            return future, True
+
+    def _finish(self, key: Hashable, future: Future) -> None:
+        """Unregister the call for `key` if `future` is the one registered."""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call[0] is future:
+                del self._calls[key]
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args) -> Any:
+        """
+        Call `fn(*args)`, or wait for the identical call already in flight.
+
+        Args:
+            key: What the call looks up (e.g. a normalized query or rounded coordinates)
+            fn: Function doing the lookup
+            *args: Arguments for fn
+
+        Returns:
+            The leader's result (exceptions other than DeadlineExceeded are raised to
+            every caller)
+
+        Raises:
+            DeadlineExceeded: If the caller's own deadline passes
+        """
+        while True:
+            future, leader = self._join(key, blocking=True)
+            if leader:
+                break
+            try:
+                return future.result(timeout=remaining_time())
+            except FutureTimeoutError:
+                raise DeadlineExceeded("Request deadline exceeded") from None
+            except _LeaderOutOfTime:
+                continue
+
+        # Unregister before settling, so followers that retry do not rejoin this call
+        try:
+            result = fn(*args)
+        except DeadlineExceeded as e:
+            self._finish(key, future)
+            future.set_exception(_LeaderOutOfTime(e))
+            raise
+        except BaseException as e:
+            self._finish(key, future)
+            future.set_exception(e)
+            raise
+        else:
+            self._finish(key, future)
+            future.set_result(result)
+            return result
+
+    async def ado(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args) -> Any:
+        """
+        Async version of do: await `fn(*args)`, or wait for the identical call in flight.
+
+        The leader's coroutine runs as its own task, so a caller that is cancelled
+        (e.g. by an agent timeout) does not cancel the lookup the others are waiting on.
+
+        Args:
+            key: What the call looks up
+            fn: Coroutine function doing the lookup
+            *args: Arguments for fn
+
+        Returns:
+            The leader's result (exceptions other than DeadlineExceeded are raised to
+            every caller)
+        """
+        while True:
+            future, leader = self._join(key, blocking=False)
+            if leader:
+                task = asyncio.get_running_loop().create_task(fn(*args))
+                task.add_done_callback(lambda done, future=future: self._settle(key, future, done))
+            waiter = asyncio.wrap_future(future)
+            # If this caller is cancelled, nobody awaits the waiter; consume its
+            # outcome so a failed lookup is not reported as a never-retrieved exception
+            waiter.add_done_callback(lambda done: done.cancelled() or done.exception())
+            try:
+                return await asyncio.wait_for(asyncio.shield(waiter), timeout=remaining_time())
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("Request deadline exceeded") from None
+            except _LeaderOutOfTime as e:
+                if leader:
+                    raise e.error from None
+
+    def _settle(self, key: Hashable, future: Future, task: "asyncio.Task") -> None:
+        """Pass the result of a finished leader task on to the shared future."""
+        self._finish(key, future)
+        if task.cancelled():
+            future.cancel()
+        elif isinstance(task.exception(), DeadlineExceeded):
+            future.set_exception(_LeaderOutOfTime(task.exception()))
+        elif task.exception() is not None:
+            future.set_exception(task.exception())
+        else:
+            future.set_result(task.result())
+
+    def stats(self) -> Dict:
+        """
+        Coalescing statistics.
+
+        Returns:
+            Dictionary with name, in_flight, leaders (upstream calls made) and
+            shared (callers that waited on another caller's lookup)
+        """
+        with self._lock:
+            in_flight = len(self._calls)
+        return {
+            "name": self.name,
+            "in_flight": in_flight,
+            "leaders": self.leaders,
+            "shared": self.shared
+        }
@@ -64,6 +64,12 @@ async function processQuery() {
     // Show loading state
     setLoading(true);
     
+    // Stream partial results when the browser supports Server-Sent Events
+    if (window.EventSource) {
+        streamQuery(query);
+        return;
+    }
+    
     try {
         console.log('Sending request to /api/query');
         const response = await fetch('/api/query', {
@@ -91,6 +97,40 @@ async function processQuery() {
     }
 }
 
+// Stream a query, showing each agent's result as soon as it arrives
+function streamQuery(query) {
+    console.log('Opening stream /api/query/stream');
+    const source = new EventSource('/api/query/stream?query=' + encodeURIComponent(query));
+    const parts = [];
+    
+    const showPart = (e) => {
+        parts.push(JSON.parse(e.data).text);
+        showResponse(parts.join('\n\n'));
+    };
+    source.addEventListener('weather', showPart);
+    source.addEventListener('places', showPart);
+    
+    source.addEventListener('done', (e) => {
+        source.close();
+        const response = JSON.parse(e.data).response;
+        if (response) {
+            showResponse(response);
+        }
+        setLoading(false);
+    });
+    source.onerror = (e) => {
+        source.close();
+        // Server-sent 'error' events carry data; connection errors do not
+        if (e.data) {
+            showError(JSON.parse(e.data).error);
+        } else {
+            console.error('Stream error:', e);
+            showError('Network error: the connection to the server was lost');
+        }
+        setLoading(false);
+    };
+}
+
 // Show response
 function showResponse(response) {
     const section = document.getElementById('responseSection');
@@ -0,0 +1,93 @@
+"""
+Unit tests for the TTL cache (cache.py), in memory and with a SQLite store.
+No network access needed.
+"""
+import os
+import tempfile
+import time
+
+from cache import MISSING, TTLCache
+
+
+def test_get_set_and_expiry():
+    """Values are returned until their TTL passes; None can be cached."""
+    cache = TTLCache("test", ttl=60)
+    cache.set("paris", {"lat": 48.85, "lon": 2.35})
+    cache.set("nowhere", None)
+    cache.set("brief", 1, ttl=0.05)
+
+    assert cache.get("paris") == {"lat": 48.85, "lon": 2.35}
+    assert cache.get("nowhere") is None
+    assert cache.get("unknown") is MISSING
+    assert cache.get("unknown", default="?") == "?"
+    time.sleep(0.1)
+    assert cache.get("brief") is MISSING
+
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 3
+
+
+def test_lru_eviction():
+    """The least recently used entry is evicted once maxsize is reached."""
+    cache = TTLCache("test", maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is MISSING
+    assert cache.get("c") == 3
+
+
+def test_entry_age():
+    """lookup() returns the entry with the time it was stored."""
+    cache = TTLCache("test")
+    cache.set("berlin", "sunny")
+    entry = cache.lookup("berlin")
+    assert entry.value == "sunny"
+    assert 0 <= entry.age < 5
+    assert cache.lookup("rome") is None
+
+
+def test_disk_store_survives_restart():
+    """Entries written to the SQLite store are found by a new cache on the same file."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "test.sqlite")
+        cache = TTLCache("test", path=path)
+        assert cache.on_disk
+        cache.set("oslo", [59.91, 10.75])
+        cache.set("gone", 1, ttl=0.05)
+        cache.delete("missing")
+
+        reopened = TTLCache("test", path=path)
+        assert reopened.get("oslo") == [59.91, 10.75]
+        assert reopened.stats()["disk_hits"] == 1
+        time.sleep(0.1)
+        assert reopened.get("gone") is MISSING
+
+        reopened.delete("oslo")
+        assert TTLCache("test", path=path).get("oslo") is MISSING
+
+
+def test_clear_and_prune():
+    """clear() empties the cache; prune() drops expired rows from disk."""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TTLCache("test", path=os.path.join(directory, "test.sqlite"))
+        cache.set("keep", 1)
+        cache.set("old", 2, ttl=0.01)
+        time.sleep(0.05)
+        assert cache.prune() == 1
+        assert cache.get("keep") == 1
+
+        cache.clear()
+        assert cache.get("keep") is MISSING
+
+
+if __name__ == "__main__":
+    test_get_set_and_expiry()
+    test_lru_eviction()
+    test_entry_age()
+    test_disk_store_survives_restart()
+    test_clear_and_prune()
+    print("Cache tests passed")
@@ -0,0 +1,119 @@
+"""
+Equivalence test for the table-driven attraction classifier.
+Checks classifier.is_tourist_attraction against the if/elif chain it replaced,
+on randomly generated OpenStreetMap tags and names. No network access needed.
+"""
+import random
+
+from classifier import is_tourist_attraction
+
+# Values of every tag the rules look at, plus some that no rule accepts
+TAG_VALUES = {
+    "tourism": ["zoo", "gallery", "viewpoint", "theme_park", "attraction", "museum", "artwork",
+                "information", "hotel", "hostel", "apartment", "guest_house", "picnic_site", "yes"],
+    "historic": ["temple", "church", "mosque", "shrine", "monastery", "abbey", "cathedral", "basilica",
+                 "monument", "castle", "palace", "tower", "ruins", "tomb", "fort", "memorial",
+                 "archaeological_site", "wayside_cross", "yes"],
+    "leisure": ["nature_reserve", "beach_resort", "track", "adult_gaming_centre", "water_park",
+                "park", "stadium", "golf_course", "marina", "playground", "pitch"],
+    "amenity": ["arts_centre", "place_of_worship", "theatre", "cinema", "library", "planetarium",
+                "restaurant", "cafe", "fast_food", "pharmacy", "bank", "atm", "hospital", "clinic",
+                "school", "university", "parking"],
+    "natural": ["beach", "peak", "volcano", "hill", "wood", "water"],
+    "sport": ["hiking", "climbing", "paragliding", "rafting", "canoeing", "kayaking", "surfing",
+              "diving", "skydiving", "soccer", "tennis"],
+    "boundary": ["national_park", "administrative", "protected_area"],
+    "highway": ["primary", "secondary", "tertiary", "residential", "pedestrian", "living_street",
+                "footway", "motorway"],
+}
+
+NAME_WORDS = ["Lal", "Bagh", "Royal", "Palace", "Mall", "Store", "Lab", "Marina", "Inc", "Road",
+              "Hill", "St", "MG", "Fort", "Ltd", "Office", "Temple", "Beach", "Marketplace", "Dnase"]
+
+
+def baseline_is_tourist_attraction(name: str, tags: dict) -> bool:
+    """The classification of the original places_agent loop, kept verbatim as the reference."""
+    name = name.strip()
+    if not name:
+        return False
+
+    exclude_keywords = [
+        'store', 'shop', 'mall', 'market', 'company', 'corp', 'ltd', 'inc',
+        'dna', 'lab', 'laboratory', 'office', 'building', 'commercial',
+        'warehouse', 'factory', 'industrial', 'business', 'enterprise'
+    ]
+    name_lower = name.lower()
+    if any(keyword in name_lower for keyword in exclude_keywords):
+        return False
+
+    tourism_type = tags.get("tourism", "")
+    historic_type = tags.get("historic", "")
+    leisure_type = tags.get("leisure", "")
+    amenity_type = tags.get("amenity", "")
+    natural_type = tags.get("natural", "")
+    sport_type = tags.get("sport", "")
+    boundary_type = tags.get("boundary", "")
+    highway_type = tags.get("highway", "")
+
+    is_tourist_attraction = False
+    if tourism_type == "zoo":
+        is_tourist_attraction = True
+    elif tourism_type == "gallery" or amenity_type == "arts_centre":
+        is_tourist_attraction = True
+    elif leisure_type == "nature_reserve" or boundary_type == "national_park":
+        is_tourist_attraction = True
+    elif natural_type == "beach" or leisure_type == "beach_resort":
+        is_tourist_attraction = True
+    elif natural_type in ["peak", "volcano"] or sport_type == "hiking" or leisure_type == "track":
+        is_tourist_attraction = True
+    elif tourism_type == "viewpoint":
+        is_tourist_attraction = True
+    elif tourism_type == "theme_park" or leisure_type in ["adult_gaming_centre", "water_park"]:
+        is_tourist_attraction = True
+    elif sport_type in ["climbing", "paragliding", "rafting", "canoeing", "kayaking", "surfing", "diving", "skydiving"]:
+        is_tourist_attraction = True
+    elif amenity_type == "place_of_worship":
+        is_tourist_attraction = True
+    elif historic_type in ["temple", "church", "mosque", "shrine", "monastery", "abbey", "cathedral", "basilica"]:
+        is_tourist_attraction = True
+    elif highway_type and name and len(name) > 5:
+        if historic_type or tourism_type or highway_type in ["primary", "secondary", "tertiary", "pedestrian"]:
+            is_tourist_attraction = True
+    elif tourism_type in ["attraction", "museum", "artwork"]:
+        is_tourist_attraction = True
+    elif historic_type in ["monument", "castle", "palace", "tower", "ruins", "tomb", "fort", "memorial", "archaeological_site"]:
+        is_tourist_attraction = True
+    elif leisure_type in ["park", "stadium", "golf_course", "marina"]:
+        is_tourist_attraction = True
+    elif amenity_type in ["theatre", "cinema", "library", "planetarium"]:
+        is_tourist_attraction = True
+
+    excluded_tourism_types = ['information', 'hotel', 'hostel', 'apartment', 'guest_house']
+    if tourism_type in excluded_tourism_types:
+        return False
+
+    return is_tourist_attraction
+
+
+def random_element(rng: random.Random):
+    """A random (name, tags) pair drawing on the values the rules look at."""
+    tags = {}
+    for key, values in TAG_VALUES.items():
+        if rng.random() < 0.3:
+            tags[key] = rng.choice(values)
+    name = " ".join(rng.choice(NAME_WORDS) for _ in range(rng.randint(0, 3)))
+    return name, tags
+
+
+def test_classifier_matches_baseline():
+    """The classifier agrees with the original if/elif chain on random elements."""
+    rng = random.Random(8)
+    for _ in range(50000):
+        name, tags = random_element(rng)
+        expected = baseline_is_tourist_attraction(name, tags)
+        assert is_tourist_attraction(name.strip(), tags) == expected, (name, tags)
+
+
+if __name__ == "__main__":
+    test_classifier_matches_baseline()
+    print("Classifier matches the baseline")
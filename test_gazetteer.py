@@ -0,0 +1,89 @@
+"""
+Unit tests for the built-in gazetteer (gazetteer.py) and the order in which
+tools.get_coordinates consults it and Nominatim. No network access needed.
+"""
+import os
+import tempfile
+
+import tools
+from gazetteer import Gazetteer, lookup_place, normalize_name
+
+TABLE = (
+    "# name\tcountry\tlat\tlon\tpopulation\taliases\n"
+    "Bengaluru\tIndia\t12.9716\t77.5946\t8443675\tBangalore,Bengalooru\n"
+    "Hamburg\tGermany\t53.5511\t9.9937\t1841179\t\n"
+    "São Paulo\tBrazil\t-23.5505\t-46.6333\t12325232\t\n"
+    "Paris\tUnited States\t33.6609\t-95.5555\t24782\t\n"
+    "Paris\tFrance\t48.8566\t2.3522\t2138551\t\n"
+)
+
+
+def load_table() -> Gazetteer:
+    """A gazetteer loaded from the small test table."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "gazetteer.tsv")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(TABLE)
+        return Gazetteer(path)
+
+
+def test_normalize_name():
+    """Case, accents and punctuation do not matter."""
+    assert normalize_name("São Paulo") == "sao paulo"
+    assert normalize_name("  sao-paulo! ") == "sao paulo"
+
+
+def test_exact_and_alias_lookup():
+    """Names and aliases resolve to the same row; the more populous namesake wins."""
+    gazetteer = load_table()
+    assert len(gazetteer) == 5
+    bengaluru = gazetteer.lookup("bangalore")
+    assert bengaluru == gazetteer.lookup("Bengaluru")
+    assert bengaluru["display_name"] == "Bengaluru, India"
+    assert gazetteer.lookup("sao paulo")["lat"] == -23.5505
+    assert gazetteer.lookup("PARIS")["display_name"] == "Paris, France"
+    assert gazetteer.lookup("Atlantis") is None
+    assert gazetteer.lookup("") is None
+
+
+def test_fuzzy_lookup():
+    """Close misspellings match only when fuzzy, and short names never do."""
+    gazetteer = load_table()
+    assert gazetteer.lookup("Bangalor")["display_name"] == "Bengaluru, India"
+    assert gazetteer.lookup("Bangalor", fuzzy=False) is None
+    assert gazetteer.lookup("Pari") is None
+
+
+def test_bundled_table():
+    """The bundled table resolves the README's example city."""
+    assert lookup_place("Bangalore")["display_name"].startswith("Bengaluru")
+
+
+def test_nominatim_before_fuzzy_match():
+    """A real place that is a near-miss of a listed city goes to Nominatim, not the fuzzy match."""
+    original = tools._nominatim_lookup
+    asked = []
+
+    def fake_nominatim(place_name):
+        asked.append(place_name)
+        if place_name == "Homburg":
+            return {"lat": 49.32, "lon": 7.34, "display_name": "Homburg, Germany"}
+        return None
+
+    tools._nominatim_lookup = fake_nominatim
+    try:
+        assert tools.get_coordinates("Bangalore")["display_name"].startswith("Bengaluru")
+        assert tools.get_coordinates("Homburg")["display_name"] == "Homburg, Germany"
+        assert tools.get_coordinates("Bangalor")["display_name"].startswith("Bengaluru")
+    finally:
+        tools._nominatim_lookup = original
+    assert asked == ["Homburg", "Bangalor"]
+
+
+if __name__ == "__main__":
+    test_normalize_name()
+    test_exact_and_alias_lookup()
+    test_fuzzy_lookup()
+    test_bundled_table()
+    test_nominatim_before_fuzzy_match()
+    print("Gazetteer tests passed")
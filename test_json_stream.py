@@ -0,0 +1,81 @@
+"""
+Unit tests for the streaming JSON array parser (json_stream.py).
+No network access needed.
+"""
+import json
+
+from json_stream import ArrayStreamParser, iter_array_items
+
+BODY = json.dumps({
+    "version": 0.6,
+    "osm3s": {"copyright": "elements: [not this one]"},
+    "elements": [
+        {"type": "node", "id": 1, "tags": {"name": "Lalbagh", "note": "a ] and a \" in a string"}},
+        {"type": "way", "id": 2, "center": {"lat": 12.95, "lon": 77.58}, "tags": {"name": "Cubbon Park"}},
+        {"type": "node", "id": 3, "tags": {"name": "Nandi Hills नंदी"}},
+    ],
+    "remark": "trailing member"
+}).encode("utf-8")
+
+
+def chunked(data: bytes, size: int):
+    """Split data into chunks of `size` bytes (multi-byte characters get cut in two)."""
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def test_items_match_json_loads_for_any_chunking():
+    """Whatever the chunk size, the items are those of a plain json.loads."""
+    expected = json.loads(BODY)["elements"]
+    for size in (1, 2, 3, 7, 64, len(BODY)):
+        assert list(iter_array_items(chunked(BODY, size))) == expected, size
+
+
+def test_stops_reading_after_the_array():
+    """Chunks after the end of the array are not consumed."""
+    consumed = []
+
+    def chunks():
+        for chunk in chunked(BODY, 16) + [b"garbage that is never read"]:
+            consumed.append(chunk)
+            yield chunk
+
+    items = list(iter_array_items(chunks()))
+    assert len(items) == 3
+    assert b"garbage that is never read" not in consumed
+
+
+def test_early_close_stops_consuming():
+    """Closing the generator after the first item leaves the rest of the body unread."""
+    chunks = iter(chunked(BODY, 8))
+    items = iter_array_items(chunks)
+    assert next(items)["id"] == 1
+    items.close()
+    assert next(chunks, None) is not None
+
+
+def test_other_key_and_empty_array():
+    """Any array member can be extracted, including an empty one."""
+    body = b'{"elements": [1], "results": []}'
+    assert list(iter_array_items([body], key="results")) == []
+    parser = ArrayStreamParser("elements")
+    assert parser.feed(body) == [1] and parser.done
+
+
+def test_truncated_or_missing_array_raises():
+    """A body that ends early, or has no such array, raises ValueError."""
+    for body in (BODY[:len(BODY) // 2], b'{"remark": "runtime error"}'):
+        try:
+            list(iter_array_items(chunked(body, 10)))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"no ValueError for {body!r}")
+
+
+if __name__ == "__main__":
+    test_items_match_json_loads_for_any_chunking()
+    test_stops_reading_after_the_array()
+    test_early_close_stops_consuming()
+    test_other_key_and_empty_array()
+    test_truncated_or_missing_array_raises()
+    print("JSON stream tests passed")
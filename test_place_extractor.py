@@ -0,0 +1,100 @@
+"""
+Equivalence test for the compiled place extractor.
+Checks place_extractor.extract_place_name against the extractor it replaced
+(TourismAgent.extract_place_name), on the README examples and on randomly
+assembled queries. No network access needed.
+"""
+import random
+import re
+
+from place_extractor import extract_place_name
+
+EXAMPLES = [
+    "I'm going to go to Bangalore, let's plan my trip.",
+    "I'm going to go to Bangalore, what is the temperature there",
+    "I'm going to go to Bangalore, what is the temperature there? And what are the places I can visit?",
+    "I'm going to mysore, what can I see?",
+    "Plan a visit to the Taj Mahal",
+    "weather in new york?",
+    "Tell me about Udupi",
+    "",
+]
+
+QUERY_WORDS = [
+    "I'm", "going", "to", "go", "visit", "in", "from", "the", "a", "an", "what", "where", "when",
+    "how", "let's", "plan", "my", "trip", "is", "are", "there", "and", "weather", "temperature",
+    "places", "Mysore", "mysore", "Bangalore", "New", "York", "paris", "Udupi", "Lake", "Tahoe",
+    "it", "me", "planning", "letter", "intown", "tomorrow", "I",
+]
+PUNCTUATION = ["", "", "", ",", ".", "?", "!", ";"]
+
+
+def baseline_extract_place_name(user_input: str) -> str:
+    """The original TourismAgent.extract_place_name, kept verbatim as the reference."""
+    patterns = [
+        r"going to go to ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+        r"going to ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+        r"visit ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+        r"in ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+        r"to ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+        r"from ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",
+    ]
+
+    for pattern in patterns:
+        match = re.search(pattern, user_input, re.IGNORECASE)
+        if match:
+            place = match.group(1).strip()
+            place = re.sub(r'\s+(what|where|when|how|let|plan|trip|from|to|going|visit).*$', '', place, flags=re.IGNORECASE)
+            place = re.sub(r'^\s*(?:the|a|an)\s+', '', place, flags=re.IGNORECASE).strip()
+            place = ' '.join(word.capitalize() for word in place.split())
+            if place and len(place) > 2:
+                return place
+
+    words = user_input.split()
+    place_words = []
+    skip_words = {'i', 'i\'m', 'let\'s', 'let', 'going', 'to', 'go', 'visit', 'from', 'in', 'the', 'a', 'an', 'what', 'where', 'when', 'how', 'plan', 'trip', 'is', 'are', 'there', 'and', 'or', 'but'}
+
+    for i, w in enumerate(words):
+        w_clean = w.strip('.,!?;:').lower()
+        if w_clean in skip_words:
+            continue
+        if (w and w[0].isupper()) or (len(w_clean) > 3 and w_clean not in skip_words):
+            place_words.append(w.strip('.,!?;:'))
+            if i + 1 < len(words):
+                next_w = words[i + 1].strip('.,!?;:').lower()
+                if next_w not in skip_words and (len(next_w) > 2 or words[i + 1][0].isupper()):
+                    place_words.append(words[i + 1].strip('.,!?;:'))
+                    break
+
+    if place_words:
+        place = ' '.join(place_words)
+        place = ' '.join(word.capitalize() for word in place.split())
+        return place
+
+    return ""
+
+
+def random_query(rng: random.Random) -> str:
+    """A random query assembled from trigger phrases, place names and punctuation."""
+    words = [rng.choice(QUERY_WORDS) + rng.choice(PUNCTUATION) for _ in range(rng.randint(0, 12))]
+    return " ".join(words)
+
+
+def test_examples_match_baseline():
+    """The extractor agrees with the original on hand-written queries."""
+    for query in EXAMPLES:
+        assert extract_place_name(query) == baseline_extract_place_name(query), query
+
+
+def test_extractor_matches_baseline():
+    """The extractor agrees with the original on random queries."""
+    rng = random.Random(15)
+    for _ in range(20000):
+        query = random_query(rng)
+        assert extract_place_name(query) == baseline_extract_place_name(query), query
+
+
+if __name__ == "__main__":
+    test_examples_match_baseline()
+    test_extractor_matches_baseline()
+    print("Place extractor matches the baseline")
@@ -0,0 +1,174 @@
+"""
+Unit tests for deadlines, circuit breakers and concurrency limiters (resilience.py).
+No network access needed.
+"""
+import asyncio
+import threading
+import time
+
+from resilience import (AsyncConcurrencyLimiter, CircuitBreaker, CircuitOpenError,
+                        ConcurrencyLimiter, Deadline, DeadlineExceeded, budget_timeout,
+                        remaining_time)
+
+
+def test_deadline_limits_timeouts():
+    """Inside a deadline, timeouts are capped by the time left; outside they are unchanged."""
+    assert remaining_time() is None
+    assert budget_timeout(10) == 10
+
+    def inside():
+        assert 0 < remaining_time() <= 1
+        assert budget_timeout(10) <= 1
+        assert budget_timeout(0.01) == 0.01
+        return "done"
+
+    assert Deadline(1).run(inside) == "done"
+    assert remaining_time() is None
+
+
+def test_expired_deadline_raises():
+    """Once the budget is spent, budget_timeout() raises DeadlineExceeded."""
+    def inside():
+        time.sleep(0.06)
+        budget_timeout(10)
+
+    try:
+        Deadline(0.05).run(inside)
+    except DeadlineExceeded:
+        pass
+    else:
+        raise AssertionError("no DeadlineExceeded")
+
+
+def test_breaker_opens_after_threshold():
+    """Consecutive failures open the breaker; calls are then rejected without trying."""
+    breaker = CircuitBreaker("upstream", failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("no CircuitOpenError")
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_breaker_half_open_trial():
+    """After reset_timeout one trial call goes through; its outcome closes or reopens the breaker."""
+    breaker = CircuitBreaker("upstream", failure_threshold=1, reset_timeout=0.05)
+    breaker.before_call()
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.state == "half-open"
+
+    breaker.before_call()
+    try:
+        breaker.before_call()
+    except CircuitOpenError:
+        pass
+    else:
+        raise AssertionError("second trial let through")
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    time.sleep(0.06)
+    breaker.before_call()
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_breaker_release_ends_trial():
+    """A trial that ends without a verdict (e.g. cancelled) lets the next trial through."""
+    breaker = CircuitBreaker("upstream", failure_threshold=1, reset_timeout=0.01)
+    breaker.before_call()
+    breaker.record_failure()
+    time.sleep(0.02)
+    breaker.before_call()
+    breaker.release()
+    breaker.release()
+    breaker.before_call()
+    assert breaker.state == "half-open"
+
+
+def test_limiter_queues_then_sheds():
+    """Beyond max_in_flight requests wait; beyond max_queued, or after queue_timeout, they are shed."""
+    limiter = ConcurrencyLimiter("test", max_in_flight=1, max_queued=1, queue_timeout=0.1)
+    assert limiter.acquire()
+
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+    waiter.start()
+    time.sleep(0.02)
+    assert not limiter.acquire()
+    waiter.join()
+    assert results == [False]
+
+    stats = limiter.stats()
+    assert stats["rejected_queue_full"] == 1 and stats["rejected_timeout"] == 1
+    limiter.release()
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_limiter_hands_over_released_slot():
+    """A waiting request is admitted when a slot is released."""
+    limiter = ConcurrencyLimiter("test", max_in_flight=1, max_queued=1, queue_timeout=5)
+    assert limiter.acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+    waiter.start()
+    time.sleep(0.02)
+    limiter.release()
+    waiter.join()
+    assert results == [True]
+    assert limiter.stats()["waited"] == 1 and limiter.in_flight == 1
+
+
+def test_unlimited_limiter():
+    """max_in_flight=0 admits everything."""
+    limiter = ConcurrencyLimiter("test", max_in_flight=0, max_queued=0)
+    assert all(limiter.acquire() for _ in range(100))
+
+
+def test_async_limiter_admits_in_order():
+    """The async limiter hands slots to waiters in arrival order and sheds when its queue is full."""
+    async def main():
+        limiter = AsyncConcurrencyLimiter("test", max_in_flight=1, max_queued=2, queue_timeout=0.2)
+        order = []
+
+        async def request(name, hold):
+            if not await limiter.acquire():
+                order.append(f"{name} shed")
+                return
+            order.append(name)
+            await asyncio.sleep(hold)
+            limiter.release()
+
+        await asyncio.gather(request("a", 0.05), request("b", 0.05), request("c", 0.3), request("d", 0))
+        return order, limiter.stats()
+
+    order, stats = asyncio.run(main())
+    assert order == ["a", "d shed", "b", "c"]
+    assert stats["in_flight"] == 0 and stats["rejected_queue_full"] == 1
+
+
+if __name__ == "__main__":
+    test_deadline_limits_timeouts()
+    test_expired_deadline_raises()
+    test_breaker_opens_after_threshold()
+    test_breaker_half_open_trial()
+    test_breaker_release_ends_trial()
+    test_limiter_queues_then_sheds()
+    test_limiter_hands_over_released_slot()
+    test_unlimited_limiter()
+    test_async_limiter_admits_in_order()
+    print("Resilience tests passed")
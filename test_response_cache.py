@@ -0,0 +1,106 @@
+"""
+Unit tests for the whole-response cache with stale-while-revalidate
+(TourismAgent.result_for_place and aresult_for_place). The agents are replaced
+by a stub, so no network access is needed.
+"""
+import asyncio
+import threading
+import time
+
+import tourism_agent
+from results import Location, TourismResponse, WeatherReport
+from tourism_agent import BOTH_AGENTS, TourismAgent
+
+PLACE = "Response Cache Testville"
+
+
+def weather_response(temperature: float) -> TourismResponse:
+    """A complete response whose weather report has the given temperature."""
+    return TourismResponse(
+        place=Location(PLACE, f"{PLACE}, Nowhere", 1.0, 2.0),
+        weather=WeatherReport(PLACE, temperature=temperature, precipitation_probability=0)
+    )
+
+
+class StubAgent(TourismAgent):
+    """TourismAgent whose answers are computed by a counter instead of the agents."""
+
+    def __init__(self):
+        super().__init__()
+        self.computed = 0
+        self.release = threading.Event()
+
+    def _compute_answer(self, place_name, agents):
+        self.computed += 1
+        self.release.wait(5)
+        return weather_response(20.0 + self.computed)
+
+    async def _acompute_answer(self, place_name, agents):
+        self.computed += 1
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+        return weather_response(20.0 + self.computed)
+
+
+def serve_stale(agent: TourismAgent) -> str:
+    """Cache an answer for PLACE and let it go stale; returns its cache key."""
+    key = agent._response_key(PLACE, BOTH_AGENTS)
+    tourism_agent.response_cache.set(key, weather_response(10.0).to_dict())
+    time.sleep(0.1)
+    return key
+
+
+def test_stale_response_served_and_refreshed_once():
+    """Concurrent requests for a stale answer get it at once; one background refresh replaces it."""
+    original_ttl = tourism_agent.RESPONSE_CACHE_TTL
+    tourism_agent.RESPONSE_CACHE_TTL = 0.05
+    agent = StubAgent()
+    key = serve_stale(agent)
+    try:
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(agent.result_for_place(PLACE)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        assert [response.weather.temperature for response in results] == [10.0] * 8
+        assert all(response.weather.age >= 0.1 for response in results)
+        agent.release.set()
+        agent.refresh_executor.shutdown(wait=True)
+        assert agent.computed == 1
+        assert tourism_agent.response_cache.get(key)["weather"]["temperature"] == 21.0
+    finally:
+        tourism_agent.RESPONSE_CACHE_TTL = original_ttl
+        tourism_agent.response_cache.delete(key)
+
+
+def test_async_stale_response_refreshed_once():
+    """The async path also serves the stale answer and runs a single refresh task."""
+    original_ttl = tourism_agent.RESPONSE_CACHE_TTL
+    tourism_agent.RESPONSE_CACHE_TTL = 0.05
+    agent = StubAgent()
+    key = serve_stale(agent)
+
+    async def main():
+        results = await asyncio.gather(*(agent.aresult_for_place(PLACE) for _ in range(8)))
+        agent.release.set()
+        while agent._refresh_tasks:
+            await asyncio.sleep(0.01)
+        return results
+
+    try:
+        results = asyncio.run(main())
+        assert [response.weather.temperature for response in results] == [10.0] * 8
+        assert agent.computed == 1
+        assert tourism_agent.response_cache.get(key)["weather"]["temperature"] == 21.0
+    finally:
+        tourism_agent.RESPONSE_CACHE_TTL = original_ttl
+        tourism_agent.response_cache.delete(key)
+
+
+if __name__ == "__main__":
+    test_stale_response_served_and_refreshed_once()
+    test_async_stale_response_refreshed_once()
+    print("Response cache tests passed")
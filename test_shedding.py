@@ -0,0 +1,95 @@
+"""
+HTTP-level tests for load shedding on the query endpoints of the Flask app
+(app.py) and the ASGI app (asgi.py): with every query slot taken a request gets
+503 with Retry-After, and an admitted request gives its slot back once its
+response is sent. The agent is replaced by a stub, so no network access is needed.
+"""
+import asyncio
+
+import httpx
+
+import app as flask_app
+import asgi
+from resilience import OVERLOAD_RETRY_AFTER
+from results import Location, TourismResponse
+from web import OVERLOADED_MESSAGE
+
+QUERY = {"query": "I'm going to Paris"}
+
+
+def stub_result(limiter):
+    """An answer that records how many slots were taken while it was computed."""
+    stub_result.in_flight = limiter.in_flight
+    return TourismResponse(message="stub answer", place=Location("Paris", "Paris, France", 48.86, 2.35))
+
+
+def limit_to_one_slot(limiter):
+    """Shrink a limiter to one slot and no queue; returns the settings to restore."""
+    saved = (limiter.max_in_flight, limiter.max_queued)
+    limiter.max_in_flight, limiter.max_queued = 1, 0
+    return saved
+
+
+def test_flask_sheds_when_full():
+    """Flask: 503 + Retry-After while the slot is taken; the slot is released after each response."""
+    limiter = flask_app.query_limiter
+    saved = limit_to_one_slot(limiter)
+    flask_app.agent.process_query_result = lambda query: stub_result(limiter)
+    client = flask_app.app.test_client()
+    try:
+        assert limiter.acquire()
+        response = client.post("/api/query", json=QUERY)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(OVERLOAD_RETRY_AFTER)
+        assert response.get_json() == {"success": False, "error": OVERLOADED_MESSAGE}
+        assert limiter.in_flight == 1
+        limiter.release()
+
+        response = client.post("/api/query", json=QUERY)
+        assert response.status_code == 200
+        assert stub_result.in_flight == 1
+        assert limiter.in_flight == 0
+        assert client.get("/api/health").status_code == 200
+    finally:
+        del flask_app.agent.process_query_result
+        limiter.max_in_flight, limiter.max_queued = saved
+    assert limiter.stats()["rejected_queue_full"] >= 1
+
+
+def test_asgi_sheds_when_full():
+    """ASGI: same contract as the Flask app."""
+    limiter = asgi.query_limiter
+    saved = limit_to_one_slot(limiter)
+
+    async def aresult(query):
+        return stub_result(limiter)
+
+    asgi.agent.aprocess_query_result = aresult
+
+    async def main():
+        transport = httpx.ASGITransport(app=asgi.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            assert await limiter.acquire()
+            response = await client.post("/api/query", json=QUERY)
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == str(OVERLOAD_RETRY_AFTER)
+            assert response.json() == {"success": False, "error": OVERLOADED_MESSAGE}
+            assert limiter.in_flight == 1
+            limiter.release()
+
+            response = await client.post("/api/query", json=QUERY)
+            assert response.status_code == 200
+            assert stub_result.in_flight == 1
+            assert limiter.in_flight == 0
+
+    try:
+        asyncio.run(main())
+    finally:
+        del asgi.agent.aprocess_query_result
+        limiter.max_in_flight, limiter.max_queued = saved
+
+
+if __name__ == "__main__":
+    test_flask_sheds_when_full()
+    test_asgi_sheds_when_full()
+    print("Shedding tests passed")
@@ -0,0 +1,170 @@
+"""
+Unit tests for single-flight request coalescing (single_flight.py), across
+threads and asyncio tasks. No network access needed.
+"""
+import asyncio
+import threading
+import time
+
+import async_tools
+import tools
+from resilience import Deadline, DeadlineExceeded, check_deadline
+from single_flight import SingleFlight
+
+
+def test_concurrent_threads_share_one_call():
+    """Threads asking for the same key at once trigger one call and all get its result."""
+    flight = SingleFlight("test")
+    calls = []
+
+    def lookup(key):
+        calls.append(key)
+        time.sleep(0.2)
+        return key.upper()
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("paris", lookup, "paris")))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == ["paris"]
+    assert results == ["PARIS"] * 8
+    assert flight.stats() == {"name": "test", "in_flight": 0, "leaders": 1, "shared": 7}
+
+
+def test_errors_are_shared_and_not_kept():
+    """The leader's exception reaches every caller; the next call runs again."""
+    flight = SingleFlight("test")
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.2)
+        raise ValueError("upstream down")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("rome", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+
+    assert errors == ["upstream down"] * 2
+    assert flight.do("rome", lambda: "back") == "back"
+
+
+def test_follower_outlives_leader_deadline():
+    """A follower with more time looks the key up itself when the leader runs out of budget."""
+    flight = SingleFlight("test")
+    calls = []
+
+    def lookup():
+        calls.append(1)
+        time.sleep(0.2)
+        # Fails only for a caller whose budget is shorter than the lookup
+        check_deadline()
+        return "sunny"
+
+    outcome = {}
+
+    def leader():
+        try:
+            Deadline(0.1).run(flight.do, "oslo", lookup)
+        except DeadlineExceeded:
+            outcome["leader"] = "deadline"
+
+    leader_thread = threading.Thread(target=leader)
+    leader_thread.start()
+    time.sleep(0.05)
+    outcome["follower"] = flight.do("oslo", lookup)
+    leader_thread.join()
+
+    assert outcome == {"leader": "deadline", "follower": "sunny"}
+    assert len(calls) == 2
+
+
+def test_async_callers_share_one_call():
+    """Tasks asking for the same key at once await one coroutine."""
+    flight = SingleFlight("test")
+    calls = []
+
+    async def lookup(key):
+        calls.append(key)
+        await asyncio.sleep(0.1)
+        return len(key)
+
+    async def main():
+        return await asyncio.gather(*(flight.ado("berlin", lookup, "berlin") for _ in range(5)))
+
+    assert asyncio.run(main()) == [6] * 5
+    assert calls == ["berlin"]
+
+
+def test_cancelled_async_caller_does_not_cancel_lookup():
+    """Cancelling one waiting task leaves the shared lookup running for the others."""
+    flight = SingleFlight("test")
+
+    async def lookup():
+        await asyncio.sleep(0.2)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.ado("lima", lookup))
+        second = asyncio.ensure_future(flight.ado("lima", lookup))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_leader_rechecks_cache():
+    """A caller that becomes leader after the previous leader filled the cache does not fetch again."""
+    query = "single flight test place"
+    location = {"lat": 1.0, "lon": 2.0, "display_name": query, "class": "place", "type": "city"}
+    fetched = []
+    sync_fetch, async_fetch = tools._fetch_nominatim, async_tools._fetch_nominatim
+
+    def fake_fetch(query):
+        fetched.append(query)
+        return None
+
+    async def fake_async_fetch(query):
+        fetched.append(query)
+        return None
+
+    tools._fetch_nominatim, async_tools._fetch_nominatim = fake_fetch, fake_async_fetch
+    try:
+        # As if this caller missed the cache just before another leader stored the result
+        key = tools._normalize_query(query)
+        tools.geocode_cache.set(key, location)
+        assert tools.geocode_flight.do(key, tools._geocode_leader, query) == location
+        assert asyncio.run(tools.geocode_flight.ado(key, async_tools._geocode_leader, query)) == location
+        tools.geocode_cache.delete(key)
+        assert tools.geocode_flight.do(key, tools._geocode_leader, query) is None
+    finally:
+        tools._fetch_nominatim, async_tools._fetch_nominatim = sync_fetch, async_fetch
+        tools.geocode_cache.delete(tools._normalize_query(query))
+    assert fetched == [query]
+
+
+if __name__ == "__main__":
+    test_concurrent_threads_share_one_call()
+    test_errors_are_shared_and_not_kept()
+    test_follower_outlives_leader_deadline()
+    test_async_callers_share_one_call()
+    test_cancelled_async_caller_does_not_cancel_lookup()
+    test_leader_rechecks_cache()
+    print("Single-flight tests passed")
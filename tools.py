@@ -2,14 +2,227 @@
 Tools for the multi-agent tourism system.
 Contains Weather Agent and Places Agent tools.
 """
+import os
+import time
 import requests
-from typing import Optional, Dict, List
+from typing import Optional, Dict, Iterable, Iterator, List, Tuple
 import json
+import http_client
+import metrics
+import tracing
+from cache import TTLCache, MISSING, cache_path
+from geo import geohash_encode, geohash_neighbors, haversine_km
+from json_stream import iter_array_items
+from classifier import OVERPASS_FILTERS, classify
+from gazetteer import lookup_place
+from poi_index import get_poi_index
+from resilience import check_deadline
+from results import Attraction, PlacesReport, WeatherReport
+from single_flight import SingleFlight
 
 
+# Upstream endpoints (overridable for self-hosted instances or the offline benchmarks)
+NOMINATIM_URL = os.environ.get("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+OPEN_METEO_URL = os.environ.get("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+OVERPASS_URL = os.environ.get("OVERPASS_URL", "https://overpass-api.de/api/interpreter")
+metrics.name_upstream(NOMINATIM_URL, "nominatim")
+metrics.name_upstream(OPEN_METEO_URL, "open_meteo")
+metrics.name_upstream(OVERPASS_URL, "overpass")
+
+# Geocoding cache: Nominatim results change rarely, so hits are kept for a week.
+# Lookups that found nothing are kept for a shorter time in case of typos being fixed upstream.
+GEOCODE_CACHE_TTL = float(os.environ.get("GEOCODE_CACHE_TTL", 7 * 24 * 3600))
+GEOCODE_NEGATIVE_TTL = float(os.environ.get("GEOCODE_NEGATIVE_TTL", 3600))
+geocode_cache = TTLCache(
+    "geocode",
+    maxsize=int(os.environ.get("GEOCODE_CACHE_SIZE", 4096)),
+    ttl=GEOCODE_CACHE_TTL,
+    path=cache_path("geocode")
+)
+
+
+# Places search: 100km radius for major cities to catch places like Nandi Hills
+SEARCH_RADIUS = 100000
+MAX_PLACES = 20
+
+# Overpass result cache, tiled by the geohash of the search centre. A query whose
+# centre is within OVERPASS_CACHE_MAX_OFFSET_KM of a cached one (e.g. "Bengaluru" vs
+# "Bangalore") is answered from that cached result instead of a new Overpass call.
+OVERPASS_CACHE_TTL = float(os.environ.get("OVERPASS_CACHE_TTL", 24 * 3600))
+OVERPASS_CACHE_PRECISION = int(os.environ.get("OVERPASS_CACHE_PRECISION", 5))
+OVERPASS_CACHE_MAX_OFFSET_KM = float(os.environ.get("OVERPASS_CACHE_MAX_OFFSET_KM", 2.0))
+overpass_cache = TTLCache(
+    "overpass",
+    maxsize=int(os.environ.get("OVERPASS_CACHE_SIZE", 256)),
+    ttl=OVERPASS_CACHE_TTL,
+    path=cache_path("overpass")
+)
+
+# Overpass responses can be tens of megabytes; in streaming mode elements are classified
+# as they arrive and the download stops once OVERPASS_RESULT_LIMIT attractions are found.
+# The limit is kept above MAX_PLACES so the cached result can still serve nearby queries.
+OVERPASS_STREAMING = os.environ.get("OVERPASS_STREAMING", "1") == "1"
+OVERPASS_RESULT_LIMIT = int(os.environ.get("OVERPASS_RESULT_LIMIT", 100))
+
+# Weather cache keyed by a rounded lat/lon grid cell. Open-Meteo refreshes "current"
+# conditions every 15 minutes, so entries expire at the next update boundary.
+WEATHER_CELL_DEGREES = float(os.environ.get("WEATHER_CELL_DEGREES", 0.1))
+WEATHER_UPDATE_INTERVAL = int(os.environ.get("WEATHER_UPDATE_INTERVAL", 900))
+weather_cache = TTLCache(
+    "weather",
+    maxsize=int(os.environ.get("WEATHER_CACHE_SIZE", 2048)),
+    ttl=WEATHER_UPDATE_INTERVAL,
+    path=cache_path("weather")
+)
+
+# Concurrent cache misses for the same key (normalized query, weather grid cell or search
+# centre) wait on one in-flight upstream call instead of each sending their own
+geocode_flight = SingleFlight("geocode")
+weather_flight = SingleFlight("weather")
+overpass_flight = SingleFlight("overpass")
+
+metrics.register_caches(geocode_cache, weather_cache, overpass_cache)
+metrics.register_flights(geocode_flight, weather_flight, overpass_flight)
+
+# Map of cities to their famous places
+CITY_FAMOUS_PLACES = {
+    'bangalore': [
+        'Bannerghatta National Park',
+        'Vidhana Soudha',
+        'Tipu Sultan Palace',
+        'ISKCON Temple Bangalore',
+        'Nandi Hills',
+        'Lalbagh Botanical Garden',
+        'Cubbon Park',
+        'Bangalore Palace',
+        'Ulsoor Lake',
+        'Wonderla Bangalore',
+        'Innovative Film City',
+        'Bannerghatta Biological Park'
+    ],
+    'bengaluru': [
+        'Bannerghatta National Park',
+        'Vidhana Soudha',
+        'Tipu Sultan Palace',
+        'ISKCON Temple Bangalore',
+        'Nandi Hills',
+        'Lalbagh Botanical Garden',
+        'Cubbon Park',
+        'Bangalore Palace'
+    ],
+    'mysore': [
+        'Mysore Palace',
+        'Chamundi Hills',
+        'Brindavan Gardens',
+        'St. Philomena\'s Church',
+        'Jaganmohan Palace',
+        'Somnathpur Temple'
+    ],
+    'udupi': [
+        'Udupi Sri Krishna Temple',
+        'Malpe Beach',
+        'St. Mary\'s Island',
+        'Kaup Beach'
+    ]
+}
+
+# Where attractions come from: "overpass" (live public API) or "local" (offline index
+# built with `python poi_index.py build`, read from POI_INDEX_PATH)
+PLACES_BACKEND = os.environ.get("PLACES_BACKEND", "overpass")
+
+
+def _normalize_query(query: str) -> str:
+    """Normalize a free-text query so that trivially different spellings share a cache key."""
+    return " ".join(query.lower().split())
+
+
+@tracing.traced()
+def _nominatim_lookup(query: str) -> Optional[Dict]:
+    """
+    Look up the best Nominatim match for a query, going through the geocoding cache.
+    
+    Args:
+        query: Free-text search string
+        
+    Returns:
+        Dictionary with 'lat', 'lon', 'display_name', 'class' and 'type' keys,
+        or None if Nominatim has no match. Request errors are raised, not cached.
+    """
+    key = _normalize_query(query)
+    cached = geocode_cache.get(key)
+    if cached is not MISSING:
+        tracing.annotate(cache="hit")
+        return cached
+    
+    tracing.annotate(cache="miss")
+    # Concurrent misses for the same query share one Nominatim request
+    return geocode_flight.do(key, _geocode_leader, query)
+
+
+def _geocode_leader(query: str) -> Optional[Dict]:
+    """
+    Run by the single-flight leader of a geocode miss: answer from the cache if a
+    previous leader filled it since the caller's lookup, otherwise ask Nominatim.
+    """
+    cached = geocode_cache.get(_normalize_query(query), count=False)
+    if cached is not MISSING:
+        return cached
+    return _fetch_nominatim(query)
+
+
+@tracing.traced()
+def _fetch_nominatim(query: str) -> Optional[Dict]:
+    """Send a Nominatim search and cache its best match."""
+    response = http_client.get(NOMINATIM_URL, params=_nominatim_params(query), timeout=10)
+    response.raise_for_status()
+    
+    return _store_nominatim_result(query, response.json())
+
+
+def _nominatim_params(query: str) -> Dict:
+    """Query parameters for a Nominatim search returning the single best match."""
+    return {
+        "q": query,
+        "format": "json",
+        "limit": 1
+    }
+
+
+def _store_nominatim_result(query: str, data: List[Dict]) -> Optional[Dict]:
+    """
+    Extract the best match from a Nominatim response and cache it (or the lack of one).
+    
+    Args:
+        query: Free-text search string that was sent
+        data: Decoded Nominatim response
+        
+    Returns:
+        Dictionary with 'lat', 'lon', 'display_name', 'class' and 'type' keys, or None
+    """
+    key = _normalize_query(query)
+    if data and len(data) > 0:
+        location = data[0]
+        result = {
+            "lat": float(location["lat"]),
+            "lon": float(location["lon"]),
+            "display_name": location.get("display_name", query),
+            "class": location.get("class", ""),
+            "type": location.get("type", "")
+        }
+        geocode_cache.set(key, result)
+        return result
+    
+    geocode_cache.set(key, None, ttl=GEOCODE_NEGATIVE_TTL)
+    return None
+
+
+@tracing.traced()
 def get_coordinates(place_name: str) -> Optional[Dict[str, float]]:
     """
-    Get coordinates (latitude, longitude) for a place using Nominatim API.
+    Get coordinates (latitude, longitude) for a place.
+    Well-known cities are resolved from the built-in gazetteer; anything else uses
+    the Nominatim API, through the geocoding cache when available. Misspellings of
+    well-known cities are matched only if Nominatim finds nothing.
     
     Args:
         place_name: Name of the place
@@ -18,26 +231,13 @@ def get_coordinates(place_name: str) -> Optional[Dict[str, float]]:
         Dictionary with 'lat' and 'lon' keys, or None if place not found
     """
     try:
-        url = "https://nominatim.openstreetmap.org/search"
-        params = {
-            "q": place_name,
-            "format": "json",
-            "limit": 1
-        }
-        headers = {
-            "User-Agent": "Tourism-Agent/1.0"
-        }
-        
-        response = requests.get(url, params=params, headers=headers, timeout=10)
-        response.raise_for_status()
-        
-        data = response.json()
-        if data and len(data) > 0:
-            location = data[0]
+        location = (lookup_place(place_name, fuzzy=False) or _nominatim_lookup(place_name)
+                    or lookup_place(place_name))
+        if location:
             return {
-                "lat": float(location["lat"]),
-                "lon": float(location["lon"]),
-                "display_name": location.get("display_name", place_name)
+                "lat": location["lat"],
+                "lon": location["lon"],
+                "display_name": location["display_name"]
             }
         return None
     except Exception as e:
@@ -45,6 +245,7 @@ def get_coordinates(place_name: str) -> Optional[Dict[str, float]]:
         return None
 
 
+@tracing.traced()
 def weather_agent(place_name: str) -> str:
     """
     Weather Agent: Gets current weather and forecast for a place.
@@ -56,44 +257,180 @@ def weather_agent(place_name: str) -> str:
     Returns:
         Formatted weather information string
     """
-    try:
-        # First, get coordinates
-        coords = get_coordinates(place_name)
-        if not coords:
-            return f"I don't know if this place exists: {place_name}"
+    coords = get_coordinates(place_name)
+    if not coords:
+        return f"I don't know if this place exists: {place_name}"
+    return weather_agent_for_location(place_name, coords)
+
+
+def _weather_cell(lat: float, lon: float) -> Tuple[float, float]:
+    """Centre of the WEATHER_CELL_DEGREES grid cell containing a point."""
+    return (
+        round(round(lat / WEATHER_CELL_DEGREES) * WEATHER_CELL_DEGREES, 4),
+        round(round(lon / WEATHER_CELL_DEGREES) * WEATHER_CELL_DEGREES, 4)
+    )
+
+
+def _seconds_until_weather_update() -> float:
+    """Seconds until Open-Meteo's next scheduled update of "current" conditions."""
+    return WEATHER_UPDATE_INTERVAL - (time.time() % WEATHER_UPDATE_INTERVAL)
+
+
+@tracing.traced()
+def fetch_current_weather(lat: float, lon: float) -> Optional[Dict]:
+    """
+    Get current conditions from Open-Meteo, shared by every caller in the same grid cell.
+    
+    Args:
+        lat: Latitude of the place
+        lon: Longitude of the place
         
-        lat = coords["lat"]
-        lon = coords["lon"]
+    Returns:
+        Dictionary with 'temperature_2m', 'precipitation_probability' and 'age'
+        (seconds since the data was fetched), or None if Open-Meteo returned no
+        current conditions. Request errors are raised.
+    """
+    key, params = _weather_request(lat, lon)
+    
+    entry = weather_cache.lookup(key)
+    if entry is not None:
+        tracing.annotate(cache="hit")
+        return dict(entry.value, age=entry.age)
+    
+    tracing.annotate(cache="miss")
+    # Concurrent misses for the same grid cell share one Open-Meteo request
+    return weather_flight.do(key, _weather_leader, key, params)
+
+
+def _weather_leader(key: str, params: Dict) -> Optional[Dict]:
+    """Run by the single-flight leader of a weather miss: re-check the cache, then fetch."""
+    entry = weather_cache.lookup(key, count=False)
+    if entry is not None:
+        return dict(entry.value, age=entry.age)
+    return _fetch_weather(key, params)
+
+
+@tracing.traced()
+def _fetch_weather(key: str, params: Dict) -> Optional[Dict]:
+    """Get weather data from Open-Meteo and cache the current conditions of a grid cell."""
+    response = http_client.get(OPEN_METEO_URL, params=params, timeout=10)
+    response.raise_for_status()
+    
+    return _store_weather(key, response.json())
+
+
+def _weather_request(lat: float, lon: float) -> Tuple[str, Dict]:
+    """
+    Cache key and Open-Meteo query parameters for the grid cell containing a point.
+    
+    Returns:
+        Tuple of (cache key, query parameters)
+    """
+    cell_lat, cell_lon = _weather_cell(lat, lon)
+    params = {
+        "latitude": cell_lat,
+        "longitude": cell_lon,
+        "current": "temperature_2m,precipitation_probability",
+        "timezone": "auto"
+    }
+    return f"{cell_lat},{cell_lon}", params
+
+
+def _store_weather(key: str, data: Dict) -> Optional[Dict]:
+    """
+    Extract current conditions from an Open-Meteo response and cache them until the next update.
+    
+    Args:
+        key: Cache key from _weather_request
+        data: Decoded Open-Meteo response
         
-        # Get weather data from Open-Meteo
-        url = "https://api.open-meteo.com/v1/forecast"
-        params = {
-            "latitude": lat,
-            "longitude": lon,
-            "current": "temperature_2m,precipitation_probability",
-            "timezone": "auto"
-        }
+    Returns:
+        Current conditions with 'age' 0, or None if the response has none
+    """
+    if "current" not in data:
+        return None
+    
+    current = {
+        "temperature_2m": data["current"].get("temperature_2m", "N/A"),
+        "precipitation_probability": data["current"].get("precipitation_probability", 0)
+    }
+    weather_cache.set(key, current, ttl=_seconds_until_weather_update())
+    return dict(current, age=0.0)
+
+
+def weather_report(place_name: str, weather: Optional[Dict]) -> WeatherReport:
+    """
+    Build the Weather Agent's answer from current conditions.
+    
+    Args:
+        place_name: Name of the place
+        weather: Result of fetch_current_weather
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+    Returns:
+        WeatherReport (without temperature if there were no current conditions)
+    """
+    temperature = weather.get("temperature_2m") if weather else None
+    if not isinstance(temperature, (int, float)):
+        # No current conditions (or a cached "N/A" from a partial Open-Meteo response)
+        return WeatherReport(place_name)
+    return WeatherReport(
+        place_name,
+        temperature=temperature,
+        precipitation_probability=weather.get("precipitation_probability", 0),
+        age=weather["age"]
+    )
+
+
+def format_weather(place_name: str, weather: Optional[Dict]) -> str:
+    """
+    Format current conditions as the Weather Agent's answer.
+    
+    Args:
+        place_name: Name of the place
+        weather: Result of fetch_current_weather
         
-        data = response.json()
+    Returns:
+        Formatted weather information string
+    """
+    return weather_report(place_name, weather).text
+
+
+@tracing.traced()
+def weather_report_for_location(place_name: str, coords: Dict) -> WeatherReport:
+    """
+    Weather Agent entry point for a place that has already been geocoded.
+    
+    Args:
+        place_name: Name of the place (used in the response text)
+        coords: Location from get_coordinates with 'lat' and 'lon' keys
         
-        if "current" in data:
-            current = data["current"]
-            temp = current.get("temperature_2m", "N/A")
-            precip_prob = current.get("precipitation_probability", 0)
-            
-            return f"In {place_name} it's currently {int(temp)}°C with a chance of {int(precip_prob)}% to rain."
-        else:
-            return f"Could not fetch weather data for {place_name}"
-            
+    Returns:
+        WeatherReport, with the error message if the lookup failed
+    """
+    try:
+        weather = fetch_current_weather(coords["lat"], coords["lon"])
+        return weather_report(place_name, weather)
     except requests.exceptions.RequestException as e:
-        return f"Error fetching weather data: {str(e)}"
+        return WeatherReport(place_name, error=f"Error fetching weather data: {str(e)}")
     except Exception as e:
-        return f"Error in weather agent: {str(e)}"
+        return WeatherReport(place_name, error=f"Error in weather agent: {str(e)}")
+
+
+def weather_agent_for_location(place_name: str, coords: Dict) -> str:
+    """
+    Weather Agent entry point for a place that has already been geocoded, as text.
+    
+    Args:
+        place_name: Name of the place (used in the response text)
+        coords: Location from get_coordinates with 'lat' and 'lon' keys
+        
+    Returns:
+        Formatted weather information string
+    """
+    return weather_report_for_location(place_name, coords).text
 
 
+@tracing.traced()
 def search_famous_places_by_name(city_name: str) -> List[str]:
     """
     Search for famous tourist places by name using Nominatim API.
@@ -107,89 +444,59 @@ def search_famous_places_by_name(city_name: str) -> List[str]:
     """
     famous_places = []
     
-    # Map of cities to their famous places
-    city_famous_places = {
-        'bangalore': [
-            'Bannerghatta National Park',
-            'Vidhana Soudha',
-            'Tipu Sultan Palace',
-            'ISKCON Temple Bangalore',
-            'Nandi Hills',
-            'Lalbagh Botanical Garden',
-            'Cubbon Park',
-            'Bangalore Palace',
-            'Ulsoor Lake',
-            'Wonderla Bangalore',
-            'Innovative Film City',
-            'Bannerghatta Biological Park'
-        ],
-        'bengaluru': [
-            'Bannerghatta National Park',
-            'Vidhana Soudha',
-            'Tipu Sultan Palace',
-            'ISKCON Temple Bangalore',
-            'Nandi Hills',
-            'Lalbagh Botanical Garden',
-            'Cubbon Park',
-            'Bangalore Palace'
-        ],
-        'mysore': [
-            'Mysore Palace',
-            'Chamundi Hills',
-            'Brindavan Gardens',
-            'St. Philomena\'s Church',
-            'Jaganmohan Palace',
-            'Somnathpur Temple'
-        ],
-        'udupi': [
-            'Udupi Sri Krishna Temple',
-            'Malpe Beach',
-            'St. Mary\'s Island',
-            'Kaup Beach'
-        ]
-    }
-    
-    city_lower = city_name.lower()
-    
-    # Get famous places for this city
-    places_to_search = []
-    for key, places in city_famous_places.items():
-        if key in city_lower:
-            places_to_search = places
-            break
-    
     # Search for each famous place
-    for place in places_to_search:
+    for place in famous_places_to_search(city_name):
         try:
-            url = "https://nominatim.openstreetmap.org/search"
-            params = {
-                "q": f"{place}, {city_name}",
-                "format": "json",
-                "limit": 1
-            }
-            headers = {"User-Agent": "Tourism-Agent/1.0"}
-            
-            response = requests.get(url, params=params, headers=headers, timeout=10)
-            if response.status_code == 200:
-                data = response.json()
-                if data and len(data) > 0:
-                    result = data[0]
-                    # Check if it's a tourist attraction
-                    place_type = result.get('type', '')
-                    class_type = result.get('class', '')
-                    if any(tag in class_type for tag in ['tourism', 'historic', 'leisure', 'amenity']) or \
-                       any(tag in place_type for tag in ['tourism', 'historic', 'leisure', 'amenity']):
-                        display_name = result.get('display_name', '')
-                        # Extract just the place name
-                        name = display_name.split(',')[0].strip()
-                        if name:
-                            famous_places.append(name)
+            name = _famous_place_name(_nominatim_lookup(f"{place}, {city_name}"))
+            if name:
+                famous_places.append(name)
         except Exception as e:
             continue
     
     return famous_places
 
 
+def famous_places_to_search(city_name: str) -> List[str]:
+    """
+    Get the well-known places listed for a city in CITY_FAMOUS_PLACES.
+    
+    Args:
+        city_name: Name of the city
+        
+    Returns:
+        Names of famous places to look up (empty if the city is not listed)
+    """
+    city_lower = city_name.lower()
+    for key, places in CITY_FAMOUS_PLACES.items():
+        if key in city_lower:
+            return places
+    return []
+
+
+def _famous_place_name(result: Optional[Dict]) -> Optional[str]:
+    """
+    Get the short name of a famous-place Nominatim match, if it is a tourist attraction.
+    
+    Args:
+        result: Result of _nominatim_lookup
+        
+    Returns:
+        The place name, or None if there was no match or it is not an attraction
+    """
+    if not result:
+        return None
+    # Check if it's a tourist attraction
+    place_type = result.get('type', '')
+    class_type = result.get('class', '')
+    if any(tag in class_type for tag in ['tourism', 'historic', 'leisure', 'amenity']) or \
+       any(tag in place_type for tag in ['tourism', 'historic', 'leisure', 'amenity']):
+        display_name = result.get('display_name', '')
+        # Extract just the place name
+        return display_name.split(',')[0].strip() or None
+    return None
+
+
+@tracing.traced()
 def places_agent(place_name: str) -> str:
     """
     Places Agent: Gets tourist attractions for a place.
@@ -202,234 +509,379 @@ def places_agent(place_name: str) -> str:
     Returns:
         Formatted list of tourist attractions (up to 20)
     """
-    try:
-        # First, get coordinates
-        coords = get_coordinates(place_name)
-        if not coords:
-            return f"I don't know if this place exists: {place_name}"
-        
-        lat = coords["lat"]
-        lon = coords["lon"]
-        
-        # Search for famous places by name first
-        famous_places = search_famous_places_by_name(place_name)
-        
-        # Comprehensive Overpass API query for all tourist attraction types
-        # Increased radius to 100km for major cities to catch places like Nandi Hills
-        # Categories: National parks, Zoos, Art galleries, Beaches, Hiking, Famous streets, 
-        #            Adventure spots, Temples/Churches/Mosques, Viewpoints
-        search_radius = 100000  # 100km for comprehensive search
+    coords = get_coordinates(place_name)
+    if not coords:
+        return f"I don't know if this place exists: {place_name}"
+    return places_agent_for_location(place_name, coords)
+
+
+def _build_overpass_query(lat: float, lon: float, search_radius: int) -> str:
+    """
+    Build the Overpass QL query for all tourist attraction types around a point.
+    The element filters come from classifier.OVERPASS_FILTERS, which the offline POI
+    index applies as well.
+    
+    Args:
+        lat: Latitude of the search centre
+        lon: Longitude of the search centre
+        search_radius: Search radius in metres
         
-        overpass_query = f"""
+    Returns:
+        Overpass QL query string
+    """
+    around = f"(around:{search_radius},{lat},{lon});"
+    statements = []
+    for types, conditions in OVERPASS_FILTERS:
+        selector = "".join(f'["{key}"{op}"{value}"]' for key, op, value in conditions)
+        statements.extend(f"          {element_type}{selector}{around}" for element_type in types)
+    body = "\n".join(statements)
+    return f"""
         [out:json][timeout:60];
         (
-          // 1. ZOOS & BIOLOGICAL PARKS
-          node["tourism"="zoo"](around:{search_radius},{lat},{lon});
-          way["tourism"="zoo"](around:{search_radius},{lat},{lon});
-          relation["tourism"="zoo"](around:{search_radius},{lat},{lon});
-          
-          // 2. ART GALLERIES
-          node["tourism"="gallery"](around:{search_radius},{lat},{lon});
-          node["amenity"="arts_centre"](around:{search_radius},{lat},{lon});
-          way["tourism"="gallery"](around:{search_radius},{lat},{lon});
-          way["amenity"="arts_centre"](around:{search_radius},{lat},{lon});
-          
-          // 3. NATIONAL PARKS & NATURE RESERVES (including Bannerghatta)
-          node["leisure"="nature_reserve"](around:{search_radius},{lat},{lon});
-          node["boundary"="national_park"](around:{search_radius},{lat},{lon});
-          way["leisure"="nature_reserve"](around:{search_radius},{lat},{lon});
-          way["boundary"="national_park"](around:{search_radius},{lat},{lon});
-          relation["boundary"="national_park"](around:{search_radius},{lat},{lon});
-          relation["leisure"="nature_reserve"](around:{search_radius},{lat},{lon});
-          
-          // 4. BEACHES
-          node["natural"="beach"](around:{search_radius},{lat},{lon});
-          node["leisure"="beach_resort"](around:{search_radius},{lat},{lon});
-          way["natural"="beach"](around:{search_radius},{lat},{lon});
-          way["leisure"="beach_resort"](around:{search_radius},{lat},{lon});
-          
-          // 5. HIKING TRAILS & PEAKS (including Nandi Hills)
-          node["natural"="peak"](around:{search_radius},{lat},{lon});
-          node["natural"="volcano"](around:{search_radius},{lat},{lon});
-          node["natural"="hill"](around:{search_radius},{lat},{lon});
-          way["route"="hiking"](around:{search_radius},{lat},{lon});
-          way["leisure"="track"]["sport"="hiking"](around:{search_radius},{lat},{lon});
-          
-          // 6. VIEWPOINTS (scenic spots)
-          node["tourism"="viewpoint"](around:{search_radius},{lat},{lon});
-          way["tourism"="viewpoint"](around:{search_radius},{lat},{lon});
-          
-          // 7. ADVENTURE SPOTS
-          node["tourism"="theme_park"](around:{search_radius},{lat},{lon});
-          node["leisure"="adult_gaming_centre"](around:{search_radius},{lat},{lon});
-          node["leisure"="water_park"](around:{search_radius},{lat},{lon});
-          node["sport"~"^(climbing|paragliding|rafting|canoeing|kayaking|surfing|diving|skydiving)$"](around:{search_radius},{lat},{lon});
-          way["tourism"="theme_park"](around:{search_radius},{lat},{lon});
-          way["leisure"="water_park"](around:{search_radius},{lat},{lon});
-          way["sport"~"^(climbing|paragliding|rafting|canoeing|kayaking|surfing|diving|skydiving)$"](around:{search_radius},{lat},{lon});
-          
-          // 8. FAMOUS TEMPLES, CHURCHES, MOSQUES, SHRINES (including ISKCON)
-          node["amenity"="place_of_worship"](around:{search_radius},{lat},{lon});
-          node["historic"~"^(temple|church|mosque|shrine|monastery|abbey|cathedral|basilica)$"](around:{search_radius},{lat},{lon});
-          way["amenity"="place_of_worship"](around:{search_radius},{lat},{lon});
-          way["historic"~"^(temple|church|mosque|shrine|monastery|abbey|cathedral|basilica)$"](around:{search_radius},{lat},{lon});
-          relation["amenity"="place_of_worship"](around:{search_radius},{lat},{lon});
-          
-          // 9. GOVERNMENT BUILDINGS & PALACES (including Vidhana Soudha, Tipu Sultan Palace)
-          node["building"="government"](around:{search_radius},{lat},{lon});
-          node["historic"="palace"](around:{search_radius},{lat},{lon});
-          way["building"="government"](around:{search_radius},{lat},{lon});
-          way["historic"="palace"](around:{search_radius},{lat},{lon});
-          relation["historic"="palace"](around:{search_radius},{lat},{lon});
-          
-          // 10. FAMOUS STREETS (historic/notable streets with names)
-          way["highway"~"^(primary|secondary|tertiary|residential|pedestrian|living_street)$"]["name"~"."](around:{search_radius},{lat},{lon});
-          
-          // 11. OTHER TOURIST ATTRACTIONS
-          node["tourism"~"^(attraction|museum|artwork)$"](around:{search_radius},{lat},{lon});
-          node["historic"~"^(monument|castle|tower|ruins|tomb|fort|memorial|archaeological_site)$"](around:{search_radius},{lat},{lon});
-          node["leisure"~"^(park|stadium|golf_course|marina)$"](around:{search_radius},{lat},{lon});
-          node["amenity"~"^(theatre|cinema|library|planetarium)$"](around:{search_radius},{lat},{lon});
-          way["tourism"~"^(attraction|museum|artwork)$"](around:{search_radius},{lat},{lon});
-          way["historic"~"^(monument|castle|tower|ruins|tomb|fort|memorial|archaeological_site)$"](around:{search_radius},{lat},{lon});
-          way["leisure"~"^(park|stadium|golf_course|marina)$"](around:{search_radius},{lat},{lon});
-          way["amenity"~"^(theatre|cinema|library|planetarium)$"](around:{search_radius},{lat},{lon});
+{body}
         );
         out center;
         """
+
+
+@tracing.traced()
+def _query_overpass(lat: float, lon: float, search_radius: int,
+                    limit: int = OVERPASS_RESULT_LIMIT) -> List[Dict]:
+    """
+    Run the Overpass query and keep the elements that are real tourist attractions.
+    
+    Args:
+        lat: Latitude of the search centre
+        lon: Longitude of the search centre
+        search_radius: Search radius in metres
+        limit: Stop reading the response after this many attractions (0 for no limit)
         
-        url = "https://overpass-api.de/api/interpreter"
-        response = requests.post(url, data={"data": overpass_query}, timeout=60)
+    Returns:
+        List of attractions in Overpass order, each a dict with 'name', 'lat' and 'lon'.
+        Request errors are raised.
+    """
+    response = http_client.post(
+        OVERPASS_URL,
+        data={"data": _build_overpass_query(lat, lon, search_radius)},
+        timeout=60,
+        stream=OVERPASS_STREAMING
+    )
+    try:
         response.raise_for_status()
+        attractions = _classify_elements(_iter_overpass_elements(response), limit)
+        tracing.annotate(attractions=len(attractions))
+        return attractions
+    finally:
+        # Stops the download if we returned before reading the whole body
+        response.close()
+
+
+def _iter_overpass_elements(response: requests.Response) -> Iterator[Dict]:
+    """
+    Iterate over the elements of an Overpass response.
+    In streaming mode elements are parsed as the body arrives instead of after
+    the whole (possibly tens of megabytes) payload has been downloaded.
+    
+    Args:
+        response: Overpass response, requested with stream=OVERPASS_STREAMING
         
-        data = response.json()
+    Returns:
+        Iterator over the element dictionaries
+    """
+    if OVERPASS_STREAMING:
+        return iter_array_items(_iter_chunks(response), "elements")
+    return iter(response.json().get("elements", []))
+
+
+def _iter_chunks(response: requests.Response) -> Iterator[bytes]:
+    """Iterate over a streamed body, stopping when the query's deadline passes."""
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        check_deadline()
+        yield chunk
+
+
+def _classify_elements(elements: Iterable[Dict], limit: int = 0) -> List[Dict]:
+    """
+    Keep the Overpass elements that are real tourist attractions.
+    
+    Args:
+        elements: Overpass elements
+        limit: Stop after this many attractions (0 for no limit)
         
-        places = []
-        seen_names = set()
+    Returns:
+        List of attractions in element order, each a dict with 'name', 'lat', 'lon'
+        and 'category'
+    """
+    attractions = []
+    seen_names = set()
+    
+    for element in elements:
+        attraction = _attraction_from_element(element)
+        if attraction is None:
+            continue
         
-        # Add famous places found by name search first (prioritize them)
-        for place in famous_places:
-            if place and place not in seen_names:
-                places.append(place)
-                seen_names.add(place.lower())
+        # Normalize name for comparison
+        name_lower = attraction["name"].lower()
+        if name_lower not in seen_names:
+            attractions.append(attraction)
+            seen_names.add(name_lower)
+            
+            if limit and len(attractions) >= limit:
+                break
+    
+    return attractions
+
+
+def _attraction_from_element(element: Dict) -> Optional[Dict]:
+    """
+    Classify a single Overpass element.
+    
+    Args:
+        element: Overpass element
         
-        # Keywords to exclude (companies, stores, non-tourist entities)
-        exclude_keywords = [
-            'store', 'shop', 'mall', 'market', 'company', 'corp', 'ltd', 'inc', 
-            'dna', 'lab', 'laboratory', 'office', 'building', 'commercial',
-            'warehouse', 'factory', 'industrial', 'business', 'enterprise'
+    Returns:
+        Dict with 'name', 'lat', 'lon' and 'category', or None if it is not an attraction
+    """
+    # Process nodes, ways, and relations with tags
+    if element.get("type") not in ["node", "way", "relation"]:
+        return None
+    
+    tags = element.get("tags", {})
+    name = tags.get("name", "").strip()
+    
+    category = classify(name, tags)
+    if category is None:
+        return None
+    
+    # Ways and relations carry their position in "center" (out center)
+    position = element.get("center", element)
+    return {
+        "name": name,
+        "lat": position.get("lat"),
+        "lon": position.get("lon"),
+        "category": category
+    }
+
+
+def _overpass_cache_key(tile: str, search_radius: int) -> str:
+    """Cache key for the Overpass results of a geohash tile and search radius."""
+    return f"{tile}:{search_radius}"
+
+
+def _cached_attractions(lat: float, lon: float, search_radius: int, count: bool = True) -> Optional[List[Dict]]:
+    """
+    Answer an attractions search from the Overpass cache.
+    
+    Looks at the geohash tile containing the point and its eight neighbours for a
+    result fetched from a nearby centre with the same radius, then keeps only the
+    attractions that fall within the radius of the requested point.
+    
+    Args:
+        lat: Latitude of the search centre
+        lon: Longitude of the search centre
+        search_radius: Search radius in metres
+        count: Whether to update the cache's hit/miss counters
+        
+    Returns:
+        List of attractions, or None if no cached result is close enough
+    """
+    tile = geohash_encode(lat, lon, OVERPASS_CACHE_PRECISION)
+    radius_km = search_radius / 1000
+    
+    for candidate in [tile] + geohash_neighbors(tile):
+        entry = overpass_cache.get(_overpass_cache_key(candidate, search_radius), count=False)
+        if entry is MISSING:
+            continue
+        if haversine_km(lat, lon, entry["lat"], entry["lon"]) > OVERPASS_CACHE_MAX_OFFSET_KM:
+            continue
+        if count:
+            overpass_cache.record(hit=True)
+        return [
+            attraction for attraction in entry["attractions"]
+            if attraction["lat"] is None
+            or haversine_km(lat, lon, attraction["lat"], attraction["lon"]) <= radius_km
         ]
+    
+    if count:
+        overpass_cache.record(hit=False)
+    return None
+
+
+def _local_attractions(lat: float, lon: float, search_radius: int) -> List[Dict]:
+    """Attractions around a point from the offline POI index (loaded on first use)."""
+    return get_poi_index().query(lat, lon, search_radius, OVERPASS_RESULT_LIMIT)
+
+
+@tracing.traced()
+def fetch_attractions(lat: float, lon: float, search_radius: int = SEARCH_RADIUS) -> List[Dict]:
+    """
+    Get the tourist attractions around a point.
+    Uses the offline POI index when PLACES_BACKEND is "local", otherwise Overpass
+    (through the Overpass cache when possible).
+    
+    Args:
+        lat: Latitude of the search centre
+        lon: Longitude of the search centre
+        search_radius: Search radius in metres
+        
+    Returns:
+        List of attractions, each a dict with 'name', 'lat' and 'lon'
+    """
+    if PLACES_BACKEND == "local":
+        tracing.annotate(backend="local")
+        return _local_attractions(lat, lon, search_radius)
+    
+    cached = _cached_attractions(lat, lon, search_radius)
+    if cached is not None:
+        tracing.annotate(cache="hit")
+        return cached
+    
+    tracing.annotate(cache="miss")
+    # Concurrent misses around the same centre share one Overpass query
+    return overpass_flight.do(_overpass_flight_key(lat, lon, search_radius),
+                              _overpass_leader, lat, lon, search_radius)
+
+
+def _overpass_leader(lat: float, lon: float, search_radius: int) -> List[Dict]:
+    """Run by the single-flight leader of an attractions miss: re-check the cache, then query Overpass."""
+    cached = _cached_attractions(lat, lon, search_radius, count=False)
+    if cached is not None:
+        return cached
+    return _fetch_overpass(lat, lon, search_radius)
+
+
+def _overpass_flight_key(lat: float, lon: float, search_radius: int) -> Tuple[float, float, int]:
+    """Single-flight key for an attractions search (centre rounded to about 1 m)."""
+    return round(lat, 5), round(lon, 5), search_radius
+
+
+@tracing.traced()
+def _fetch_overpass(lat: float, lon: float, search_radius: int) -> List[Dict]:
+    """Run an attractions search on Overpass and cache the result."""
+    attractions = _query_overpass(lat, lon, search_radius)
+    _store_attractions(lat, lon, search_radius, attractions)
+    return attractions
+
+
+def _store_attractions(lat: float, lon: float, search_radius: int, attractions: List[Dict]) -> None:
+    """Cache the attractions found around a search centre under its geohash tile."""
+    tile = geohash_encode(lat, lon, OVERPASS_CACHE_PRECISION)
+    overpass_cache.set(_overpass_cache_key(tile, search_radius), {
+        "lat": lat,
+        "lon": lon,
+        "attractions": attractions
+    })
+
+
+def merge_places(famous_places: List[str], attractions: List[Dict]) -> List[Attraction]:
+    """
+    Merge famous places and searched attractions into the list of places to suggest.
+    
+    Args:
+        famous_places: Results of search_famous_places_by_name (listed first)
+        attractions: Results of fetch_attractions
         
-        if "elements" in data:
-            for element in data["elements"]:
-                # Process nodes, ways, and relations with tags
-                if element.get("type") in ["node", "way", "relation"]:
-                    tags = element.get("tags", {})
-                    name = tags.get("name", "").strip()
-                    
-                    if not name or name in seen_names:
-                        continue
-                    
-                    # Skip if name contains exclude keywords
-                    name_lower = name.lower()
-                    if any(keyword in name_lower for keyword in exclude_keywords):
-                        continue
-                    
-                    # Check if it's actually a tourist attraction
-                    tourism_type = tags.get("tourism", "")
-                    historic_type = tags.get("historic", "")
-                    leisure_type = tags.get("leisure", "")
-                    amenity_type = tags.get("amenity", "")
-                    natural_type = tags.get("natural", "")
-                    sport_type = tags.get("sport", "")
-                    boundary_type = tags.get("boundary", "")
-                    highway_type = tags.get("highway", "")
-                    
-                    # Validate it's a tourist attraction
-                    is_tourist_attraction = False
-                    
-                    # 1. ZOOS
-                    if tourism_type == "zoo":
-                        is_tourist_attraction = True
-                    
-                    # 2. ART GALLERIES
-                    elif tourism_type == "gallery" or amenity_type == "arts_centre":
-                        is_tourist_attraction = True
-                    
-                    # 3. NATIONAL PARKS & NATURE RESERVES
-                    elif leisure_type == "nature_reserve" or boundary_type == "national_park":
-                        is_tourist_attraction = True
-                    
-                    # 4. BEACHES
-                    elif natural_type == "beach" or leisure_type == "beach_resort":
-                        is_tourist_attraction = True
-                    
-                    # 5. HIKING TRAILS & PEAKS
-                    elif natural_type in ["peak", "volcano"] or sport_type == "hiking" or leisure_type == "track":
-                        is_tourist_attraction = True
-                    
-                    # 6. VIEWPOINTS
-                    elif tourism_type == "viewpoint":
-                        is_tourist_attraction = True
-                    
-                    # 7. ADVENTURE SPOTS
-                    elif tourism_type == "theme_park" or leisure_type in ["adult_gaming_centre", "water_park"]:
-                        is_tourist_attraction = True
-                    elif sport_type in ["climbing", "paragliding", "rafting", "canoeing", "kayaking", "surfing", "diving", "skydiving"]:
-                        is_tourist_attraction = True
-                    
-                    # 8. TEMPLES, CHURCHES, MOSQUES, SHRINES
-                    elif amenity_type == "place_of_worship":
-                        is_tourist_attraction = True
-                    elif historic_type in ["temple", "church", "mosque", "shrine", "monastery", "abbey", "cathedral", "basilica"]:
-                        is_tourist_attraction = True
-                    
-                    # 9. FAMOUS STREETS (notable streets with names - filter by length and significance)
-                    elif highway_type and name and len(name) > 5:
-                        # Only include if it's a significant street (not just any residential street)
-                        # Check if it has historic/tourism tag OR is a major road type
-                        if historic_type or tourism_type or highway_type in ["primary", "secondary", "tertiary", "pedestrian"]:
-                            is_tourist_attraction = True
-                    
-                    # 10. OTHER TOURIST ATTRACTIONS
-                    elif tourism_type in ["attraction", "museum", "artwork"]:
-                        is_tourist_attraction = True
-                    elif historic_type in ["monument", "castle", "palace", "tower", "ruins", "tomb", "fort", "memorial", "archaeological_site"]:
-                        is_tourist_attraction = True
-                    elif leisure_type in ["park", "stadium", "golf_course", "marina"]:
-                        is_tourist_attraction = True
-                    elif amenity_type in ["theatre", "cinema", "library", "planetarium"]:
-                        is_tourist_attraction = True
-                    
-                    # Exclude certain types that aren't real attractions
-                    excluded_tourism_types = ['information', 'hotel', 'hostel', 'apartment', 'guest_house']
-                    if tourism_type in excluded_tourism_types:
-                        continue
-                    
-                    excluded_amenities = ['restaurant', 'cafe', 'fast_food', 'pharmacy', 'bank', 'atm', 'hospital', 'clinic', 'school', 'university']
-                    if amenity_type in excluded_amenities and not is_tourist_attraction:
-                        continue
-                    
-                    if is_tourist_attraction:
-                        # Normalize name for comparison
-                        name_lower = name.lower()
-                        if name_lower not in seen_names:
-                            places.append(name)
-                            seen_names.add(name_lower)
-                            
-                            if len(places) >= 20:  # Increased to 20
-                                break
+    Returns:
+        Up to MAX_PLACES attractions with distinct names
+    """
+    places = []
+    seen_names = set()
+    
+    # Add famous places found by name search first (prioritize them)
+    for place in famous_places:
+        if place and place not in seen_names:
+            places.append(Attraction(place))
+            seen_names.add(place.lower())
+    
+    for attraction in attractions:
+        name_lower = attraction["name"].lower()
+        if name_lower not in seen_names:
+            places.append(Attraction(attraction["name"], attraction.get("lat"), attraction.get("lon"),
+                                     attraction.get("category")))
+            seen_names.add(name_lower)
+            
+            if len(places) >= MAX_PLACES:
+                break
+    
+    return places[:MAX_PLACES]
+
+
+def places_report(place_name: str, famous_places: List[str], attractions: List[Dict]) -> PlacesReport:
+    """
+    Build the Places Agent's answer.
+    
+    Args:
+        place_name: Name of the place
+        famous_places: Results of search_famous_places_by_name
+        attractions: Results of fetch_attractions
+        
+    Returns:
+        PlacesReport with up to MAX_PLACES attractions
+    """
+    return PlacesReport(place_name, tuple(merge_places(famous_places, attractions)))
+
+
+def format_places(place_name: str, famous_places: List[str], attractions: List[Dict]) -> str:
+    """
+    Format the Places Agent's answer.
+    
+    Args:
+        place_name: Name of the place
+        famous_places: Results of search_famous_places_by_name
+        attractions: Results of fetch_attractions
+        
+    Returns:
+        Formatted list of tourist attractions (up to 20)
+    """
+    return places_report(place_name, famous_places, attractions).text
+
+
+def places_agent_for_location(place_name: str, coords: Dict) -> str:
+    """
+    Places Agent entry point for a place that has already been geocoded, as text.
+    
+    Args:
+        place_name: Name of the place
+        coords: Location from get_coordinates with 'lat' and 'lon' keys
+        
+    Returns:
+        Formatted list of tourist attractions (up to 20)
+    """
+    return places_report_for_location(place_name, coords).text
+
+
+@tracing.traced()
+def places_report_for_location(place_name: str, coords: Dict) -> PlacesReport:
+    """
+    Places Agent entry point for a place that has already been geocoded.
+    
+    Args:
+        place_name: Name of the place
+        coords: Location from get_coordinates with 'lat' and 'lon' keys
+        
+    Returns:
+        PlacesReport, with the error message if the search failed
+    """
+    try:
+        lat = coords["lat"]
+        lon = coords["lon"]
+        
+        # Search for famous places by name first
+        famous_places = search_famous_places_by_name(place_name)
+        
+        try:
+            attractions = fetch_attractions(lat, lon)
+        except requests.exceptions.RequestException as e:
+            # Out of time or Overpass is down: the famous places are still worth returning
+            if not famous_places:
+                raise
+            print(f"Attractions search failed, answering with famous places only: {e}")
+            attractions = []
         
-        # If we have places, return them (up to 20)
-        if places:
-            places_list = "\n".join(places[:20])  # Limit to 20 places
-            return f"In {place_name} these are the places you can go,\n\n{places_list}"
-        else:
-            # If no places found, try a broader search
-            return f"Could not find specific tourist attractions for {place_name}. The place might exist, but no tourist attractions were found in the area."
+        return places_report(place_name, famous_places, attractions)
         
     except requests.exceptions.RequestException as e:
-        return f"Error fetching places data: {str(e)}"
+        return PlacesReport(place_name, error=f"Error fetching places data: {str(e)}")
     except Exception as e:
-        return f"Error in places agent: {str(e)}"
+        return PlacesReport(place_name, error=f"Error in places agent: {str(e)}")
 
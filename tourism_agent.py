@@ -3,8 +3,82 @@ Parent Tourism AI Agent that orchestrates the multi-agent system.
 Coordinates Weather Agent and Places Agent based on user queries.
 Uses rule-based logic (no paid AI services).
 """
+import asyncio
+import contextvars
+import os
 import re
-from tools import weather_agent, places_agent
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, List, Optional, Tuple, Union
+from cache import CacheEntry, TTLCache, cache_path
+from cache_warmer import query_log
+import metrics
+import tracing
+from tools import get_coordinates, weather_report_for_location, places_report_for_location
+from place_extractor import extract_place_name
+from resilience import (MAX_CONCURRENT_QUERIES, REQUEST_DEADLINE, AsyncConcurrencyLimiter, ConcurrencyLimiter,
+                        Deadline)
+from results import Location, Message, PlacesReport, TourismResponse, WeatherReport
+import async_tools
+
+
+# Child agents run concurrently on a bounded pool; each has its own time limit, counted
+# from when it starts running. The pool has room for both agents of every query the
+# server admits at once (MAX_CONCURRENT_QUERIES), so admitted queries do not queue for it.
+AGENT_POOL_SIZE = int(os.environ.get("AGENT_POOL_SIZE", 2 * (MAX_CONCURRENT_QUERIES or 32)))
+# Seconds between checks on an agent that is still waiting for a worker
+QUEUED_AGENT_POLL_INTERVAL = 0.05
+WEATHER_AGENT_TIMEOUT = float(os.environ.get("WEATHER_AGENT_TIMEOUT", 15))
+PLACES_AGENT_TIMEOUT = float(os.environ.get("PLACES_AGENT_TIMEOUT", 90))
+
+# Queries the threaded server (app.py) admits at once: each runs up to two agents on the
+# pool, so never more than half the pool, whatever AGENT_POOL_SIZE is set to (0 = no limit)
+QUERY_SLOTS = min(MAX_CONCURRENT_QUERIES, max(1, AGENT_POOL_SIZE // 2)) if MAX_CONCURRENT_QUERIES > 0 else 0
+
+# Distinct places of a batch request are processed concurrently on their own pool
+BATCH_POOL_SIZE = int(os.environ.get("BATCH_POOL_SIZE", 8))
+
+# "intent" runs only the agents the query asks for (e.g. no 100 km Overpass scan for a
+# temperature question); "both" always runs the weather and places agents
+AGENT_MODE = os.environ.get("AGENT_MODE", "intent")
+BOTH_AGENTS = {'weather': True, 'places': True}
+
+# Keyword patterns for determine_intent, matched as whole words (plus plain inflections such
+# as "raining" or "visiting"). Substring matching made "going" count as "go" and "Bangalore"
+# as "and", so every query looked like it asked for both.
+def _keyword_pattern(keywords: List[str], suffixes: str = r"(?:s|es|ed|ing|y)?") -> "re.Pattern":
+    return re.compile(r"\b(?:" + "|".join(re.escape(k) for k in keywords) + r")" + suffixes + r"\b",
+                      re.IGNORECASE)
+
+
+WEATHER_KEYWORDS = _keyword_pattern(['temperature', 'temp', 'weather', 'rain', 'precipitation',
+                                     'forecast', 'climate', 'hot', 'cold', 'sunny', 'cloudy'])
+PLACES_KEYWORDS = _keyword_pattern(['place', 'attraction', 'visit', 'see', 'tourist',
+                                    'sightseeing', 'plan', 'planning', 'trip', 'explore'])
+GO_TO_PHRASE = _keyword_pattern(['go to'], suffixes="")
+BOTH_KEYWORDS = _keyword_pattern(['and', 'both'], suffixes="")
+
+# Whole-response cache. An answer is served as-is for RESPONSE_CACHE_TTL seconds, then for
+# RESPONSE_STALE_TTL more seconds it is still served immediately while a background refresh
+# replaces it. After that it is recomputed, but the last good answer is kept for
+# RESPONSE_FALLBACK_TTL seconds in total and served if the recomputation fails upstream.
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", 300))
+RESPONSE_STALE_TTL = float(os.environ.get("RESPONSE_STALE_TTL", 1800))
+RESPONSE_FALLBACK_TTL = float(os.environ.get("RESPONSE_FALLBACK_TTL", 24 * 3600))
+response_cache = TTLCache(
+    "responses",
+    maxsize=int(os.environ.get("RESPONSE_CACHE_SIZE", 1024)),
+    ttl=max(RESPONSE_FALLBACK_TTL, RESPONSE_CACHE_TTL + RESPONSE_STALE_TTL),
+    path=cache_path("responses")
+)
+metrics.register_caches(response_cache)
+REFRESH_POOL_SIZE = int(os.environ.get("REFRESH_POOL_SIZE", 2))
+
+# What a child agent answers with
+Report = Union[WeatherReport, PlacesReport]
+
+NO_PLACE_MESSAGE = "I couldn't identify the place name in your query. Please mention the place you want to visit (e.g., 'I'm going to Bangalore')."
 
 
 class TourismAgent:
@@ -13,15 +87,71 @@ class TourismAgent:
     Uses rule-based logic to determine which agents to call.
     """
     
-    def __init__(self):
-        """Initialize the Tourism Agent."""
-        pass
+    def __init__(self, max_workers: int = AGENT_POOL_SIZE,
+                 weather_timeout: float = WEATHER_AGENT_TIMEOUT,
+                 places_timeout: float = PLACES_AGENT_TIMEOUT):
+        """
+        Initialize the Tourism Agent.
+        
+        Args:
+            max_workers: Size of the thread pool shared by the child agents
+            weather_timeout: Seconds to wait for the weather agent
+            places_timeout: Seconds to wait for the places agent
+        """
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tourism-agent")
+        # Separate pool so batch work never waits on the agent pool it submits to
+        self.batch_executor = ThreadPoolExecutor(max_workers=BATCH_POOL_SIZE, thread_name_prefix="tourism-batch")
+        # Background refreshes of stale cached responses, at most one per response
+        self.refresh_executor = ThreadPoolExecutor(max_workers=REFRESH_POOL_SIZE, thread_name_prefix="tourism-refresh")
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        self._refresh_tasks = set()
+        self.weather_timeout = weather_timeout
+        self.places_timeout = places_timeout
+    
+    @staticmethod
+    async def _astage(stage: str, awaitable: Awaitable[Report], timeout: float,
+                      timeout_report: Report) -> Tuple[str, Report]:
+        """
+        Wait for a child agent coroutine for at most `timeout` seconds.
+        
+        Args:
+            stage: Event name for the agent ("weather" or "places")
+            awaitable: The agent coroutine
+            timeout: Seconds to wait
+            timeout_report: Report used if the agent does not finish in time
+            
+        Returns:
+            (stage, report) event for the agent's report or timeout_report
+        """
+        try:
+            return stage, await asyncio.wait_for(awaitable, timeout)
+        except asyncio.TimeoutError:
+            return stage, timeout_report
+    
+    @staticmethod
+    def _run_agent(span_name: str, deadline: Deadline, started: List[float], fn, *args) -> Report:
+        """
+        Run a child agent under the query's deadline, as a span of the query's trace.
+        The time it starts running is appended to `started`, so that its timeout does
+        not count the time it spent queued for a worker.
+        """
+        started.append(time.monotonic())
+        with tracing.span(span_name):
+            return deadline.run(fn, *args)
+    
+    @staticmethod
+    async def _arun_agent(span_name: str, deadline: Deadline, fn, *args) -> Report:
+        """Async version of _run_agent."""
+        with tracing.span(span_name):
+            return await deadline.arun(fn, *args)
     
     def extract_place_name(self, user_input: str) -> str:
         """
         Extract place name from user input.
         Looks for patterns like "going to [place]", "visit [place]", etc.
         Improved to handle lowercase place names like "mysore", "udupi".
+        Queries with a place are recorded in the query log for the cache warmer.
         
         Args:
             user_input: User's query
@@ -29,56 +159,10 @@ class TourismAgent:
         Returns:
             Extracted place name or empty string
         """
-        # Common patterns for place names - case insensitive, more flexible
-        patterns = [
-            r"going to go to ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",  # "going to go to Mysore"
-            r"going to ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",         # "going to mysore"
-            r"visit ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",            # "visit Paris"
-            r"in ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",               # "in Bangalore"
-            r"to ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",               # "to Paris"
-            r"from ([A-Za-z][A-Za-z\s]+?)(?:,|\.|$|\?|what|where|let|plan|trip)",             # "from Mysore"
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, user_input, re.IGNORECASE)
-            if match:
-                place = match.group(1).strip()
-                # Remove trailing common words that might be part of the sentence
-                place = re.sub(r'\s+(what|where|when|how|let|plan|trip|from|to|going|visit).*$', '', place, flags=re.IGNORECASE)
-                # Clean up common articles
-                place = re.sub(r'^\s*(?:the|a|an)\s+', '', place, flags=re.IGNORECASE).strip()
-                # Capitalize first letter of each word for better matching
-                place = ' '.join(word.capitalize() for word in place.split())
-                if place and len(place) > 2:
-                    return place
-        
-        # Fallback: try to find any capitalized or significant words (place names)
-        words = user_input.split()
-        place_words = []
-        skip_words = {'i', 'i\'m', 'let\'s', 'let', 'going', 'to', 'go', 'visit', 'from', 'in', 'the', 'a', 'an', 'what', 'where', 'when', 'how', 'plan', 'trip', 'is', 'are', 'there', 'and', 'or', 'but'}
-        
-        for i, w in enumerate(words):
-            w_clean = w.strip('.,!?;:').lower()
-            # Skip common words
-            if w_clean in skip_words:
-                continue
-            # If word is capitalized or is a significant word (longer than 3 chars), it might be a place
-            if (w and w[0].isupper()) or (len(w_clean) > 3 and w_clean not in skip_words):
-                place_words.append(w.strip('.,!?;:'))
-                # If next word is also significant, include it
-                if i + 1 < len(words):
-                    next_w = words[i + 1].strip('.,!?;:').lower()
-                    if next_w not in skip_words and (len(next_w) > 2 or words[i + 1][0].isupper()):
-                        place_words.append(words[i + 1].strip('.,!?;:'))
-                        break
-        
-        if place_words:
-            place = ' '.join(place_words)
-            # Capitalize properly
-            place = ' '.join(word.capitalize() for word in place.split())
-            return place
-        
-        return ""
+        place_name = extract_place_name(user_input)
+        if place_name:
+            query_log.record(user_input, place_name)
+        return place_name
     
     def determine_intent(self, user_input: str) -> dict:
         """
@@ -90,74 +174,575 @@ class TourismAgent:
         Returns:
             Dictionary with 'weather' and 'places' boolean flags
         """
-        user_lower = user_input.lower()
-        
         # Weather keywords
-        weather_keywords = ['temperature', 'temp', 'weather', 'rain', 'precipitation', 
-                           'forecast', 'climate', 'hot', 'cold', 'sunny', 'cloudy']
-        wants_weather = any(keyword in user_lower for keyword in weather_keywords)
+        wants_weather = WEATHER_KEYWORDS.search(user_input) is not None
         
         # Places keywords
-        places_keywords = ['places', 'attractions', 'visit', 'see', 'tourist', 
-                          'sightseeing', 'plan', 'trip', 'go', 'explore']
-        wants_places = any(keyword in user_lower for keyword in places_keywords)
+        wants_places = PLACES_KEYWORDS.search(user_input) is not None
         
-        # If neither is explicitly mentioned but "plan my trip" or similar, assume places
+        # If neither is explicitly mentioned but "go to" or similar, assume places
         if not wants_weather and not wants_places:
-            if any(phrase in user_lower for phrase in ['plan', 'trip', 'visit', 'go to']):
+            if GO_TO_PHRASE.search(user_input):
                 wants_places = True
         
         # If both are mentioned or neither, check for "and" or "both"
-        if 'and' in user_lower or 'both' in user_lower:
+        if BOTH_KEYWORDS.search(user_input):
             if wants_weather or wants_places:
                 return {'weather': True, 'places': True}
         
         return {'weather': wants_weather, 'places': wants_places}
     
-    def process_query(self, user_input: str) -> str:
+    def select_agents(self, user_input: str) -> Dict[str, bool]:
         """
-        Process user query and return response.
-        ALWAYS returns both weather and places information.
+        Decide which child agents answer a query.
+        
+        Args:
+            user_input: User's query
+            
+        Returns:
+            Dictionary with 'weather' and 'places' boolean flags, at least one of them True
+        """
+        if AGENT_MODE == "both":
+            return dict(BOTH_AGENTS)
+        intent = self.determine_intent(user_input)
+        # Nothing specific asked for (e.g. "Tell me about Paris"): answer with both
+        if not intent['weather'] and not intent['places']:
+            return dict(BOTH_AGENTS)
+        return intent
+    
+    def resolve_place(self, place_name: str) -> Optional[Dict]:
+        """
+        Geocode the place once so every child agent can share the result.
+        
+        Args:
+            place_name: Extracted place name
+            
+        Returns:
+            Dictionary with 'lat', 'lon' and 'display_name' keys, or None if not found
+        """
+        return get_coordinates(place_name)
+    
+    def iter_place_events(self, place_name: str,
+                          agents: Optional[Dict[str, bool]] = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Answer for an extracted place name stage by stage, as each stage completes.
+        The selected agents run in parallel on the agent's thread pool, and every
+        upstream call made for the query shares one REQUEST_DEADLINE budget.
+        
+        Events, in order of completion (every event's data has a to_dict() for clients):
+            ("message", Message)            the place could not be resolved
+            ("place", Location)
+            ("weather", WeatherReport)      weather agent finished or timed out
+            ("places", PlacesReport)        places agent finished or timed out
+            ("done", TourismResponse)       always last, with the combined response
+        
+        Args:
+            place_name: Extracted place name
+            agents: Agents to run, as returned by select_agents (default: both)
+            
+        Yields:
+            (event name, event data) tuples
+        """
+        agents = agents or BOTH_AGENTS
+        deadline = Deadline(REQUEST_DEADLINE)
+        
+        # Resolve the place once and share the location with the agents
+        with tracing.span("resolve_place"):
+            location = deadline.run(self.resolve_place, place_name)
+        if not location:
+            message = f"I don't know if this place exists: {place_name}"
+            yield "message", Message(message)
+            yield "done", TourismResponse(message=message)
+            return
+        
+        place = Location(place_name, location["display_name"], location["lat"], location["lon"])
+        yield "place", place
+        
+        # Run the agents concurrently, so latency is the slowest of them. Each runs in
+        # a copy of this context so its spans belong to the query's trace.
+        stages = {}
+        if agents['weather']:
+            started: List[float] = []
+            stages[self.executor.submit(contextvars.copy_context().run, self._run_agent, "weather_agent",
+                                        deadline, started, weather_report_for_location, place_name, location)] = (
+                "weather", self.weather_timeout, started, WeatherReport(place_name, timed_out=True)
+            )
+        if agents['places']:
+            started = []
+            stages[self.executor.submit(contextvars.copy_context().run, self._run_agent, "places_agent",
+                                        deadline, started, places_report_for_location, place_name, location)] = (
+                "places", self.places_timeout, started, PlacesReport(place_name, timed_out=True)
+            )
+        
+        results = {}
+        pending = set(stages)
+        while pending:
+            done, pending = wait(pending, timeout=self._next_agent_timeout(stages, pending, deadline),
+                                 return_when=FIRST_COMPLETED)
+            for future in done:
+                stage, _, _, timeout_report = stages[future]
+                try:
+                    results[stage] = future.result()
+                except Exception as e:
+                    results[stage] = timeout_report._replace(timed_out=False,
+                                                             error=f"Error processing query: {str(e)}")
+                yield stage, results[stage]
+            
+            now = time.monotonic()
+            for future in list(pending):
+                stage, timeout, started, timeout_report = stages[future]
+                # An agent still queued for a worker is only bounded by the query's deadline
+                expired = now >= started[0] + timeout if started else deadline.remaining() <= 0
+                if expired:
+                    pending.discard(future)
+                    results[stage] = timeout_report
+                    yield stage, timeout_report
+        
+        yield "done", TourismResponse(place, results.get("weather"), results.get("places"))
+    
+    @staticmethod
+    def _next_agent_timeout(stages: Dict[Future, Tuple], pending: set, deadline: Deadline) -> float:
+        """Seconds until the next pending agent may time out (polled while one is still queued)."""
+        now = time.monotonic()
+        wakeups = []
+        for future in pending:
+            _, timeout, started, _ = stages[future]
+            if started:
+                wakeups.append(started[0] + timeout - now)
+            else:
+                wakeups.append(min(QUEUED_AGENT_POLL_INTERVAL, deadline.remaining()))
+        return max(0.0, min(wakeups))
+    
+    def answer_for_place(self, place_name: str, agents: Optional[Dict[str, bool]] = None) -> str:
+        """
+        Build the response for an extracted place name, going through the response
+        cache (see RESPONSE_CACHE_TTL).
+        
+        Args:
+            place_name: Extracted place name
+            agents: Agents to run, as returned by select_agents (default: both)
+            
+        Returns:
+            Agent's response from the selected agents
+        """
+        return self.result_for_place(place_name, agents).text
+    
+    def result_for_place(self, place_name: str, agents: Optional[Dict[str, bool]] = None) -> TourismResponse:
+        """
+        Structured version of answer_for_place.
+        
+        Args:
+            place_name: Extracted place name
+            agents: Agents to run, as returned by select_agents (default: both)
+            
+        Returns:
+            TourismResponse with the place and the reports of the selected agents
+        """
+        agents = agents or BOTH_AGENTS
+        key = self._response_key(place_name, agents)
+        entry = self._lookup_response(key)
+        if entry is not None and entry.age < RESPONSE_CACHE_TTL + RESPONSE_STALE_TTL:
+            if entry.age >= RESPONSE_CACHE_TTL:
+                self._start_refresh(key, lambda: self.refresh_executor.submit(self._refresh, key, place_name, agents))
+            return TourismResponse.from_dict(entry.value, entry.age)
+        
+        return self._store_response(key, self._compute_answer(place_name, agents), entry)
+    
+    def _compute_answer(self, place_name: str, agents: Dict[str, bool]) -> TourismResponse:
+        """Run the agents for a place and return the combined response."""
+        response = TourismResponse()
+        for event, data in self.iter_place_events(place_name, agents):
+            if event == "done":
+                response = data
+        return response
+    
+    def _refresh(self, key: str, place_name: str, agents: Dict[str, bool]) -> None:
+        """Recompute a stale cached response (runs on the refresh pool)."""
+        try:
+            self._store_response(key, self._compute_answer(place_name, agents))
+        except Exception as e:
+            print(f"Error refreshing response for {place_name}: {e}")
+        finally:
+            self._finish_refresh(key)
+    
+    @staticmethod
+    def _response_key(place_name: str, agents: Dict[str, bool]) -> str:
+        """
+        Response cache key: the place name as extracted (case and spacing normalized) and
+        the agents that answer it. Aliases such as Bangalore / Bengaluru get separate
+        entries, since their answers differ (famous places listed, wording).
+        """
+        names = ",".join(agent for agent in ("weather", "places") if agents[agent])
+        return " ".join(place_name.lower().split()) + "|" + names
+    
+    @classmethod
+    def _lookup_response(cls, key: str) -> Optional[CacheEntry]:
+        """_cached_response, as a span noting whether the cached response is fresh, stale or missing."""
+        with tracing.span("response_cache"):
+            entry = cls._cached_response(key)
+            if entry is None or entry.age >= RESPONSE_CACHE_TTL + RESPONSE_STALE_TTL:
+                tracing.annotate(cache="miss")
+            else:
+                tracing.annotate(cache="hit" if entry.age < RESPONSE_CACHE_TTL else "stale")
+            return entry
+    
+    @staticmethod
+    def _cached_response(key: str) -> Optional[CacheEntry]:
+        """Look up a cached response (None when the response cache is disabled)."""
+        if RESPONSE_CACHE_TTL <= 0:
+            return None
+        entry = response_cache.lookup(key)
+        # Plain-text answers stored by older versions are recomputed
+        return entry if entry is not None and isinstance(entry.value, dict) else None
+    
+    @staticmethod
+    def _store_response(key: str, response: TourismResponse,
+                        previous: Optional[CacheEntry] = None) -> TourismResponse:
+        """
+        Cache a freshly computed response if it is complete (no unknown place, error or timeout).
+        
+        Returns:
+            The response to give the caller: the new one, or the previous cached
+            one if the new one is incomplete (an upstream failed)
+        """
+        if response.complete:
+            if RESPONSE_CACHE_TTL > 0:
+                response_cache.set(key, response.to_dict())
+            return response
+        return TourismResponse.from_dict(previous.value, previous.age) if previous is not None else response
+    
+    def _start_refresh(self, key: str, start) -> None:
+        """Call start() to refresh a response unless a refresh for it is already running."""
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        try:
+            start()
+        except Exception:
+            self._finish_refresh(key)
+            raise
+    
+    def _finish_refresh(self, key: str) -> None:
+        """Mark a response refresh as finished."""
+        with self._refreshing_lock:
+            self._refreshing.discard(key)
+    
+    def iter_query_events(self, user_input: str) -> Iterator[Tuple[str, Any]]:
+        """
+        Process a user query stage by stage, for streaming partial results to clients.
+        See iter_place_events for the events; "done" is always the last one.
         
         Args:
             user_input: User's query about a place
             
+        Yields:
+            (event name, event data) tuples
+        """
+        try:
+            place_name = self.extract_place_name(user_input)
+            
+            if not place_name:
+                yield "message", Message(NO_PLACE_MESSAGE)
+                yield "done", TourismResponse(message=NO_PLACE_MESSAGE)
+                return
+            
+            yield from self.iter_place_events(place_name, self.select_agents(user_input))
+            
+        except Exception as e:
+            message = f"Error processing query: {str(e)}"
+            yield "message", Message(message)
+            yield "done", TourismResponse(message=message)
+    
+    async def aiter_place_events(self, place_name: str,
+                                 agents: Optional[Dict[str, bool]] = None) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Async version of iter_place_events, using the non-blocking agents in async_tools.
+        
+        Args:
+            place_name: Extracted place name
+            agents: Agents to run, as returned by select_agents (default: both)
+            
+        Yields:
+            (event name, event data) tuples
+        """
+        agents = agents or BOTH_AGENTS
+        deadline = Deadline(REQUEST_DEADLINE)
+        with tracing.span("resolve_place"):
+            location = await deadline.arun(async_tools.get_coordinates, place_name)
+        if not location:
+            message = f"I don't know if this place exists: {place_name}"
+            yield "message", Message(message)
+            yield "done", TourismResponse(message=message)
+            return
+        
+        place = Location(place_name, location["display_name"], location["lat"], location["lon"])
+        yield "place", place
+        
+        stages = []
+        if agents['weather']:
+            stages.append(self._astage(
+                "weather", self._arun_agent("weather_agent", deadline, async_tools.weather_report_for_location,
+                                            place_name, location),
+                self.weather_timeout, WeatherReport(place_name, timed_out=True)
+            ))
+        if agents['places']:
+            stages.append(self._astage(
+                "places", self._arun_agent("places_agent", deadline, async_tools.places_report_for_location,
+                                           place_name, location),
+                self.places_timeout, PlacesReport(place_name, timed_out=True)
+            ))
+        results = {}
+        for next_stage in asyncio.as_completed(stages):
+            stage, report = await next_stage
+            results[stage] = report
+            yield stage, report
+        
+        yield "done", TourismResponse(place, results.get("weather"), results.get("places"))
+    
+    async def aanswer_for_place(self, place_name: str, agents: Optional[Dict[str, bool]] = None) -> str:
+        """
+        Async version of answer_for_place, using the non-blocking agents in async_tools.
+        
+        Args:
+            place_name: Extracted place name
+            agents: Agents to run, as returned by select_agents (default: both)
+            
         Returns:
-            Agent's response with both weather and places
+            Agent's response from the selected agents
+        """
+        return (await self.aresult_for_place(place_name, agents)).text
+    
+    async def aresult_for_place(self, place_name: str,
+                                agents: Optional[Dict[str, bool]] = None) -> TourismResponse:
+        """Async version of result_for_place."""
+        agents = agents or BOTH_AGENTS
+        key = self._response_key(place_name, agents)
+        entry = await async_tools._cache_io(response_cache, self._lookup_response, key)
+        if entry is not None and entry.age < RESPONSE_CACHE_TTL + RESPONSE_STALE_TTL:
+            if entry.age >= RESPONSE_CACHE_TTL:
+                self._start_refresh(key, lambda: self._track_task(self._arefresh(key, place_name, agents)))
+            return TourismResponse.from_dict(entry.value, entry.age)
+        
+        response = await self._acompute_answer(place_name, agents)
+        return await async_tools._cache_io(response_cache, self._store_response, key, response, entry)
+    
+    async def _acompute_answer(self, place_name: str, agents: Dict[str, bool]) -> TourismResponse:
+        """Async version of _compute_answer."""
+        response = TourismResponse()
+        async for event, data in self.aiter_place_events(place_name, agents):
+            if event == "done":
+                response = data
+        return response
+    
+    async def _arefresh(self, key: str, place_name: str, agents: Dict[str, bool]) -> None:
+        """Async version of _refresh (runs as a background task)."""
+        try:
+            response = await self._acompute_answer(place_name, agents)
+            await async_tools._cache_io(response_cache, self._store_response, key, response)
+        except Exception as e:
+            print(f"Error refreshing response for {place_name}: {e}")
+        finally:
+            self._finish_refresh(key)
+    
+    def _track_task(self, coroutine) -> None:
+        """Run a coroutine as a background task, keeping a reference until it finishes."""
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    async def aiter_query_events(self, user_input: str) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Async version of iter_query_events.
+        
+        Args:
+            user_input: User's query about a place
+            
+        Yields:
+            (event name, event data) tuples
         """
         try:
-            # Extract place name
             place_name = self.extract_place_name(user_input)
             
             if not place_name:
-                return "I couldn't identify the place name in your query. Please mention the place you want to visit (e.g., 'I'm going to Bangalore')."
-            
-            # ALWAYS call both agents
-            weather_response = weather_agent(place_name)
-            places_response = places_agent(place_name)
-            
-            # Combine responses - always include both
-            weather_text = weather_response
-            places_text = places_response
-            
-            # Extract just the places list from places_text
-            if "these are the places you can go" in places_text.lower():
-                # Find the part after "these are the places you can go"
-                parts = re.split(r"these are the places you can go", places_text, flags=re.IGNORECASE)
-                if len(parts) > 1:
-                    places_list = parts[1].strip()
-                    # Remove leading comma if present
-                    if places_list.startswith(","):
-                        places_list = places_list[1:].strip()
-                    # Ensure it starts with newline for formatting
-                    if not places_list.startswith("\n"):
-                        places_list = "\n" + places_list
-                    return f"{weather_text} And these are the places you can go:{places_list}"
-                else:
-                    return f"{weather_text} {places_text}"
-            else:
-                return f"{weather_text} {places_text}"
-                
+                yield "message", Message(NO_PLACE_MESSAGE)
+                yield "done", TourismResponse(message=NO_PLACE_MESSAGE)
+                return
+            
+            async for event, data in self.aiter_place_events(place_name, self.select_agents(user_input)):
+                yield event, data
+            
         except Exception as e:
-            return f"Error processing query: {str(e)}"
+            message = f"Error processing query: {str(e)}"
+            yield "message", Message(message)
+            yield "done", TourismResponse(message=message)
+    
+    def process_query(self, user_input: str) -> str:
+        """
+        Process user query and return response.
+        Only the agents the query asks for are called (see AGENT_MODE).
+        
+        Args:
+            user_input: User's query about a place
+            
+        Returns:
+            Agent's response (weather, places, or both)
+        """
+        return self.process_query_result(user_input).text
+    
+    def process_query_result(self, user_input: str) -> TourismResponse:
+        """
+        Process user query and return the structured response.
+        
+        Args:
+            user_input: User's query about a place
+            
+        Returns:
+            TourismResponse with the place and the reports of the agents that ran
+        """
+        with tracing.trace("process_query"):
+            try:
+                # Extract place name
+                with tracing.span("extract_place"):
+                    place_name = self.extract_place_name(user_input)
+                
+                if not place_name:
+                    return TourismResponse(message=NO_PLACE_MESSAGE)
+                
+                with tracing.span("select_agents"):
+                    agents = self.select_agents(user_input)
+                return self.result_for_place(place_name, agents)
+                    
+            except Exception as e:
+                return TourismResponse(message=f"Error processing query: {str(e)}")
+    
+    async def aprocess_query(self, user_input: str) -> str:
+        """
+        Async version of process_query for the ASGI serving path.
+        
+        Args:
+            user_input: User's query about a place
+            
+        Returns:
+            Agent's response (weather, places, or both)
+        """
+        return (await self.aprocess_query_result(user_input)).text
+    
+    async def aprocess_query_result(self, user_input: str) -> TourismResponse:
+        """Async version of process_query_result."""
+        with tracing.trace("process_query"):
+            try:
+                with tracing.span("extract_place"):
+                    place_name = self.extract_place_name(user_input)
+                
+                if not place_name:
+                    return TourismResponse(message=NO_PLACE_MESSAGE)
+                
+                with tracing.span("select_agents"):
+                    agents = self.select_agents(user_input)
+                return await self.aresult_for_place(place_name, agents)
+                
+            except Exception as e:
+                return TourismResponse(message=f"Error processing query: {str(e)}")
+    
+    def process_batch(self, queries: List[str],
+                      limiter: Optional[ConcurrencyLimiter] = None) -> List[Optional[str]]:
+        """
+        Process many queries at once.
+        Queries that ask the same thing about the same place are answered once,
+        and the distinct questions are processed concurrently.
+        
+        Args:
+            queries: User queries
+            limiter: Query slots of the server; each distinct question holds one while
+                it runs, like a single query would
+            
+        Returns:
+            One response per query, in the same order (None for a question that was
+            shed because the limiter had no slot for it)
+        """
+        with tracing.trace("process_batch"):
+            keys = []
+            futures: Dict[str, Future] = {}
+            for query in queries:
+                place_name = self.extract_place_name(query)
+                if not place_name:
+                    keys.append(None)
+                    continue
+                # One unit of work per distinct place (case-insensitive) and set of agents
+                agents = self.select_agents(query)
+                key = self._response_key(place_name, agents)
+                if key not in futures:
+                    futures[key] = self.batch_executor.submit(contextvars.copy_context().run,
+                                                              self._answer_in_slot, limiter, place_name, agents)
+                keys.append(key)
+            
+            answers: Dict[str, Optional[str]] = {}
+            for key, future in futures.items():
+                try:
+                    answers[key] = future.result()
+                except Exception as e:
+                    answers[key] = f"Error processing query: {str(e)}"
+            
+            return [answers[key] if key else NO_PLACE_MESSAGE for key in keys]
 
+    def _answer_in_slot(self, limiter: Optional[ConcurrencyLimiter], place_name: str,
+                        agents: Dict[str, bool]) -> Optional[str]:
+        """answer_for_place, holding one of the limiter's slots (None if no slot was free in time)."""
+        if limiter is None:
+            return self.answer_for_place(place_name, agents)
+        if not limiter.acquire():
+            return None
+        try:
+            return self.answer_for_place(place_name, agents)
+        finally:
+            limiter.release()
+    
+    async def aprocess_batch(self, queries: List[str],
+                             limiter: Optional[AsyncConcurrencyLimiter] = None) -> List[Optional[str]]:
+        """
+        Async version of process_batch: the distinct questions run as tasks,
+        at most BATCH_POOL_SIZE at a time.
+        
+        Args:
+            queries: User queries
+            limiter: Query slots of the server; each distinct question holds one while it runs
+            
+        Returns:
+            One response per query, in the same order (None for a shed question)
+        """
+        with tracing.trace("process_batch"):
+            keys = []
+            questions: Dict[str, Tuple[str, Dict[str, bool]]] = {}
+            for query in queries:
+                place_name = self.extract_place_name(query)
+                if not place_name:
+                    keys.append(None)
+                    continue
+                agents = self.select_agents(query)
+                key = self._response_key(place_name, agents)
+                questions.setdefault(key, (place_name, agents))
+                keys.append(key)
+            
+            slots = asyncio.Semaphore(BATCH_POOL_SIZE)
+            
+            async def answer(place_name: str, agents: Dict[str, bool]) -> Optional[str]:
+                async with slots:
+                    if limiter is None:
+                        return await self.aanswer_for_place(place_name, agents)
+                    if not await limiter.acquire():
+                        return None
+                    try:
+                        return await self.aanswer_for_place(place_name, agents)
+                    finally:
+                        limiter.release()
+            
+            results = await asyncio.gather(*(answer(*question) for question in questions.values()),
+                                           return_exceptions=True)
+            answers: Dict[str, Optional[str]] = {}
+            for key, result in zip(questions, results):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                answers[key] = f"Error processing query: {str(result)}" if isinstance(result, Exception) else result
+            
+            return [answers[key] if key else NO_PLACE_MESSAGE for key in keys]
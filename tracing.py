@@ -0,0 +1,261 @@
+"""
+Per-request span tracing for the multi-agent tourism system.
+A trace records how long each step of a query took (place extraction, geocoding,
+weather, famous-place lookups, the Overpass search, ...), so slow queries can be
+attributed to a step. The API returns the breakdown in a Server-Timing header
+(and in the body on request), and finished traces can be written as JSON lines.
+
+    with tracing.trace("query") as t:       # starts a trace, or a span inside one
+        with tracing.span("extract_place"):
+            ...
+    t.to_dict()
+
+Spans follow contextvars, so they nest across function calls and asyncio tasks;
+work submitted to a thread pool must be run in a copy of the caller's context
+(contextvars.copy_context().run) to be part of the trace.
+"""
+import asyncio
+import contextvars
+import functools
+import itertools
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from jsonl_log import JSONLWriter
+
+# Set TRACING=0 to turn tracing off (spans then cost one context variable lookup)
+TRACING_ENABLED = os.environ.get("TRACING", "1") == "1"
+# JSON lines file finished traces are appended to ("-" for stdout); empty disables it
+TRACE_LOG_PATH = os.environ.get("TRACE_LOG_PATH", "")
+# Only traces that took at least this many milliseconds are written to the log
+TRACE_LOG_MIN_MS = float(os.environ.get("TRACE_LOG_MIN_MS", 0))
+
+
+class Trace:
+    """The spans recorded while serving one request."""
+
+    def __init__(self, name: str):
+        """
+        Start a trace.
+
+        Args:
+            name: Name of the root span (e.g. "POST /api/query")
+        """
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.started = time.perf_counter()
+        self.timestamp = time.time()
+        self.duration_ms: Optional[float] = None
+        self.spans: List[Dict] = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _start_span(self, name: str, parent: Optional[int], attrs: Dict) -> Dict:
+        record = {
+            "id": next(self._ids),
+            "parent": parent,
+            "name": name,
+            "start_ms": round((time.perf_counter() - self.started) * 1000, 3),
+            "duration_ms": None,
+        }
+        if attrs:
+            record["attrs"] = dict(attrs)
+        return record
+
+    def _end_span(self, record: Dict, started: float, error: Optional[BaseException]) -> None:
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        if error is not None:
+            record["error"] = type(error).__name__
+        with self._lock:
+            # Background work that outlives the request is not part of its trace
+            if self.duration_ms is None:
+                self.spans.append(record)
+
+    def finish(self) -> None:
+        """Stop the trace's clock; later spans are dropped."""
+        with self._lock:
+            if self.duration_ms is None:
+                self.duration_ms = round((time.perf_counter() - self.started) * 1000, 3)
+
+    def breakdown(self) -> Dict[str, float]:
+        """
+        Total milliseconds per span name, in order of first start.
+
+        Nested spans are counted under their own name as well as inside their parent's.
+        """
+        totals: Dict[str, float] = {}
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record["start_ms"])
+        for record in spans:
+            totals[record["name"]] = totals.get(record["name"], 0.0) + record["duration_ms"]
+        return totals
+
+    def server_timing(self) -> str:
+        """The breakdown as a Server-Timing header value, with the trace total last."""
+        entries = [f"{name};dur={duration:.1f}" for name, duration in self.breakdown().items()]
+        if self.duration_ms is not None:
+            entries.append(f"total;dur={self.duration_ms:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self) -> Dict:
+        """
+        The trace as JSON-serialisable data.
+
+        Returns:
+            Dictionary with trace_id, name, timestamp, duration_ms and spans (in start
+            order; each with id, parent, name, start_ms, duration_ms and optional attrs
+            and error)
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record["start_ms"])
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "timestamp": round(self.timestamp, 3),
+            "duration_ms": self.duration_ms,
+            "spans": spans,
+        }
+
+
+class TraceLog:
+    """Append-only log of finished traces, one JSON object per line."""
+
+    def __init__(self, path: str = TRACE_LOG_PATH, min_ms: float = TRACE_LOG_MIN_MS):
+        """
+        Initialize the log.
+
+        Args:
+            path: JSON lines file, "-" for stdout, or an empty string to disable logging
+            min_ms: Only traces that took at least this many milliseconds are written
+        """
+        self.path = path
+        self.min_ms = min_ms
+        self._writer = JSONLWriter(path, "trace log")
+
+    def write(self, trace: Trace) -> None:
+        """
+        Write a finished trace if it is slow enough.
+
+        Args:
+            trace: Finished trace
+        """
+        if not self.path or (trace.duration_ms or 0) < self.min_ms:
+            return
+        self._writer.write(trace.to_dict())
+
+
+trace_log = TraceLog()
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_current_span: contextvars.ContextVar[Optional[Dict]] = contextvars.ContextVar("span", default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace in effect, or None outside a traced request."""
+    return _current_trace.get()
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Dict]]:
+    """
+    Time a block as a span of the current trace (does nothing outside a trace).
+
+    Args:
+        name: Span name (e.g. "fetch_attractions")
+        **attrs: Attributes recorded with the span
+
+    Yields:
+        The span record, or None outside a trace
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    record = trace._start_span(name, parent["id"] if parent else None, attrs)
+    token = _current_span.set(record)
+    started = time.perf_counter()
+    error = None
+    try:
+        yield record
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        trace._end_span(record, started, error)
+
+
+@contextmanager
+def trace(name: str) -> Iterator[Optional[Trace]]:
+    """
+    Start a trace, or a span if a trace is already in effect.
+
+    A trace started here is finished and written to the trace log on exit.
+
+    Args:
+        name: Name of the trace (or span)
+
+    Yields:
+        The trace in effect (None if tracing is disabled)
+    """
+    current = _current_trace.get()
+    if current is not None:
+        with span(name):
+            yield current
+        return
+    if not TRACING_ENABLED:
+        yield None
+        return
+
+    new_trace = Trace(name)
+    trace_token = _current_trace.set(new_trace)
+    span_token = _current_span.set(None)
+    try:
+        yield new_trace
+    finally:
+        _current_span.reset(span_token)
+        _current_trace.reset(trace_token)
+        new_trace.finish()
+        trace_log.write(new_trace)
+
+
+def annotate(**attrs: Any) -> None:
+    """Add attributes (e.g. cache="hit") to the current span, if any."""
+    record = _current_span.get()
+    if record is not None and _current_trace.get() is not None:
+        record.setdefault("attrs", {}).update(attrs)
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Decorator recording every call of a function (sync or async) as a span.
+
+    Args:
+        name: Span name (default: the function's name)
+    """
+    def decorator(fn: Callable) -> Callable:
+        span_name = name or fn.__name__
+
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if _current_trace.get() is None:
+                    return await fn(*args, **kwargs)
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return fn(*args, **kwargs)
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,109 @@
+"""
+Traffic capture for the multi-agent tourism system.
+With TRAFFIC_LOG_PATH set, the web servers append one JSON line per answered API
+request (timestamp, endpoint, sanitized query, status, latency and response
+cache outcome). benchmarks/replay_traffic.py re-issues a captured log against a
+running server, to load-test with the real traffic shape.
+"""
+import os
+import random
+import re
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Union
+
+from jsonl_log import JSONLWriter
+from tracing import Trace
+
+# JSON lines file API requests are appended to; empty disables capture
+TRAFFIC_LOG_PATH = os.environ.get("TRAFFIC_LOG_PATH", "")
+# Share of requests captured (0-1)
+TRAFFIC_LOG_SAMPLE = float(os.environ.get("TRAFFIC_LOG_SAMPLE", 1.0))
+# Queries are truncated to this many characters
+MAX_QUERY_LENGTH = 500
+
+# Personal data users sometimes type into a query; it is masked before the query is written
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+PHONE_PATTERN = re.compile(r"\+?\d[\d\s().-]{6,}\d")
+
+
+def sanitize_query(query: str) -> str:
+    """
+    Make a query safe to store: email addresses and phone-like numbers are masked,
+    whitespace (including control characters) is collapsed and the text is truncated.
+
+    Args:
+        query: User's query
+
+    Returns:
+        The sanitized query
+    """
+    query = EMAIL_PATTERN.sub("<email>", query)
+    query = PHONE_PATTERN.sub("<number>", query)
+    return " ".join(query.split())[:MAX_QUERY_LENGTH]
+
+
+def cache_outcomes(trace: Optional[Trace]) -> List[str]:
+    """
+    The response cache outcomes ("hit", "stale" or "miss") recorded in a trace.
+
+    Args:
+        trace: The request's trace (None if tracing is off)
+
+    Returns:
+        One outcome per response cache lookup, in order
+    """
+    if trace is None:
+        return []
+    return [span["attrs"]["cache"] for span in trace.to_dict()["spans"]
+            if span["name"] == "response_cache" and "cache" in span.get("attrs", {})]
+
+
+class TrafficLog:
+    """Append-only log of API requests, one JSON object per line."""
+
+    def __init__(self, path: str = TRAFFIC_LOG_PATH, sample: float = TRAFFIC_LOG_SAMPLE):
+        """
+        Initialize the log.
+
+        Args:
+            path: JSON lines file, or an empty string to disable capture
+            sample: Share of requests captured (0-1)
+        """
+        self.path = path
+        self.sample = sample
+        self._writer = JSONLWriter(path, "traffic log")
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def record(self, endpoint: str, query: Union[str, List[str]], status: int, seconds: float,
+               trace: Optional[Trace] = None) -> None:
+        """
+        Append one API request.
+
+        Args:
+            endpoint: Request path (e.g. "/api/query")
+            query: The query, or the list of queries of a batch request
+            status: HTTP status of the response
+            seconds: Time taken to answer
+            trace: The request's trace, for the response cache outcome
+        """
+        if not self.path or (self.sample < 1 and random.random() >= self.sample):
+            return
+
+        record: Dict = {"ts": round(time.time() - seconds, 3), "endpoint": endpoint}
+        outcomes = cache_outcomes(trace)
+        if isinstance(query, list):
+            record["queries"] = [sanitize_query(q) for q in query]
+            record["cache"] = dict(Counter(outcomes)) if outcomes else None
+        else:
+            record["query"] = sanitize_query(query)
+            record["cache"] = outcomes[0] if outcomes else None
+        record["status"] = status
+        record["latency_ms"] = round(seconds * 1000, 1)
+        self._writer.write(record)
+
+
+traffic_log = TrafficLog()